@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Stress test for deleting agenda items.
+
+Creates a big agenda and deletes some items out of it. The incremental
+update of the tree (Item.delete) is compared with the former implementation
+which moved every child and rebuilt the whole tree afterwards.
+"""
+
+import argparse
+import random
+
+from benchmark_environment import measure, print_results, setup_database
+
+
+def create_agenda(roots, children, grandchildren):
+    """
+    Creates roots * (1 + children * (1 + grandchildren)) items.
+    """
+    from openslides.agenda.models import Item
+
+    tree = {}
+    number = 0
+    for root_number in range(roots):
+        number += 1
+        root_id = number
+        tree[root_id] = (None, root_number)
+        for child_number in range(children):
+            number += 1
+            child_id = number
+            tree[child_id] = (root_id, child_number)
+            for grandchild_number in range(grandchildren):
+                number += 1
+                tree[number] = (child_id, grandchild_number)
+    Item.objects.all().delete()
+    Item.objects.bulk_create(
+        Item(pk=pk, title='Item %d' % pk, lft=0, rght=0, level=0, tree_id=0)
+        for pk in tree)
+    Item.objects.set_tree(tree)
+    return tree
+
+
+def delete_with_rebuild(item, with_children):
+    """
+    The former implementation of Item.delete.
+    """
+    from openslides.agenda.models import Item
+
+    if not with_children:
+        for child in item.get_children():
+            child.move_to(item.parent)
+            child.save()
+    super(Item, item).delete()
+    Item.objects.rebuild()
+
+
+def check_tree():
+    """
+    Checks that the tree fields of all items are consistent with the parents.
+    """
+    from openslides.agenda.models import Item
+
+    bounds = []
+    rows = Item.objects.values_list('tree_id', 'lft', 'rght', 'level', 'parent', 'pk').order_by('tree_id', 'lft')
+    for tree_id, left, right, level, parent, pk in rows:
+        if not bounds or bounds[0][0] != tree_id:
+            assert parent is None and left == 1 and level == 0, 'Invalid root %d' % pk
+            bounds = [(tree_id, right, pk)]
+            continue
+        while bounds and bounds[-1][1] < left:
+            bounds.pop()
+        assert bounds and bounds[-1][2] == parent, 'Invalid parent of %d' % pk
+        assert right < bounds[-1][1] and level == len(bounds), 'Invalid tree fields of %d' % pk
+        bounds.append((tree_id, right, pk))
+
+
+def get_parents():
+    from openslides.agenda.models import Item
+    return dict(Item.objects.values_list('pk', 'parent'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-r', '--roots', type=int, default=50)
+    parser.add_argument('-c', '--children', type=int, default=9)
+    parser.add_argument('-g', '--grandchildren', type=int, default=10)
+    parser.add_argument('-d', '--deletions', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_database()
+    from openslides.agenda.models import Item
+
+    tree = create_agenda(args.roots, args.children, args.grandchildren)
+    print('Agenda with %d items, deleting %d items.' % (len(tree), args.deletions))
+    random.seed(0)
+    deletions = [(pk, random.choice((True, False)))
+                 for pk in random.sample(list(tree), args.deletions)]
+
+    results = {}
+    with measure(results, 'Incremental update'):
+        for pk, with_children in deletions:
+            if Item.objects.filter(pk=pk).exists():
+                Item.objects.get(pk=pk).delete(with_children=with_children)
+    incremental_parents = get_parents()
+    check_tree()
+
+    create_agenda(args.roots, args.children, args.grandchildren)
+    with measure(results, 'Full rebuild'):
+        for pk, with_children in deletions:
+            if Item.objects.filter(pk=pk).exists():
+                delete_with_rebuild(Item.objects.get(pk=pk), with_children)
+    assert incremental_parents == get_parents(), 'The results differ.'
+
+    print_results(results)
+
+
+if __name__ == '__main__':
+    main()
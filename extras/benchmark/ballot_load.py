@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Load test for electronic ballots.
+
+Many delegates cast their ballots for one motion poll at the same time in
+parallel threads. Some of them send their ballot several times. Afterwards
+the ballot box is closed and the votes are checked: every delegate has to
+be counted exactly once. The former way to save votes, a form with the new
+weights for every ballot, is run for comparison.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from benchmark_environment import setup_database
+
+VALUES = ['Yes', 'No', 'Abstain']
+
+
+def vote_with_ballot_box(request, poll):
+    from openslides.motion.views import poll_ballot
+    return poll_ballot(request, pk=str(poll.motion_id), poll_number=str(poll.poll_number))
+
+
+def vote_without_ballot_box(request, poll):
+    """
+    Reads the votes and saves them with the new ballot, like the poll form.
+    """
+    from django.http import HttpResponse, HttpResponseBadRequest
+    value = request.POST['option-%d' % poll.option_id]
+    option = poll.get_options().get()
+    data = dict((vote_value, option[vote_value].weight if option[vote_value] else 0)
+                for vote_value in VALUES)
+    data[value] += 1
+    poll.set_vote_objects_with_values(option, data)
+    return HttpResponse() if value in VALUES else HttpResponseBadRequest()
+
+
+def run(vote, users, poll, repeat):
+    """
+    Calls vote(request, poll) 'repeat' times for every user at the same time.
+    Returns the run time and a dictionary with the number of results per
+    type.
+    """
+    from django.db import connection
+    from django.test.client import RequestFactory
+
+    start = threading.Event()
+    results = {}
+    lock = threading.Lock()
+    factory = RequestFactory()
+
+    def worker(number, user):
+        request = factory.post('/', {'option-%d' % poll.option_id: VALUES[number % 3]})
+        request.user = user
+        start.wait()
+        try:
+            response = vote(request, poll)
+        except Exception as error:
+            result = 'error (%s)' % type(error).__name__
+        else:
+            result = 'accepted' if response.status_code == 200 else 'rejected'
+        finally:
+            connection.close()
+        with lock:
+            results[result] = results.get(result, 0) + 1
+
+    threads = [threading.Thread(target=worker, args=(number, user))
+               for number, user in enumerate(users) for count in range(repeat)]
+    for thread in threads:
+        thread.start()
+    start_time = time.time()
+    start.set()
+    for thread in threads:
+        thread.join()
+    return time.time() - start_time, results
+
+
+def check_votes(poll, users):
+    """
+    Returns a list of problems of the votes of the poll.
+    """
+    problems = []
+    option = poll.get_options().get()
+    for number, value in enumerate(VALUES):
+        expected = len(range(number, len(users), 3))
+        weight = option[value].weight if option[value] else 0
+        if weight != expected:
+            problems.append('%d instead of %d %s votes' % (weight, expected, value))
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-u', '--users', type=int, default=2000)
+    parser.add_argument('-r', '--repeat', type=int, default=1,
+                        help='Number of parallel requests of every user.')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        setup_database(os.path.join(directory, 'database.sqlite'))
+        from django.db import transaction
+        from openslides.motion.models import Motion, MotionPoll
+        from openslides.participant.models import User
+        from openslides.poll.ballots import ballot_boxes
+
+        with transaction.commit_on_success():
+            users = [User.objects.create(username='user%d' % number)
+                     for number in range(args.users)]
+            for user in users:
+                # Only delegates can vote.
+                user.groups.add(3)
+        for user in users:
+            # Load the permissions before the threads are started.
+            user.has_perm('motion.can_see_motion')
+        print('%d users, %d parallel requests per user.' % (args.users, args.repeat))
+        for name, vote in (('Ballot box', vote_with_ballot_box),
+                           ('Former implementation', vote_without_ballot_box)):
+            poll = Motion.objects.create(title=name, text='text').create_poll()
+            poll.option_id = poll.get_options().get().pk
+            if vote is vote_with_ballot_box:
+                ballot_boxes.open(poll)
+            run_time, results = run(vote, users, poll, args.repeat)
+            if vote is vote_with_ballot_box:
+                ballot_boxes.close(poll)
+            problems = check_votes(MotionPoll.objects.get(pk=poll.pk), users)
+            print('%-25s %8.3f s %8.1f ballots/s  %s  %s' % (
+                name, run_time, len(users) * args.repeat / run_time,
+                ', '.join('%d %s' % (count, result) for result, count in sorted(results.items())),
+                'PROBLEMS: %s' % ', '.join(problems) if problems else 'OK'))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
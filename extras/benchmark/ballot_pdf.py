@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for the PDF with the ballot papers of a motion poll.
+
+The ballot paper is drawn once as PDF form object, which is placed on the
+pages for every ballot paper. The former layout as table with one cell per
+ballot paper is run for comparison. The run time and the size of the
+documents are printed for different numbers of ballot papers.
+"""
+
+import argparse
+import time
+from io import BytesIO
+
+from benchmark_environment import setup_database
+
+
+def former_ballot_papers(story, cell, number):
+    """
+    The former layout of the ballot papers as table.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Table, TableStyle
+
+    data = [[cell, cell] for user in xrange(number / 2)]
+    if number % 2:
+        data.append([cell, ''])
+    table = Table(data, 10.5 * cm, 7.42 * cm)
+    table.setStyle(TableStyle(
+        [('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+         ('VALIGN', (0, 0), (-1, -1), 'TOP')]))
+    story.append(table)
+
+
+def build(poll, number, former):
+    """
+    Builds the PDF like the view and returns its size.
+    """
+    from reportlab.platypus import SimpleDocTemplate
+    from openslides.config.api import config
+    from openslides.motion.pdf import motion_poll_to_pdf
+
+    config['motion_pdf_ballot_papers_number'] = number
+    story = []
+    motion_poll_to_pdf(story, poll)
+    if former:
+        cell = story[0].columns[0]
+        story = []
+        former_ballot_papers(story, cell, number)
+    buffer = BytesIO()
+    SimpleDocTemplate(
+        buffer, topMargin=-6, bottomMargin=-6, leftMargin=0, rightMargin=0,
+        showBoundary=False).build(story)
+    return len(buffer.getvalue())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--numbers', type=int, nargs='+', default=[100, 1000, 5000])
+    args = parser.parse_args()
+
+    setup_database()
+    from openslides.config.api import config
+    from openslides.motion.models import Motion
+
+    config['motion_pdf_ballot_papers_selection'] = 'CUSTOM_NUMBER'
+    poll = Motion.objects.create(title='Motion', text='text').create_poll()
+
+    for number in args.numbers:
+        for name, former in (('Form object', False), ('Former table', True)):
+            start = time.time()
+            size = build(poll, number, former)
+            print('%5d ballot papers, %-12s %8.3f s %10d bytes' % (
+                number, name, time.time() - start, size))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers for the benchmark scripts in this directory.
+
+The scripts use the settings of the OpenSlides tests and a fresh in-memory
+database, so they never touch the data of an existing installation. Run them
+from the root directory of the repository, e. g.
+
+    $ python extras/benchmark/agenda_delete.py
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+
+
+def setup_database(database_file=None):
+    """
+    Creates the test database and sends the post_database_setup signal.
+
+    If 'database_file' is given, the database is saved in this file instead
+    of the memory, so that it can be used by several threads.
+    """
+    from django.db import connection
+    from openslides.core.signals import post_database_setup
+    if database_file is not None:
+        connection.settings_dict['TEST_NAME'] = database_file
+        connection.settings_dict['OPTIONS'] = {'timeout': 60}
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    post_database_setup.send(sender=None)
+
+
+@contextmanager
+def measure(results, name):
+    """
+    Context manager to save the run time and the number of queries of the
+    block into the dictionary 'results'.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    with CaptureQueriesContext(connection) as queries:
+        start = time.time()
+        yield
+        run_time = time.time() - start
+    results[name] = (run_time, len(queries))
+
+
+def print_results(results):
+    """
+    Prints the results saved by measure().
+    """
+    for name, (run_time, query_count) in sorted(results.items()):
+        print('%-40s %10.3f s %10d queries' % (name, run_time, query_count))
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for the PDF with all motions.
+
+Creates many motions with longer html texts, supporters and a poll and
+builds the PDF with all motions. The html texts are parsed in one process
+and in a pool of worker processes. The whole view is run at last, which
+streams the document out of a temporary file.
+"""
+
+import argparse
+import multiprocessing
+
+from benchmark_environment import measure, print_results, setup_database
+
+PARAGRAPH = '<p>%s</p>\n' % ' '.join(
+    ['Lorem ipsum dolor sit amet, consectetur adipiscing elit.'] * 8)
+
+TEXT = (PARAGRAPH * 6 +
+        '<ul>\n<li>First point</li>\n<li>Second point</li>\n</ul>\n'
+        '<ol>\n<li>First step</li>\n<li>Second step</li>\n</ol>\n' +
+        PARAGRAPH * 4)
+
+
+def create_motions(count, supporters):
+    """
+    Creates 'count' motions with 'supporters' supporters each. Every tenth
+    motion gets a poll with votes.
+    """
+    from openslides.motion.models import (Motion, MotionSubmitter,
+                                          MotionSupporter, MotionVersion,
+                                          State)
+    from openslides.participant.models import User
+
+    users = [User.objects.create(username='user%d' % number, last_name='User %d' % number)
+             for number in range(supporters + 1)]
+    state = State.objects.get(name='submitted')
+    Motion.objects.bulk_create(
+        Motion(pk=pk, identifier='%d' % pk, state=state, active_version_id=pk)
+        for pk in range(1, count + 1))
+    MotionVersion.objects.bulk_create(
+        MotionVersion(pk=pk, motion_id=pk, version_number=1, title='Motion %d' % pk,
+                      text=TEXT, reason=PARAGRAPH)
+        for pk in range(1, count + 1))
+    # bulk_create does not call save(), so the texts are only saved, if the
+    # version fills its fields at once.
+    assert MotionVersion.objects.get(pk=1).text == TEXT, 'The motion texts are empty.'
+    MotionSubmitter.objects.bulk_create(
+        MotionSubmitter(motion_id=pk, person=users[0]) for pk in range(1, count + 1))
+    MotionSupporter.objects.bulk_create(
+        MotionSupporter(motion_id=pk, person=user)
+        for pk in range(1, count + 1) for user in users[1:])
+    for motion in Motion.objects.filter(pk__in=range(1, count + 1, 10)):
+        poll = motion.create_poll()
+        poll.set_vote_objects_with_values(poll.get_options().get(), {'Yes': 10, 'No': 5, 'Abstain': 1})
+    # bulk_create does not count the versions and supporters.
+    Motion.objects.update_counters()
+
+
+def build_story(processes):
+    from openslides.motion.pdf import motions_to_pdf, paragraph_cache
+    paragraph_cache.clear()
+    story = []
+    motions_to_pdf(story, processes)
+    return story
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-m', '--motions', type=int, default=600)
+    parser.add_argument('-s', '--supporters', type=int, default=5)
+    parser.add_argument('-p', '--processes', type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args()
+
+    setup_database()
+    from django.test.client import RequestFactory
+    from openslides.config.api import config
+    from openslides.motion.views import motion_list_pdf
+    from openslides.participant.models import User
+
+    config['motion_min_supporters'] = 1
+    create_motions(args.motions, args.supporters)
+    print('%d motions, %d worker processes.' % (args.motions, args.processes))
+
+    results = {}
+    with measure(results, 'Story, one process'):
+        serial_story = build_story(1)
+    with measure(results, 'Story, %d processes' % args.processes):
+        parallel_story = build_story(args.processes)
+    assert len(serial_story) == len(parallel_story), 'The stories differ.'
+
+    request = RequestFactory().get('/motion/pdf/')
+    request.user = User.objects.get(username='admin')
+    with measure(results, 'Whole view'):
+        response = motion_list_pdf(request)
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    print('PDF with %d bytes.' % size)
+
+    print_results(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Microbenchmark for the conversion of the html text of a long motion into
+ReportLab flowables.
+
+The text has about 50 pages. The conversion with BeautifulSoup is compared
+with the conversion of the paragraphs from the paragraph cache.
+"""
+
+import argparse
+
+from benchmark_environment import measure, print_results
+
+PARAGRAPH = '<p>%s</p>\n' % ' '.join(
+    ['Lorem <strong>ipsum</strong> dolor sit amet, consectetur adipiscing elit.'] * 12)
+
+LISTS = ('<ul>\n<li>First point</li>\n<li>Second point</li>\n</ul>\n'
+         '<ol>\n<li>First step</li>\n<li>Second step</li>\n</ol>\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-p', '--pages', type=int, default=50)
+    parser.add_argument('-r', '--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    from openslides.motion.pdf import append_paragraphs, paragraph_cache, parse_html
+
+    text = '<h2>Chapter %d</h2>\n' + PARAGRAPH * 5 + LISTS
+    text = ''.join(text % number for number in range(args.pages))
+    print('Text with %d characters, %d repetitions.' % (len(text), args.repeat))
+
+    results = {}
+    with measure(results, 'BeautifulSoup'):
+        for number in range(args.repeat):
+            append_paragraphs([], parse_html(text, True))
+    paragraph_cache.get_paragraphs([text], True)
+    with measure(results, 'Paragraph cache'):
+        for number in range(args.repeat):
+            append_paragraphs([], paragraph_cache.get_paragraphs([text], True)[0])
+
+    print_results(results)
+
+
+if __name__ == '__main__':
+    main()
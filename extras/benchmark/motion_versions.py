@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for the storage of motion versions as deltas.
+
+Creates motions with many versions of a long html text, where every version
+changes some paragraphs. The size of the database and the time to read the
+texts of all versions are compared for complete versions and for deltas
+(setting MOTION_VERSION_SNAPSHOT_INTERVAL), with an empty and a filled cache.
+The cache of the test settings holds 300 entries, so the default numbers of
+motions and versions fit into it.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+
+from benchmark_environment import measure, print_results, setup_database
+
+PARAGRAPH = '<p>%s</p>\n' % ' '.join(
+    ['Lorem ipsum dolor sit amet, consectetur adipiscing elit.'] * 8)
+
+
+def create_motions(count, versions):
+    """
+    Creates 'count' motions with 'versions' versions each.
+    """
+    from openslides.motion.models import Motion
+    for number in range(count):
+        paragraphs = [PARAGRAPH] * 30
+        motion = Motion(title='Motion %d' % number, text=''.join(paragraphs), reason=PARAGRAPH)
+        motion.save()
+        for version_number in range(1, versions):
+            paragraphs[version_number % 30] = '<p>Amendment %d</p>\n' % version_number
+            motion.text = ''.join(paragraphs)
+            motion.save(use_version=motion.get_new_version())
+
+
+def get_size(database_file):
+    from django.db import connection
+    connection.cursor().execute('VACUUM')
+    return os.path.getsize(database_file)
+
+
+def read_versions():
+    from openslides.motion.models import MotionVersion
+    return sum(len(version.text) for version in MotionVersion.objects.all())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-m', '--motions', type=int, default=10)
+    parser.add_argument('-v', '--versions', type=int, default=20)
+    parser.add_argument('-i', '--interval', type=int, default=10)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    database_file = os.path.join(directory, 'database.sqlite')
+    try:
+        setup_database(database_file)
+        from django.core.cache import cache
+        from django.test.utils import override_settings
+        from openslides.motion.models import MotionVersion
+
+        create_motions(args.motions, args.versions)
+        print('%d motions with %d versions, snapshot interval %d.' % (
+            args.motions, args.versions, args.interval))
+        print('Database with complete versions: %d bytes.' % get_size(database_file))
+
+        results = {}
+        with measure(results, 'Read complete versions'):
+            size = read_versions()
+        with override_settings(MOTION_VERSION_SNAPSHOT_INTERVAL=args.interval):
+            with measure(results, 'Encode deltas'):
+                MotionVersion.objects.encode_versions()
+            print('Database with deltas: %d bytes.' % get_size(database_file))
+            cache.clear()
+            with measure(results, 'Read deltas, empty cache'):
+                assert read_versions() == size, 'The texts differ.'
+            with measure(results, 'Read deltas, filled cache'):
+                assert read_versions() == size, 'The texts differ.'
+        print_results(results)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark for the PDFs with all participants.
+
+The participant list and the access data sheets are built for many users
+like in the views. The flowables of the users are created in chunks, while
+the document is built. The former way, a story with the flowables of all
+users, is run for comparison. Every PDF is built in a subprocess, so that
+the additional peak memory of the process can be measured.
+"""
+
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+from benchmark_environment import setup_database
+
+
+def get_memory():
+    """
+    Returns the resident memory of the process in kB.
+    """
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize() / 1024
+
+
+def build(view_class, former):
+    """
+    Builds the PDF of the view into a temporary file in a subprocess.
+    Returns the run time, the additional peak memory in kB and the size of
+    the PDF.
+    """
+    read_pipe, write_pipe = os.pipe()
+    pid = os.fork()
+    if not pid:
+        os.close(read_pipe)
+        view = view_class()
+        if former:
+            # All chunks are created before the document is built.
+            append_to_pdf = view.append_to_pdf
+
+            def append_all_to_pdf(pdf):
+                append_to_pdf(pdf)
+                chunks = pdf.pop()
+                pdf.extend(flowable for chunk in chunks.chunks for flowable in chunk)
+
+            view.append_to_pdf = append_all_to_pdf
+        memory = get_memory()
+        start = time.time()
+        buffer = tempfile.TemporaryFile()
+        view.write_pdf(buffer)
+        result = '%f %d %d' % (
+            time.time() - start,
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - memory,
+            buffer.tell())
+        os.write(write_pipe, result)
+        os._exit(0)
+    os.close(write_pipe)
+    result = os.read(read_pipe, 1024)
+    os.close(read_pipe)
+    os.waitpid(pid, 0)
+    run_time, memory, size = result.split()
+    return float(run_time), int(memory), int(size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-u', '--users', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_database()
+    from django.db import transaction
+    from openslides.config.api import config
+    from openslides.participant.models import User
+    from openslides.participant.views import ParticipantsListPDF, ParticipantsPasswordsPDF
+
+    config['participant_pdf_url'] = 'http://127.0.0.1:8000'
+    with transaction.commit_on_success():
+        for number in range(args.users):
+            User.objects.create(
+                username='user%d' % number, first_name='First name %d' % number,
+                last_name='Last name %d' % number, structure_level='Structure level',
+                default_password='password%d' % number)
+
+    print('%d users' % args.users)
+    for view_class in (ParticipantsListPDF, ParticipantsPasswordsPDF):
+        for name, former in (('Chunks', False), ('Former story', True)):
+            run_time, memory, size = build(view_class, former)
+            print('%-25s %-13s %8.3f s %8d kB peak memory %10d bytes' % (
+                view_class.__name__, name, run_time, memory, size))
+
+
+if __name__ == '__main__':
+    main()
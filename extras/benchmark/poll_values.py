@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Microbenchmark for the formatting of vote values with percent values.
+
+The former formatting with the global locale of the process is compared with
+print_value, which uses the cached decimal separator of the active language.
+It is also run with the separator read once, like in VoteResultTable.
+"""
+
+import argparse
+import locale
+
+from benchmark_environment import measure, print_results
+
+
+def print_value_with_locale(value, percent_base):
+    """
+    The former formatting, which sets the global locale for every value.
+    """
+    locale.setlocale(locale.LC_ALL, '')
+    return u'%d (%s %%)' % (value, locale.format('%.1f', value * percent_base))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--number', type=int, default=100000)
+    args = parser.parse_args()
+
+    from django.utils import translation
+    from openslides.poll.models import get_decimal_separator, print_value
+
+    translation.activate('de')
+    values = range(args.number)
+    percent_base = 100 / float(args.number)
+    print('%d values.' % args.number)
+
+    results = {}
+    with measure(results, 'Global locale'):
+        for value in values:
+            print_value_with_locale(value, percent_base)
+    with measure(results, 'print_value'):
+        for value in values:
+            print_value(value, percent_base)
+    with measure(results, 'print_value, one separator'):
+        decimal_separator = get_decimal_separator()
+        for value in values:
+            print_value(value, percent_base, decimal_separator)
+
+    print_results(results)
+
+
+if __name__ == '__main__':
+    main()
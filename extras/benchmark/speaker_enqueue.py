@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Load test for adding many speakers to a list of speakers at the same time.
+
+Every participant tries to get on the list of speakers of one item
+several times in parallel threads, like many delegates pressing the button
+at once. Afterwards the list is checked: every participant has to be on the
+list exactly once and the weights have to be unique. The former
+implementation is run for comparison.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from benchmark_environment import setup_database
+
+
+def add_without_lock(person, item):
+    """
+    The former implementation of Speaker.objects.add.
+    """
+    from django.db import models
+    from django.utils.translation import ugettext as _
+    from openslides.agenda.models import Speaker
+    from openslides.utils.exceptions import OpenSlidesError
+
+    if Speaker.objects.filter(person=person, item=item, begin_time=None).exists():
+        raise OpenSlidesError(_('%s is already on the list of speakers.') % person)
+    weight = (Speaker.objects.filter(item=item).aggregate(
+        models.Max('weight'))['weight__max'] or 0)
+    return Speaker.objects.create(item=item, person=person, weight=weight + 1)
+
+
+def run(add, users, item, repeat):
+    """
+    Calls add(user, item) 'repeat' times for every user at the same time.
+    Returns the run time and a dictionary with the number of results per
+    type.
+    """
+    from django.db import connection
+    from openslides.utils.exceptions import OpenSlidesError
+
+    start = threading.Event()
+    results = {}
+    lock = threading.Lock()
+
+    def worker(user):
+        start.wait()
+        try:
+            add(user, item)
+        except OpenSlidesError:
+            result = 'rejected'
+        except Exception as error:
+            result = 'error (%s)' % type(error).__name__
+        else:
+            result = 'added'
+        finally:
+            connection.close()
+        with lock:
+            results[result] = results.get(result, 0) + 1
+
+    threads = [threading.Thread(target=worker, args=(user,))
+               for user in users for number in range(repeat)]
+    for thread in threads:
+        thread.start()
+    start_time = time.time()
+    start.set()
+    for thread in threads:
+        thread.join()
+    return time.time() - start_time, results
+
+
+def check_list_of_speakers(item, users):
+    """
+    Returns a list of problems of the list of speakers.
+    """
+    from openslides.agenda.models import Speaker
+
+    problems = []
+    rows = Speaker.objects.filter(item=item).values_list('person', 'weight')
+    persons = [person for person, weight in rows]
+    weights = [weight for person, weight in rows]
+    if len(set(persons)) != len(persons):
+        problems.append('%d duplicate speakers' % (len(persons) - len(set(persons))))
+    if len(set(weights)) != len(weights):
+        problems.append('%d duplicate weights' % (len(weights) - len(set(weights))))
+    if len(set(persons)) != len(users):
+        problems.append('%d missing speakers' % (len(users) - len(set(persons))))
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-u', '--users', type=int, default=200)
+    parser.add_argument('-r', '--repeat', type=int, default=2,
+                        help='Number of parallel requests of every user.')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        setup_database(os.path.join(directory, 'database.sqlite'))
+        from openslides.agenda.models import Item, Speaker
+        from openslides.participant.models import User
+
+        users = [User.objects.create(username='user%d' % number)
+                 for number in range(args.users)]
+        print('%d users, %d parallel requests per user.' % (args.users, args.repeat))
+        for name, add in (('Speaker.objects.add', Speaker.objects.add),
+                          ('Former implementation', add_without_lock)):
+            item = Item.objects.create(title=name)
+            run_time, results = run(add, users, item, args.repeat)
+            problems = check_list_of_speakers(item, users)
+            print('%-25s %8.3f s %8.1f requests/s  %s  %s' % (
+                name, run_time, len(users) * args.repeat / run_time,
+                ', '.join('%d %s' % (count, result) for result, count in sorted(results.items())),
+                'PROBLEMS: %s' % ', '.join(problems) if problems else 'OK'))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
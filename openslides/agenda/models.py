@@ -1,14 +1,17 @@
 # -*- coding: utf-8 -*-
 
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timedelta
 
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.contenttypes import generic
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import ugettext as _
 from django.utils.translation import ugettext_lazy, ugettext_noop
+from mptt.managers import TreeManager
 from mptt.models import MPTTModel, TreeForeignKey
 
 from openslides.config.api import config
@@ -18,9 +21,193 @@ from openslides.projector.api import (get_active_slide, reset_countdown,
 from openslides.projector.models import SlideMixin
 from openslides.utils.exceptions import OpenSlidesError
 from openslides.utils.models import AbsoluteUrlMixin
+from openslides.utils.pdf_cache import bulk_write
 from openslides.utils.person.models import PersonField
 
 
+class Schedule(object):
+    """
+    The time schedule of the agenda.
+
+    Contains the duration and the estimated end of every item with a
+    duration, the start and the end of the event and the duration of the
+    whole agenda. Use Item.objects.get_schedule() to get the schedule.
+    """
+
+    def __init__(self, start, durations):
+        """
+        The argument 'start' is the begin of the event as datetime or None.
+        The argument 'durations' has to be an iterable of two-tuples
+        (item_id, duration) in the order of the agenda.
+        """
+        self.start = start
+        self.durations = {}
+        self.end_times = {}
+        total = timedelta()
+        for item_id, duration in durations:
+            if not duration:
+                continue
+            if ':' in duration:
+                hours, minutes = map(int, duration.split(':'))
+            else:
+                hours, minutes = divmod(int(duration), 60)
+                duration = u'%d:%02d' % (hours, minutes)
+            total += timedelta(hours=hours, minutes=minutes)
+            self.durations[item_id] = duration
+            if start is not None:
+                self.end_times[item_id] = start + total
+        self.end = None if start is None else start + total
+        self.duration = u'%d:%02d' % (
+            total.days * 24 + total.seconds / 3600, total.seconds / 60 % 60)
+
+
+class ItemManager(TreeManager):
+    """
+    Tree manager for agenda items with an api to change the whole tree at once.
+    """
+    schedule_cache_key = 'agenda_schedule'
+
+    def get_schedule(self):
+        """
+        Returns the time schedule of the agenda.
+
+        The schedule is calculated once and saved in the cache until an
+        item or the start of the event changes.
+        """
+        schedule = cache.get(self.schedule_cache_key)
+        if schedule is None:
+            start = config['agenda_start_event_date_time']
+            if start:
+                start = datetime.strptime(start, '%d.%m.%Y %H:%M')
+            else:
+                start = None
+            schedule = Schedule(start, self.values_list('pk', 'duration'))
+            cache.set(self.schedule_cache_key, schedule)
+        return schedule
+
+    def reset_schedule(self):
+        """
+        Removes the time schedule of the agenda from the cache.
+        """
+        cache.delete(self.schedule_cache_key)
+
+    def set_tree(self, tree):
+        """
+        Sets the parents and weights of many items and recalculates the tree
+        fields of all items in one transaction.
+
+        The argument 'tree' has to be a dictionary with item ids as keys and
+        two-tuples (parent_id, weight) as values. A parent id which is not
+        the id of an existing item (e. g. 0) makes the item a root item.
+        Items which are not in 'tree' keep their parent and weight.
+
+        The tree is validated and calculated in memory, so only rows with
+        changed values are written to the database. Raises OpenSlidesError
+        if the new tree contains a circle.
+        """
+        opts = self.model._mptt_meta
+        field_names = [opts.parent_attr, 'weight', opts.left_attr,
+                       opts.right_attr, opts.level_attr, opts.tree_id_attr]
+        connection = self._get_connection()
+
+        with bulk_write('agenda', using=connection.alias):
+            old_values = dict(
+                (row[0], row[1:]) for row in
+                self.values_list('pk', *field_names).order_by())
+
+            # Apply the new parents and weights.
+            new_values = {}
+            children = defaultdict(list)
+            for pk, values in old_values.items():
+                parent_id, weight = tree.get(pk, values[:2])
+                if parent_id not in old_values:
+                    parent_id = None
+                new_values[pk] = [parent_id, weight, None, None, None, None]
+                children[parent_id].append(pk)
+            for child_list in children.values():
+                # Same order as used by django-mptt (order_insertion_by).
+                child_list.sort(key=lambda pk: (new_values[pk][1], pk))
+
+            # Walk through the tree to calculate the mptt fields.
+            for tree_id, root_id in enumerate(children[None], start=1):
+                counter = 1
+                new_values[root_id][2:] = [counter, None, 0, tree_id]
+                stack = [(root_id, iter(children[root_id]))]
+                while stack:
+                    pk, child_iterator = stack[-1]
+                    child_id = next(child_iterator, None)
+                    counter += 1
+                    if child_id is None:
+                        new_values[pk][3] = counter
+                        stack.pop()
+                    else:
+                        new_values[child_id][2:] = [counter, None, len(stack), tree_id]
+                        stack.append((child_id, iter(children[child_id])))
+
+            if any(values[2] is None for values in new_values.values()):
+                # Items which could not be reached from a root item are
+                # their own ancestors.
+                raise OpenSlidesError(_('The agenda tree must not contain circles.'))
+
+            # Write the changed rows.
+            qn = connection.ops.quote_name
+            meta = self.model._meta
+            query = 'UPDATE %s SET %s WHERE %s = %%s' % (
+                qn(meta.db_table),
+                ', '.join('%s = %%s' % qn(meta.get_field(name).column) for name in field_names),
+                qn(meta.pk.column))
+            changed_rows = [values + [item_id] for item_id, values in new_values.items()
+                            if tuple(values) != tuple(old_values[item_id])]
+            if changed_rows:
+                connection.cursor().executemany(query, changed_rows)
+        self.reset_schedule()
+
+    def promote_children(self, item):
+        """
+        Moves all children of the item one level up, so that they take the
+        place of the item in the agenda tree.
+
+        Afterwards the item is a leaf node. Only the tree fields of the
+        descendants of the item are changed. If the item is a root node, its
+        children become root nodes of new trees behind the tree of the item.
+        The tree fields of the instance 'item' are updated too.
+        """
+        opts = self.model._mptt_meta
+        with bulk_write('agenda', using=self._get_connection().alias):
+            left, right, level, tree_id = self.filter(pk=item.pk).values_list(
+                opts.left_attr, opts.right_attr, opts.level_attr, opts.tree_id_attr)[0]
+            if right - left > 1:
+                children = self._mptt_filter(parent__pk=item.pk)
+                if item.parent_id is None:
+                    # Every child gets its own tree.
+                    child_ranges = children.order_by(opts.left_attr).values_list(
+                        opts.left_attr, opts.right_attr)
+                    self._create_tree_space(tree_id, len(child_ranges))
+                    for number, (child_left, child_right) in enumerate(child_ranges, start=1):
+                        self._mptt_update(
+                            self._mptt_filter(tree_id=tree_id, left__gte=child_left, right__lte=child_right),
+                            left=models.F(opts.left_attr) - (child_left - 1),
+                            right=models.F(opts.right_attr) - (child_left - 1),
+                            level=models.F(opts.level_attr) - 1,
+                            tree_id=tree_id + number)
+                    left, right = 1, 2
+                else:
+                    # The item moves behind its descendants.
+                    self._mptt_update(
+                        self._mptt_filter(tree_id=tree_id, left__gt=left, right__lt=right),
+                        left=models.F(opts.left_attr) - 1,
+                        right=models.F(opts.right_attr) - 1,
+                        level=models.F(opts.level_attr) - 1)
+                    left = right - 1
+                self._mptt_update(children, parent=item.parent_id)
+                self._mptt_update(self.filter(pk=item.pk), left=left, right=right)
+            setattr(item, opts.left_attr, left)
+            setattr(item, opts.right_attr, right)
+            setattr(item, opts.level_attr, level)
+            setattr(item, opts.tree_id_attr, tree_id)
+        self.reset_schedule()
+
+
 class Item(SlideMixin, AbsoluteUrlMixin, MPTTModel):
     """
     An Agenda Item
@@ -29,6 +216,8 @@ class Item(SlideMixin, AbsoluteUrlMixin, MPTTModel):
     """
     slide_callback_name = 'agenda'
 
+    objects = ItemManager()
+
     AGENDA_ITEM = 1
     ORGANIZATIONAL_ITEM = 2
 
@@ -191,13 +380,20 @@ class Item(SlideMixin, AbsoluteUrlMixin, MPTTModel):
     def delete(self, with_children=False):
         """
         Delete the Item.
+
+        If with_children is False, the children take the place of the item in
+        the agenda tree. django-mptt closes the gap in the tree afterwards, so
+        no rebuild of the whole tree is necessary.
         """
-        if not with_children:
-            for child in self.get_children():
-                child.move_to(self.parent)
-                child.save()
+        if with_children:
+            # Reload the tree fields, because the instance could be outdated.
+            opts = self._mptt_meta
+            tree_fields = (opts.left_attr, opts.right_attr, opts.tree_id_attr)
+            for field, value in zip(tree_fields, Item.objects.filter(pk=self.pk).values_list(*tree_fields)[0]):
+                setattr(self, field, value)
+        else:
+            Item.objects.promote_children(self)
         super(Item, self).delete()
-        Item.objects.rebuild()
 
     def get_list_of_speakers(self, old_speakers_count=None, coming_speakers_count=None):
         """
@@ -287,16 +483,60 @@ class Item(SlideMixin, AbsoluteUrlMixin, MPTTModel):
 
 class SpeakerManager(models.Manager):
     def add(self, person, item):
-        if self.filter(person=person, item=item, begin_time=None).exists():
-            raise OpenSlidesError(_(
-                '%(person)s is already on the list of speakers of item %(id)s.')
-                % {'person': person, 'id': item.id})
+        """
+        Appends the person to the list of speakers of the item.
+
+        Concurrent calls for the same item are serialized by the database, so
+        every person is only once on the list and the weights are unique.
+        """
         if isinstance(person, AnonymousUser):
             raise OpenSlidesError(
                 _('An anonymous user can not be on lists of speakers.'))
-        weight = (self.filter(item=item).aggregate(
-            models.Max('weight'))['weight__max'] or 0)
-        return self.create(item=item, person=person, weight=weight + 1)
+        with transaction.commit_on_success():
+            weight = self.get_next_weight(item)
+            if self.filter(person=person, item=item, begin_time=None).exists():
+                raise OpenSlidesError(_(
+                    '%(person)s is already on the list of speakers of item %(id)s.')
+                    % {'person': person, 'id': item.id})
+            return self.create(item=item, person=person, weight=weight)
+
+    def add_many(self, persons, item):
+        """
+        Appends the persons to the list of speakers of the item in one
+        transaction and returns the new speakers.
+
+        Persons, who are already on the list, and anonymous users are
+        skipped. The weights are allocated once for all persons.
+        """
+        with bulk_write('agenda'):
+            weight = self.get_next_weight(item)
+            waiting = set(self.filter(item=item, begin_time=None).values_list('person', flat=True))
+            speakers = []
+            for person in persons:
+                if isinstance(person, AnonymousUser) or person.person_id in waiting:
+                    continue
+                waiting.add(person.person_id)
+                speakers.append(self.model(item=item, person=person, weight=weight))
+                weight += 1
+            self.bulk_create(speakers)
+        return speakers
+
+    def get_next_weight(self, item):
+        """
+        Returns the weight for a new speaker at the end of the list of
+        speakers of the item.
+
+        This has to be called inside a transaction. It locks the row of the
+        item until the transaction ends, so that other transactions can not
+        get the same weight. The last weight is read from the index on item
+        and weight, so the costs do not grow with the length of the list.
+        """
+        # Lock the item with an update which does not change it.
+        Item.objects.filter(pk=item.pk).update(
+            speaker_list_closed=models.F('speaker_list_closed'))
+        last_weight = self.filter(item=item, weight__isnull=False).order_by(
+            '-weight').values_list('weight', flat=True)[:1]
+        return (last_weight[0] if last_weight else 0) + 1
 
 
 class Speaker(AbsoluteUrlMixin, models.Model):
@@ -335,6 +575,7 @@ class Speaker(AbsoluteUrlMixin, models.Model):
         permissions = (
             ('can_be_speaker', ugettext_noop('Can put oneself on the list of speakers')),
         )
+        unique_together = ('item', 'weight')
 
     def save(self, *args, **kwargs):
         super(Speaker, self).save(*args, **kwargs)
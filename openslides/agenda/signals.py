@@ -5,7 +5,7 @@ from datetime import datetime
 from django import forms
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
-from django.db.models.signals import pre_delete
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.template.loader import render_to_string
 from django.utils.translation import ugettext as _
@@ -43,7 +43,8 @@ def setup_agenda_config(sender, **kwargs):
             widget=forms.DateTimeInput(format='%d.%m.%Y %H:%M'),
             required=False,
             label=ugettext_lazy('Begin of event'),
-            help_text=ugettext_lazy('Input format: DD.MM.YYYY HH:MM')))
+            help_text=ugettext_lazy('Input format: DD.MM.YYYY HH:MM')),
+        on_change=Item.objects.reset_schedule)
 
     agenda_show_last_speakers = ConfigVariable(
         name='agenda_show_last_speakers',
@@ -134,3 +135,13 @@ def listen_to_related_object_delete_signal(sender, instance, **kwargs):
             item.content_type = None
             item.object_id = None
             item.save()
+
+
+@receiver(post_save, sender=Item, dispatch_uid='agenda_reset_schedule_on_save')
+@receiver(post_delete, sender=Item, dispatch_uid='agenda_reset_schedule_on_delete')
+def reset_schedule(sender, **kwargs):
+    """
+    Receiver to remove the time schedule of the agenda from the cache when
+    an item is saved or deleted.
+    """
+    Item.objects.reset_schedule()
@@ -37,7 +37,7 @@ def agenda_slide(**kwargs):
         else:
             items = item.get_children().filter(type__exact=Item.AGENDA_ITEM)
             context['title'] = item.get_title()
-        context['items'] = items
+        context['items'] = items.prefetch_related('content_object')
         slide = render_to_string('agenda/item_slide_summary.html', context)
 
     elif slide_type == 'list_of_speakers':
@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 # TODO: Rename all views and template names
 
-from datetime import datetime, timedelta
 from json import dumps
 
 from django.contrib import messages
@@ -9,7 +8,6 @@ from django.contrib.contenttypes.models import ContentType
 from django.contrib.staticfiles.templatetags.staticfiles import static
 from django.core.urlresolvers import reverse
 from django.db import transaction
-from django.db.models import Model
 from django.template.loader import render_to_string
 from django.utils.datastructures import SortedDict
 from django.utils.safestring import mark_safe
@@ -58,6 +56,8 @@ class Overview(TemplateView):
             items = Item.objects.all()
         else:
             items = Item.objects.filter(type__exact=Item.AGENDA_ITEM)
+        # Load the related objects with one query per content type.
+        items = items.prefetch_related('content_object')
 
         # Save the items as a list (not a queryset). This is important,
         # because in other case, django-mtpp reloads the items in the
@@ -66,39 +66,10 @@ class Overview(TemplateView):
         # TODO: Try to remove this line in later versions of django-mptt
         items = list(items)
 
-        start = config['agenda_start_event_date_time']
-        if start is None or len(start) == 0:
-            start = None
-        else:
-            start = datetime.strptime(start, '%d.%m.%Y %H:%M')
-
-        duration = timedelta()
-
+        schedule = Item.objects.get_schedule()
         for item in items:
-            if item.duration is not None and len(item.duration) > 0:
-                if ':' in item.duration:
-                    duration_list = item.duration.split(':')
-                    duration += timedelta(hours=int(duration_list[0]),
-                                          minutes=int(duration_list[1]))
-                else:
-                    hours = int(item.duration) / 60
-                    minutes = int(item.duration) - (60 * hours)
-                    duration += timedelta(hours=hours,
-                                          minutes=minutes)
-                    if minutes < 10:
-                        minutes = "%s%s" % (0, minutes)
-                    item.duration = "%s:%s" % (hours, minutes)
-                if start is not None:
-                    item.tooltip = start + duration
-
-        if start is None:
-            end = None
-        else:
-            end = start + duration
-
-        duration = u'%d:%02d' % (
-            (duration.days * 24 + duration.seconds / 3600.0),
-            (duration.seconds / 60.0 % 60))
+            item.duration_display = schedule.durations.get(item.pk)
+            item.end_time = schedule.end_times.get(item.pk)
 
         active_slide = get_active_slide()
         if active_slide['callback'] == 'agenda':
@@ -111,47 +82,41 @@ class Overview(TemplateView):
         context.update({
             'items': items,
             'agenda_is_active': agenda_is_active,
-            'duration': duration,
-            'start': start,
-            'end': end,
+            'duration': schedule.duration,
+            'start': schedule.start,
+            'end': schedule.end,
             'active_type': active_type})
         return context
 
-    @transaction.commit_manually
     def post(self, request, *args, **kwargs):
+        """
+        Sets the new order of all items and renders the overview.
+
+        The order of all items is validated first and then saved at once.
+        """
         if not request.user.has_perm('agenda.can_manage_agenda'):
             messages.error(
                 request,
                 _('You are not authorized to manage the agenda.'))
-            context = self.get_context_data(**kwargs)
-            return self.render_to_response(context)
-
-        transaction.commit()
-        for item in Item.objects.all():
-            form = ItemOrderForm(request.POST, prefix="i%d" % item.id)
-            if form.is_valid():
-                try:
-                    parent = Item.objects.get(id=form.cleaned_data['parent'])
-                except Item.DoesNotExist:
-                    parent = None
-                item.weight = form.cleaned_data['weight']
-                item.parent = parent
-                Model.save(item)
-            else:
-                transaction.rollback()
-                messages.error(
-                    request, _('Errors when reordering of the agenda'))
-                break
         else:
-            Item.objects.rebuild()
-            # TODO: assure, that it is a valid tree
-        context = self.get_context_data(**kwargs)
-        transaction.commit()
-
-        if get_active_slide()['callback'] == 'agenda':
-            update_projector()
+            tree = {}
+            for item_id in Item.objects.values_list('pk', flat=True):
+                form = ItemOrderForm(request.POST, prefix="i%d" % item_id)
+                if not form.is_valid():
+                    messages.error(
+                        request, _('Errors when reordering of the agenda'))
+                    break
+                tree[item_id] = (form.cleaned_data['parent'], form.cleaned_data['weight'])
+            else:
+                try:
+                    Item.objects.set_tree(tree)
+                except OpenSlidesError:
+                    messages.error(
+                        request, _('Errors when reordering of the agenda'))
+                else:
+                    if get_active_slide()['callback'] == 'agenda':
+                        update_projector()
         context = self.get_context_data(**kwargs)
-        transaction.commit()
         return self.render_to_response(context)
 
 
@@ -343,12 +308,13 @@ class AgendaPDF(PDFView):
     permission_required = 'agenda.can_see_agenda'
     filename = ugettext_lazy('Agenda')
     document_title = ugettext_lazy('Agenda')
+    pdf_cache_apps = ('agenda', 'motion', 'assignment')
 
     def append_to_pdf(self, story):
-        for item in Item.objects.filter(type__exact=Item.AGENDA_ITEM):
-            ancestors = item.get_ancestors()
-            if ancestors:
-                space = "&nbsp;" * 6 * ancestors.count()
+        items = Item.objects.filter(type__exact=Item.AGENDA_ITEM).prefetch_related('content_object')
+        for item in items:
+            if item.level:
+                space = "&nbsp;" * 6 * item.level
                 story.append(Paragraph(
                     "%s%s" % (space, item.get_title()),
                     stylesheet['Subitem']))
@@ -508,7 +474,6 @@ class SpeakerChangeOrderView(SingleObjectMixin, RedirectView):
     def pre_redirect(self, args, **kwargs):
         self.object = self.get_object()
 
-    @transaction.commit_manually
     def pre_post_redirect(self, request, *args, **kwargs):
         """
         Reorder the list of speaker.
@@ -516,23 +481,23 @@ class SpeakerChangeOrderView(SingleObjectMixin, RedirectView):
         Take the string 'sort_order' from the post-data, and use this order.
         """
         self.object = self.get_object()
-        transaction.commit()
-        for (counter, speaker) in enumerate(self.request.POST['sort_order'].split(',')):
-            try:
-                speaker_pk = int(speaker.split('_')[1])
-            except IndexError:
-                transaction.rollback()
-                break
-            try:
-                speaker = Speaker.objects.filter(item=self.object).get(pk=speaker_pk)
-            except:
-                transaction.rollback()
-                break
-            speaker.weight = counter + 1
-            speaker.save()
-        else:
-            transaction.commit()
-            return None
+        try:
+            speaker_pks = [int(speaker.split('_')[1])
+                           for speaker in self.request.POST['sort_order'].split(',')]
+        except (IndexError, ValueError):
+            speaker_pks = None
+        with transaction.commit_on_success():
+            speakers = Speaker.objects.filter(item=self.object).in_bulk(speaker_pks or [])
+            if speaker_pks and len(speakers) == len(set(speaker_pks)):
+                # The speakers get new weights behind the list, so the
+                # weights stay unique while they are saved.
+                weight = Speaker.objects.get_next_weight(self.object)
+                for speaker_pk in speaker_pks:
+                    speaker = speakers[speaker_pk]
+                    speaker.weight = weight
+                    speaker.save()
+                    weight += 1
+                return None
         messages.error(request, _('Could not change order. Invalid data.'))
 
     def get_url_name_args(self):
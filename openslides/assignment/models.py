@@ -1,21 +1,25 @@
 # -*- coding: utf-8 -*-
 
+from collections import namedtuple
+
 from django.contrib.contenttypes.models import ContentType
 from django.core.urlresolvers import reverse
 from django.db import models
-from django.utils.datastructures import SortedDict
+from django.db.models import F, Max
 from django.utils.translation import ugettext as _
 from django.utils.translation import ugettext_lazy, ugettext_noop
 
 from openslides.agenda.models import Item, Speaker
 from openslides.config.api import config
+from openslides.participant.api import get_person_summaries
 from openslides.poll.models import (BaseOption, BasePoll, BaseVote,
                                     CollectDefaultVotesMixin,
-                                    PublishPollMixin)
+                                    PublishPollMixin, get_decimal_separator,
+                                    print_value)
 from openslides.projector.models import RelatedModelMixin, SlideMixin
-from openslides.utils.exceptions import OpenSlidesError
 from openslides.utils.models import AbsoluteUrlMixin
-from openslides.utils.person import PersonField
+from openslides.utils.pdf_cache import bulk_write
+from openslides.utils.person import PersonField, get_persons
 from openslides.utils.utils import html_strong
 
 
@@ -83,9 +87,11 @@ class Assignment(SlideMixin, AbsoluteUrlMixin, models.Model):
         return url
 
     def get_slide_context(self, **context):
+        vote_results = self.vote_results(only_published=True)
         context.update({
-            'polls': self.poll_set.filter(published=True),
-            'vote_results': self.vote_results(only_published=True)})
+            'candidates': self.get_participants(only_candidate=True),
+            'polls': vote_results.polls,
+            'vote_results': vote_results})
         return super(Assignment, self).get_slide_context(**context)
 
     def set_status(self, status):
@@ -162,13 +168,21 @@ class Assignment(SlideMixin, AbsoluteUrlMixin, models.Model):
 
     @property
     def candidates(self):
-        return self.get_participants(only_candidate=True)
+        return self.get_participants(only_candidate=True, summaries=False)
 
     @property
     def elected(self):
-        return self.get_participants(only_elected=True)
+        return self.get_participants(only_elected=True, summaries=False)
+
+    def get_participants(self, only_elected=False, only_candidate=False, summaries=True):
+        """
+        Returns the persons, who are not blocked, sorted by name.
 
-    def get_participants(self, only_elected=False, only_candidate=False):
+        If 'summaries' is True, the persons are PersonSummary objects. They
+        are equal to the full person objects, but a full object is not equal
+        to a summary, so 'person in assignment.get_participants()' is always
+        False for full objects.
+        """
         candidates = self.assignment_candidates.exclude(blocked=True)
 
         assert not (only_elected and only_candidate)
@@ -179,12 +193,16 @@ class Assignment(SlideMixin, AbsoluteUrlMixin, models.Model):
         if only_candidate:
             candidates = candidates.filter(elected=False)
 
-        participants = []
-        for candidate in candidates.all():
-            participants.append(candidate.person)
+        # The persons are loaded at once, because the PersonField would load
+        # every person on its own.
+        person_ids = list(candidates.values_list('person', flat=True))
+        if summaries:
+            persons = get_person_summaries(person_ids)
+        else:
+            persons = get_persons(person_ids)
+        participants = [persons[person_id] for person_id in person_ids]
         participants.sort(key=lambda person: person.sort_name)
         return participants
-        # return candidates.values_list('person', flat=True)
 
     def set_elected(self, person, value=True):
         candidate = self.assignment_candidates.get(person=person)
@@ -192,64 +210,78 @@ class Assignment(SlideMixin, AbsoluteUrlMixin, models.Model):
         candidate.save()
 
     def is_elected(self, person):
-        return person in self.elected
+        return self.assignment_candidates.filter(
+            person=person, elected=True, blocked=False).exists()
+
+    def use_yesnoabstain(self):
+        """
+        Returns True, if the candidates of a new poll get yes, no and abstain
+        votes, or False, if they only get votes.
+        """
+        if config['assignment_poll_vote_values'] == 'votes':
+            return False
+        elif config['assignment_poll_vote_values'] == 'yesnoabstain':
+            return True
+        else:
+            # candidates <= available posts -> yes/no/abstain
+            participants = self.assignment_candidates.exclude(blocked=True)
+            return (participants.filter(elected=False).count() <=
+                    self.posts - participants.filter(elected=True).count())
 
     def gen_poll(self):
         """
         Creates an new poll for the assignment and adds all candidates to all
         lists of speakers of related agenda items.
+
+        The assignment is locked while the poll gets the next ballot number,
+        so that concurrent requests do not get the same number.
         """
-        poll = AssignmentPoll.objects.create(
-            assignment=self, description=self.poll_description_default)
-        poll.set_options([{'candidate': person} for person in self.candidates])
+        with bulk_write('assignment'):
+            self.lock()
+            ballot_number = self.poll_set.aggregate(Max('ballot_number'))['ballot_number__max'] or 0
+            poll = AssignmentPoll.objects.create(
+                assignment=self, description=self.poll_description_default,
+                ballot_number=ballot_number + 1, yesnoabstain=self.use_yesnoabstain())
+            candidates = self.get_participants(only_candidate=True)
+            poll.set_options([{'candidate': person} for person in candidates])
         items = Item.objects.filter(content_type=ContentType.objects.get_for_model(Assignment), object_id=self.pk)
+        added_speakers = []
         for item in items:
-            someone_added = None
-            for candidate in self.candidates:
-                try:
-                    someone_added = Speaker.objects.add(candidate, item)
-                except OpenSlidesError:
-                    # The Speaker is already on the list. Do nothing.
-                    # TODO: Find a smart way not to catch the error concerning AnonymousUser.
-                    pass
-            if someone_added is not None:
-                someone_added.check_and_update_projector()
+            added_speakers.extend(Speaker.objects.add_many(candidates, item)[:1])
+        # Only one item can be on the projector, so it is updated once.
+        for speaker in added_speakers:
+            if speaker.item.is_active_slide():
+                speaker.check_and_update_projector()
+                break
         return poll
 
+    def lock(self):
+        """
+        Locks the row of the assignment until the transaction ends, see
+        SpeakerManager.get_next_weight.
+        """
+        # Lock the assignment with an update which does not change it.
+        Assignment.objects.filter(pk=self.pk).update(posts=F('posts'))
+
+    def renumber_polls(self):
+        """
+        Numbers the ballots of the polls from 1 without gaps. Has to be
+        called in a transaction after the assignment is locked.
+        """
+        ballot_numbers = self.poll_set.order_by('ballot_number', 'pk').values_list('pk', 'ballot_number')
+        for number, (poll_id, ballot_number) in enumerate(ballot_numbers, start=1):
+            if ballot_number != number:
+                AssignmentPoll.objects.filter(pk=poll_id).update(ballot_number=number)
+
     def vote_results(self, only_published):
         """
-        returns a table represented as a list with all candidates from all
-        related polls and their vote results.
+        Returns a VoteResultTable with all candidates from all related polls
+        and their vote results.
         """
-        vote_results_dict = SortedDict()
-        # All polls related to this assigment
-        polls = self.poll_set.all()
+        polls = self.poll_set.order_by('ballot_number')
         if only_published:
             polls = polls.filter(published=True)
-        # All PollOption-Objects related to this assignment
-        options = []
-        for poll in polls:
-            options += poll.get_options()
-
-        options.sort(key=lambda option: option.candidate.sort_name)
-
-        for option in options:
-            candidate = option.candidate
-            if candidate in vote_results_dict:
-                continue
-            vote_results_dict[candidate] = []
-            for poll in polls:
-                votes = {}
-                try:
-                    # candidate related to this poll
-                    poll_option = poll.get_options().get(candidate=candidate)
-                    for vote in poll_option.get_votes():
-                        votes[vote.value] = vote.print_weight()
-                except AssignmentOption.DoesNotExist:
-                    # candidate not in related to this poll
-                    votes = None
-                vote_results_dict[candidate].append(votes)
-        return vote_results_dict
+        return VoteResultTable(self, polls)
 
     def get_agenda_title(self):
         return self.name
@@ -276,13 +308,34 @@ class AssignmentPoll(RelatedModelMixin, CollectDefaultVotesMixin,
     option_class = AssignmentOption
     assignment = models.ForeignKey(Assignment, related_name='poll_set')
     yesnoabstain = models.NullBooleanField()
+    """
+    True for yes, no and abstain votes, False for votes only. It is set when
+    the poll is created.
+    """
+
     description = models.CharField(
         max_length=79, null=True, blank=True,
         verbose_name=ugettext_lazy("Comment on the ballot paper"))
 
+    ballot_number = models.PositiveIntegerField(default=1)
+    """
+    The number of the poll in relation to the assignment. The following
+    polls get lower numbers, if a poll is deleted.
+    """
+
     def __unicode__(self):
         return _("Ballot %d") % self.get_ballot()
 
+    def delete(self, *args, **kwargs):
+        """
+        Deletes the poll in one transaction with the new ballot numbers of the
+        following polls (see the receiver renumber_assignment_polls). The
+        assignment is locked first.
+        """
+        with bulk_write('assignment'):
+            Assignment(pk=self.assignment_id).lock()
+            return super(AssignmentPoll, self).delete(*args, **kwargs)
+
     def get_absolute_url(self, link='update'):
         if link == 'update':
             url = reverse('assignment_poll_view', args=[str(self.pk)])
@@ -300,24 +353,24 @@ class AssignmentPoll(RelatedModelMixin, CollectDefaultVotesMixin,
 
     def get_vote_values(self):
         if self.yesnoabstain is None:
-            if config['assignment_poll_vote_values'] == 'votes':
-                self.yesnoabstain = False
-            elif config['assignment_poll_vote_values'] == 'yesnoabstain':
-                self.yesnoabstain = True
-            else:
-                # candidates <= available posts -> yes/no/abstain
-                if len(self.assignment.candidates) <= (self.assignment.posts - len(self.assignment.elected)):
-                    self.yesnoabstain = True
-                else:
-                    self.yesnoabstain = False
-            self.save()
+            # The poll was created without the mode. It is not saved here,
+            # because this method is called to read the poll.
+            self.yesnoabstain = self.assignment.use_yesnoabstain()
         if self.yesnoabstain:
             return [ugettext_noop('Yes'), ugettext_noop('No'), ugettext_noop('Abstain')]
         else:
             return [ugettext_noop('Votes')]
 
+    def get_ballot_max_options(self):
+        """
+        Returns the number of available posts, if the poll has votes only.
+        """
+        if self.get_vote_values() == ['Votes']:
+            return self.assignment.posts
+        return None
+
     def get_ballot(self):
-        return self.assignment.poll_set.filter(id__lte=self.id).count()
+        return self.ballot_number
 
     def get_percent_base_choice(self):
         return config['assignment_poll_100_percent_base']
@@ -325,3 +378,57 @@ class AssignmentPoll(RelatedModelMixin, CollectDefaultVotesMixin,
     def append_pollform_fields(self, fields):
         fields.append('description')
         super(AssignmentPoll, self).append_pollform_fields(fields)
+
+
+VoteResultRow = namedtuple('VoteResultRow', ['candidate', 'elected', 'votes'])
+
+
+class VoteResultTable(object):
+    """
+    The results of the polls of an assignment as table with one row per
+    candidate and one column per poll.
+
+    The votes of all polls are loaded with one query. The attribute rows
+    is a list of VoteResultRow objects sorted by the names of the
+    candidates. Their attribute votes contains one entry for every poll:
+    None if the candidate was not in the poll, else a dictionary with the
+    printed weights of the vote values. The percent bases are computed once
+    per poll.
+    """
+
+    def __init__(self, assignment, polls):
+        self.polls = list(polls)
+        poll_indexes = dict((poll.pk, index) for index, poll in enumerate(self.polls))
+        decimal_separator = get_decimal_separator()
+        percent_bases = []
+        for poll in self.polls:
+            poll.assignment = assignment
+            percent_bases.append(poll.get_percent_base())
+        self.has_votes = [False] * len(self.polls)
+
+        votes_by_person = {}
+        for poll_id, person_id, value, weight in AssignmentOption.objects.filter(
+                poll__in=poll_indexes).values_list(
+                'poll', 'candidate', 'assignmentvote__value', 'assignmentvote__weight'):
+            index = poll_indexes[poll_id]
+            votes = votes_by_person.setdefault(person_id, [None] * len(self.polls))
+            if votes[index] is None:
+                votes[index] = {}
+            if value is not None:
+                votes[index][value] = print_value(weight, percent_bases[index], decimal_separator)
+                self.has_votes[index] = True
+
+        elected = set(assignment.assignment_candidates.filter(
+            elected=True, blocked=False).values_list('person', flat=True))
+        persons = get_person_summaries(votes_by_person)
+        self.rows = sorted(
+            (VoteResultRow(persons[person_id], person_id in elected, votes)
+             for person_id, votes in votes_by_person.items()),
+            key=lambda row: row.candidate.sort_name)
+
+    @property
+    def columns(self):
+        """
+        Returns a list of tuples with each poll and whether it has votes.
+        """
+        return zip(self.polls, self.has_votes)
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from django import forms
+from django.db.models.signals import post_delete
 from django.dispatch import receiver
 from django.utils.translation import ugettext as _
 from django.utils.translation import ugettext_lazy, ugettext_noop
@@ -9,6 +10,8 @@ from openslides.config.api import ConfigGroup, ConfigGroupedCollection, ConfigVa
 from openslides.config.signals import config_signal
 from openslides.poll.models import PERCENT_BASE_CHOICES
 
+from .models import Assignment, AssignmentPoll
+
 
 @receiver(config_signal, dispatch_uid='setup_assignment_config')
 def setup_assignment_config(sender, **kwargs):
@@ -95,3 +98,15 @@ def setup_assignment_config(sender, **kwargs):
         required_permission='config.can_manage',
         weight=40,
         groups=(group_ballot, group_pdf))
+
+
+@receiver(post_delete, sender=AssignmentPoll, dispatch_uid='renumber_assignment_polls')
+def renumber_assignment_polls(sender, instance, **kwargs):
+    """
+    Receiver to decrease the ballot numbers of the polls after the deleted
+    poll. It is also called for polls deleted with a queryset. Django runs
+    the deletion and the receiver in one transaction.
+    """
+    assignment = Assignment(pk=instance.assignment_id)
+    assignment.lock()
+    assignment.renumber_polls()
@@ -66,6 +66,18 @@ urlpatterns = patterns(
         views.PollUpdateView.as_view(),
         name='assignment_poll_view'),
 
+    url(r'^poll/(?P<poll_id>\d+)/ballot/$',
+        views.PollBallotView.as_view(),
+        name='assignment_poll_ballot'),
+
+    url(r'^poll/(?P<poll_id>\d+)/ballot_box/open/$',
+        views.PollBallotBoxView.as_view(open_box=True),
+        name='assignment_poll_ballot_box_open'),
+
+    url(r'^poll/(?P<poll_id>\d+)/ballot_box/close/$',
+        views.PollBallotBoxView.as_view(open_box=False),
+        name='assignment_poll_ballot_box_close'),
+
     url(r'^poll/(?P<pk>\d+)/del/$',
         views.AssignmentPollDeleteView.as_view(),
         name='assignment_poll_delete'),
@@ -12,9 +12,10 @@ from reportlab.platypus import (PageBreak, Paragraph, SimpleDocTemplate, Spacer,
 
 from openslides.agenda.views import CreateRelatedAgendaItemView as _CreateRelatedAgendaItemView
 from openslides.config.api import config
-from openslides.participant.models import Group, User
-from openslides.poll.views import PollFormView
-from openslides.utils.pdf import stylesheet
+from openslides.participant.api import get_person_summaries
+from openslides.participant.models import User
+from openslides.poll.views import BallotBoxView, BallotView, PollFormView
+from openslides.utils.pdf import append_ballot_papers, stylesheet
 from openslides.utils.person import get_person
 from openslides.utils.utils import html_strong
 from openslides.utils.views import (CreateView, DeleteView, DetailView,
@@ -43,18 +44,20 @@ class AssignmentDetail(DetailView):
             context['form'] = self.form_class(self.request.POST)
         else:
             context['form'] = self.form_class()
-        polls = self.object.poll_set.all()
-        if not self.request.user.has_perm('assignment.can_manage_assignment'):
-            polls = self.object.poll_set.filter(published=True)
-            vote_results = self.object.vote_results(only_published=True)
-        else:
-            polls = self.object.poll_set.all()
-            vote_results = self.object.vote_results(only_published=False)
+        only_published = not self.request.user.has_perm('assignment.can_manage_assignment')
+        vote_results = self.object.vote_results(only_published)
 
         blocked_candidates = [
             candidate.person for candidate in
             self.object.assignment_candidates.filter(blocked=True)]
-        context['polls'] = polls
+        # The persons are loaded once for the whole template.
+        participants = self.object.get_participants()
+        elected_ids = set(self.object.assignment_candidates.filter(
+            elected=True, blocked=False).values_list('person', flat=True))
+        context['participants'] = participants
+        context['candidates'] = [person for person in participants if person.person_id not in elected_ids]
+        context['elected_ids'] = elected_ids
+        context['polls'] = vote_results.polls
         context['vote_results'] = vote_results
         context['blocked_candidates'] = blocked_candidates
         context['user_is_candidate'] = self.object.is_candidate(self.request.user)
@@ -268,6 +271,22 @@ class SetElectedView(SingleObjectMixin, RedirectView):
         return {'elected': self.elected, 'link': link, 'text': text}
 
 
+class PollBallotView(BallotView):
+    """
+    View to cast an electronic ballot for an AssignmentPoll.
+    """
+    permission_required = 'assignment.can_see_assignment'
+    poll_class = AssignmentPoll
+
+
+class PollBallotBoxView(BallotBoxView):
+    """
+    View to open or close the ballot box of an AssignmentPoll.
+    """
+    permission_required = 'assignment.can_manage_assignment'
+    poll_class = AssignmentPoll
+
+
 class AssignmentPollDeleteView(DeleteView):
     """
     Delete an assignment poll object.
@@ -296,6 +315,10 @@ class AssignmentPollDeleteView(DeleteView):
 class AssignmentPDF(PDFView):
     permission_required = 'assignment.can_see_assignment'
     top_space = 0
+    pdf_cache_apps = ('assignment', 'participant')
+    pdf_cache_config_keys = PDFView.pdf_cache_config_keys + (
+        'assignment_pdf_title', 'assignment_pdf_preamble', 'assignment_poll_vote_values',
+        'assignment_poll_100_percent_base', 'participant_sort_users_by_first_name')
 
     def get_filename(self):
         try:
@@ -376,7 +399,7 @@ class AssignmentPDF(PDFView):
 
         # Preparing
         vote_results = assignment.vote_results(only_published=True)
-        polls = assignment.poll_set.filter(published=True)
+        polls = vote_results.polls
         data_votes = []
 
         # Left side
@@ -384,12 +407,12 @@ class AssignmentPDF(PDFView):
         cell3a.append(Paragraph(
             "%s:" % (_("Vote results")), stylesheet['Heading4']))
 
-        if polls.count() == 1:
+        if len(polls) == 1:
             cell3a.append(Paragraph(
-                "%s %s" % (polls.count(), _("ballot")), stylesheet['Normal']))
-        elif polls.count() > 1:
+                "%s %s" % (len(polls), _("ballot")), stylesheet['Normal']))
+        elif len(polls) > 1:
             cell3a.append(Paragraph(
-                "%s %s" % (polls.count(), _("ballots")), stylesheet['Normal']))
+                "%s %s" % (len(polls), _("ballots")), stylesheet['Normal']))
 
         # Add table head row
         headrow = []
@@ -399,12 +422,11 @@ class AssignmentPDF(PDFView):
         data_votes.append(headrow)
 
         # Add result rows
-        elected_candidates = list(assignment.elected)
-        for candidate, poll_list in vote_results.iteritems():
+        for candidate, elected, poll_list in vote_results.rows:
             row = []
 
             candidate_string = candidate.clean_name
-            if candidate in elected_candidates:
+            if elected:
                 candidate_string = "* " + candidate_string
             if candidate.name_suffix:
                 candidate_string += "\n(%s)" % candidate.name_suffix
@@ -493,6 +515,10 @@ class CreateRelatedAgendaItemView(_CreateRelatedAgendaItemView):
 class AssignmentPollPDF(PDFView):
     permission_required = 'assignment.can_manage_assignment'
     top_space = 0
+    pdf_cache_apps = ('assignment', 'participant')
+    pdf_cache_config_keys = (
+        'assignment_pdf_ballot_papers_selection', 'assignment_pdf_ballot_papers_number',
+        'assignment_poll_vote_values', 'participant_sort_users_by_first_name')
 
     def get(self, request, *args, **kwargs):
         self.poll = AssignmentPoll.objects.get(id=self.kwargs['poll_id'])
@@ -522,11 +548,14 @@ class AssignmentPollPDF(PDFView):
         cell.append(Paragraph(
             self.poll.description or '',
             stylesheet['Ballot_subtitle']))
-        options = self.poll.get_options()
+        # The candidates are loaded as summaries with one query.
+        person_ids = list(self.poll.get_options().values_list('candidate', flat=True))
+        persons = get_person_summaries(person_ids)
+        candidates = [persons[person_id] for person_id in person_ids]
 
         ballot_string = _("%d. ballot") % self.poll.get_ballot()
         candidate_string = ungettext(
-            "%d candidate", "%d candidates", len(options)) % len(options)
+            "%d candidate", "%d candidates", len(candidates)) % len(candidates)
         available_posts_string = ungettext(
             "%d available post", "%d available posts",
             self.poll.assignment.posts) % self.poll.assignment.posts
@@ -535,18 +564,13 @@ class AssignmentPollPDF(PDFView):
             stylesheet['Ballot_description']))
         cell.append(Spacer(0, 0.4 * cm))
 
-        data = []
         # get ballot papers config values
         ballot_papers_selection = config["assignment_pdf_ballot_papers_selection"]
         ballot_papers_number = config["assignment_pdf_ballot_papers_number"]
 
         # set number of ballot papers
         if ballot_papers_selection == "NUMBER_OF_DELEGATES":
-            try:
-                if Group.objects.get(pk=3):
-                    number = User.objects.filter(groups__pk=3).count()
-            except Group.DoesNotExist:
-                number = 0
+            number = User.objects.filter(groups__pk=3).count()
         elif ballot_papers_selection == "NUMBER_OF_ALL_PARTICIPANTS":
             number = int(User.objects.count())
         else:  # ballot_papers_selection == "CUSTOM_NUMBER"
@@ -557,9 +581,8 @@ class AssignmentPollPDF(PDFView):
         cellcolumnA = []
         # Choose kind of ballot paper (YesNoAbstain or Yes)
         if self.poll.yesnoabstain:  # YesNoAbstain ballot: max 27 candidates
-            for option in options:
+            for candidate in candidates:
                 counter += 1
-                candidate = option.candidate
                 cell.append(Paragraph(
                     candidate.clean_name, stylesheet['Ballot_option_name_YNA']))
                 if candidate.name_suffix:
@@ -586,24 +609,19 @@ class AssignmentPollPDF(PDFView):
                     cell.append(Spacer(0, 1.3 * cm))
 
             # print ballot papers
-            for user in xrange(number / 2):
-                if len(options) > 13:
-                    data.append([cellcolumnA, cell])
-                else:
-                    data.append([cell, cell])
-            rest = number % 2
-            if rest:
-                data.append([cell, ''])
-            if len(options) <= 2:
-                t = Table(data, 10.5 * cm, 7.42 * cm)
-            elif len(options) <= 5:
-                t = Table(data, 10.5 * cm, 14.84 * cm)
+            if len(candidates) > 13:
+                columns = [cellcolumnA, cell]
+            else:
+                columns = [cell]
+            if len(candidates) <= 2:
+                height = 7.42 * cm
+            elif len(candidates) <= 5:
+                height = 14.84 * cm
             else:
-                t = Table(data, 10.5 * cm, 29.7 * cm)
+                height = 29.7 * cm
         else:  # Yes ballot: max 46 candidates
-            for option in options:
+            for candidate in candidates:
                 counter += 1
-                candidate = option.candidate
                 cell.append(Paragraph("<font name='circlefont' size='15'>%s</font> \
                             <font name='Ubuntu'>%s</font>" %
                             (circle, candidate.clean_name), stylesheet['Ballot_option_name']))
@@ -620,22 +638,15 @@ class AssignmentPollPDF(PDFView):
                     cell.append(Spacer(0, 0.75 * cm))
 
             # print ballot papers
-            for user in xrange(number / 2):
-                if len(options) > 22:
-                    data.append([cellcolumnA, cell])
-                else:
-                    data.append([cell, cell])
-            rest = number % 2
-            if rest:
-                data.append([cell, ''])
-            if len(options) <= 4:
-                t = Table(data, 10.5 * cm, 7.42 * cm)
-            elif len(options) <= 8:
-                t = Table(data, 10.5 * cm, 14.84 * cm)
+            if len(candidates) > 22:
+                columns = [cellcolumnA, cell]
+            else:
+                columns = [cell]
+            if len(candidates) <= 4:
+                height = 7.42 * cm
+            elif len(candidates) <= 8:
+                height = 14.84 * cm
             else:
-                t = Table(data, 10.5 * cm, 29.7 * cm)
+                height = 29.7 * cm
 
-        t.setStyle(TableStyle([
-            ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP')]))
-        story.append(t)
+        append_ballot_papers(story, columns, height, number)
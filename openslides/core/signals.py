@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from django import forms
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver, Signal
 from django.utils.translation import ugettext as _
 from django.utils.translation import ugettext_lazy, ugettext_noop
@@ -8,6 +9,7 @@ from django.utils.translation import ugettext_lazy, ugettext_noop
 from openslides.config.api import ConfigGroup, ConfigGroupedCollection, ConfigVariable
 from openslides.config.signals import config_signal
 from openslides.projector.api import update_projector
+from openslides.utils.pdf_cache import update_stamp
 
 post_database_setup = Signal()
 
@@ -151,3 +153,23 @@ def setup_general_config(sender, **kwargs):
         required_permission='config.can_manage',
         weight=10,
         groups=(group_event, group_projector, group_welcome_widget, group_system))
+
+
+@receiver(post_save, dispatch_uid='update_pdf_cache_stamp_on_save')
+@receiver(post_delete, dispatch_uid='update_pdf_cache_stamp_on_delete')
+def update_pdf_cache_stamp(sender, **kwargs):
+    """
+    Invalidates the cached PDF documents with data of the app of the saved
+    or deleted object.
+    """
+    update_stamp(sender._meta.app_label)
+
+
+@receiver(m2m_changed, dispatch_uid='update_pdf_cache_stamp_on_m2m_change')
+def update_pdf_cache_stamp_on_m2m_change(sender, instance, model, **kwargs):
+    """
+    Invalidates the cached PDF documents with data of the apps of both sides
+    of a changed many-to-many relation.
+    """
+    update_stamp(instance._meta.app_label)
+    update_stamp(model._meta.app_label)
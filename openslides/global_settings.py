@@ -114,6 +114,27 @@ CACHES = {
     }
 }
 
+# Directory for the cache of PDF documents and its maximum size in bytes. The
+# cache is disabled if PDF_CACHE_PATH is None. It needs a default cache in
+# CACHES, which is shared by all processes (not LocMemCache), because the
+# stamps of the documents are saved there.
+PDF_CACHE_PATH = None
+PDF_CACHE_MAX_SIZE = 100 * 1024 * 1024
+
+# If set to a number n, the texts of motion versions are saved as deltas to
+# their previous versions and every n-th version is saved completely. Run
+# the command encode_motion_versions after changing it. The columns delta_base
+# and delta of the table motion_motionversion are needed in any case.
+MOTION_VERSION_SNAPSHOT_INTERVAL = None
+
+# Electronic ballots are counted in batches of BALLOT_BATCH_SIZE ballots or
+# after BALLOT_FLUSH_INTERVAL seconds (never, if it is None). The ballots are
+# also written to log files in the directory BALLOT_LOG_PATH, if it is not
+# None, so that they are not lost on a restart.
+BALLOT_BATCH_SIZE = 500
+BALLOT_FLUSH_INTERVAL = 1
+BALLOT_LOG_PATH = None
+
 # Hosts/domain names that are valid for this site; required if DEBUG is False
 # See https://docs.djangoproject.com/en/1.5/ref/settings/#allowed-hosts
 ALLOWED_HOSTS = ['*']
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+import json
+import re
+from difflib import SequenceMatcher
+
+# The html texts are split after every tag and every line break.
+TOKEN_PATTERN = re.compile(r'[^\n>]*[\n>]|[^\n>]+')
+
+
+def split_tokens(text):
+    """
+    Returns a list of the parts of the text, split after every tag and line
+    break. Joining the parts returns the text again.
+    """
+    return TOKEN_PATTERN.findall(text or u'')
+
+
+def make_delta(old, new):
+    """
+    Returns the delta between two texts as list. An entry of the list is
+    either a list with the first and the last index of tokens of the old
+    text, which are reused, or a string with new content.
+
+    Returns None, if the new text is None.
+    """
+    if new is None:
+        return None
+    old_tokens = split_tokens(old)
+    new_tokens = split_tokens(new)
+    delta = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old_tokens, new_tokens).get_opcodes():
+        if tag == 'equal':
+            delta.append([i1, i2])
+        elif tag in ('replace', 'insert'):
+            content = u''.join(new_tokens[j1:j2])
+            if delta and not isinstance(delta[-1], list):
+                delta[-1] += content
+            else:
+                delta.append(content)
+    return delta
+
+
+def apply_delta(old, delta):
+    """
+    Returns the new text built from the old text and a delta created with
+    make_delta.
+    """
+    if delta is None:
+        return None
+    old_tokens = split_tokens(old)
+    parts = []
+    for entry in delta:
+        if isinstance(entry, list):
+            parts.extend(old_tokens[entry[0]:entry[1]])
+        else:
+            parts.append(entry)
+    return u''.join(parts)
+
+
+def encode_delta(old_data, new_data):
+    """
+    Returns the deltas between the values of two dictionaries as json string.
+    """
+    return json.dumps(
+        dict((key, make_delta(old_data[key], value)) for key, value in new_data.items()),
+        separators=(',', ':'), ensure_ascii=False)
+
+
+def decode_delta(old_data, delta):
+    """
+    Returns the dictionary built from the old dictionary and a json string
+    created with encode_delta.
+    """
+    return dict((key, apply_delta(old_data[key], value))
+                for key, value in json.loads(delta).items())
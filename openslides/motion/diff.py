@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import get_cache
+from django.utils.datastructures import SortedDict
+
+from openslides.utils.utils import htmldiff
+
+
+class VersionDiffCache(object):
+    """
+    Cache for the html diffs between two motion versions. If it is full, the
+    least recently used diff is removed.
+
+    The key of a diff contains the ids and a checksum of the texts of both
+    versions, so a changed version never gets an old diff. If the setting
+    CACHES contains a cache named 'motion_diff' (e. g. a file based cache),
+    the diffs are saved there too.
+    """
+
+    def __init__(self, max_entries=100):
+        self.max_entries = max_entries
+        self.entries = SortedDict()
+        self.lock = Lock()
+
+    def get_key(self, version1, version2):
+        """
+        Returns the cache key for the diffs between the two versions.
+        """
+        checksum = hashlib.md5()
+        for version in (version1, version2):
+            for value in (version.text, version.reason):
+                checksum.update((value or u'').encode('utf-8'))
+                checksum.update('\0')
+        return 'motion_diff:%d:%d:%s' % (version1.pk, version2.pk, checksum.hexdigest())
+
+    def get_store(self):
+        """
+        Returns the cache 'motion_diff' or None if it is not configured.
+        """
+        if 'motion_diff' in settings.CACHES:
+            return get_cache('motion_diff')
+        return None
+
+    def get_diffs(self, version1, version2):
+        """
+        Returns a tuple with the html diffs of the texts and of the reasons
+        of the two versions. A diff is None if both strings are equal.
+        """
+        key = self.get_key(version1, version2)
+        with self.lock:
+            diffs = self.entries.pop(key, None)
+            if diffs is not None:
+                # Move the diffs to the end, which is the most recently used.
+                self.entries[key] = diffs
+                return diffs
+
+        store = self.get_store()
+        if store is not None:
+            diffs = store.get(key)
+        if diffs is None:
+            diffs = tuple(
+                htmldiff(value1 or u'', value2 or u'') if value1 != value2 else None
+                for value1, value2 in ((version1.text, version2.text),
+                                       (version1.reason, version2.reason)))
+            if store is not None:
+                store.set(key, diffs)
+
+        with self.lock:
+            self.entries[key] = diffs
+            while len(self.entries) > self.max_entries:
+                del self.entries[self.entries.keys()[0]]
+        return diffs
+
+    def clear(self):
+        """
+        Removes all diffs from the memory.
+        """
+        with self.lock:
+            self.entries.clear()
+
+
+version_diff_cache = VersionDiffCache()
+
+
+def get_version_diffs(version1, version2):
+    """
+    Returns a tuple with the html diffs of the texts and of the reasons of
+    the two motion versions. A diff is None if both strings are equal.
+    """
+    return version_diff_cache.get_diffs(version1, version2)
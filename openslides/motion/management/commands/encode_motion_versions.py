@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+
+from django.core.management.base import NoArgsCommand
+from django.db import transaction
+
+from openslides.motion.models import MotionVersion
+
+
+class Command(NoArgsCommand):
+    """
+    Saves all motion versions again as deltas or completely according to
+    the setting MOTION_VERSION_SNAPSHOT_INTERVAL.
+    """
+    help = 'Saves all motion versions again according to MOTION_VERSION_SNAPSHOT_INTERVAL.'
+
+    def handle_noargs(self, **options):
+        with transaction.commit_on_success():
+            changed = MotionVersion.objects.encode_versions()
+        self.stdout.write('Saved %d motion versions again.' % changed)
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+
+from django.core.management.base import NoArgsCommand
+
+from openslides.motion.models import Motion
+
+
+class Command(NoArgsCommand):
+    """
+    Counts the versions, supporters and polls of all motions again and
+    repairs the wrong counters.
+    """
+    help = 'Counts the versions, supporters and polls of all motions again.'
+
+    def handle_noargs(self, **options):
+        repaired = Motion.objects.update_counters()
+        self.stdout.write('Repaired the counters of %d motions.' % repaired)
@@ -1,23 +1,190 @@
 # -*- coding: utf-8 -*-
 
+from django.conf import settings
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
-from django.db import models
-from django.db.models import Max
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, Max
 from django.utils import formats
+from django.utils.encoding import force_text
 from django.utils.translation import ugettext as _
 from django.utils.translation import ugettext_lazy, ugettext_noop
 
 from openslides.config.api import config
 from openslides.mediafile.models import Mediafile
-from openslides.poll.models import (BaseOption, BasePoll, BaseVote, CollectDefaultVotesMixin)
+from openslides.poll.models import (BaseOption, BasePoll, BaseVote,
+                                    CollectDefaultVotesMixin, load_vote_tables)
 from openslides.projector.models import RelatedModelMixin, SlideMixin
 from jsonfield import JSONField
 from openslides.utils.models import AbsoluteUrlMixin
-from openslides.utils.person import PersonField
+from openslides.utils.person import PersonField, get_persons
 
+from .delta import decode_delta, encode_delta
 from .exceptions import WorkflowError
 
 
+class MotionManager(models.Manager):
+    """
+    Manager for motions with a method to load lists of motions.
+    """
+
+    def get_list(self, queryset=None):
+        """
+        Returns the motions of the queryset as list with all data shown in
+        lists of motions.
+
+        The active versions, states and categories are loaded with the
+        motions. The last versions, the submitters and the supporters of all
+        motions are loaded with one query each and their persons with one
+        query per person type.
+        """
+        if queryset is None:
+            queryset = self.all()
+        motions = list(queryset.select_related('active_version', 'state', 'category'))
+        motion_dict = dict((motion.pk, motion) for motion in motions)
+        for motion in motions:
+            motion._submitters = []
+            motion._supporters = []
+
+        # The last versions without text and reason.
+        versions = MotionVersion.objects.filter(motion__in=motion_dict).only(
+            'motion', 'version_number', 'title', 'creation_time').order_by('version_number')
+        for version in versions:
+            motion_dict[version.motion_id]._last_version = version
+
+        person_rows = []
+        for model, attr in ((MotionSubmitter, '_submitters'), (MotionSupporter, '_supporters')):
+            for motion_id, person_id in model.objects.filter(
+                    motion__in=motion_dict).order_by('pk').values_list('motion', 'person'):
+                person_rows.append((motion_dict[motion_id], attr, person_id))
+        persons = get_persons(person_id for motion, attr, person_id in person_rows)
+        for motion, attr, person_id in person_rows:
+            getattr(motion, attr).append(persons[person_id])
+        return motions
+
+    def get_person_motion_ids(self, person):
+        """
+        Returns a tuple with the sets of the ids of the motions which the
+        person submitted and supported.
+
+        The sets are loaded once and saved in the person object, which is
+        request.user during a request. Motion.support, Motion.unsupport and
+        Motion.add_submitter reset them.
+        """
+        try:
+            return person._motion_ids
+        except AttributeError:
+            pass
+        motion_ids = tuple(
+            set(model.objects.filter(person=person).values_list('motion', flat=True))
+            for model in (MotionSubmitter, MotionSupporter))
+        try:
+            person._motion_ids = motion_ids
+        except AttributeError:
+            # The person object does not take new attributes.
+            pass
+        return motion_ids
+
+    def reset_person_motion_ids(self, person):
+        """
+        Resets the motion ids saved in the person object.
+        """
+        try:
+            del person._motion_ids
+        except AttributeError:
+            pass
+
+    def update_counters(self, queryset=None):
+        """
+        Counts the versions, supporters and polls of the motions in the
+        queryset again and saves the counters which are wrong.
+
+        Returns the number of repaired motions.
+        """
+        if queryset is None:
+            queryset = self.all()
+        queryset = queryset.order_by()
+        counters = dict((row[0], dict.fromkeys(Motion.counter_fields, 0))
+                        for row in queryset.values_list('pk'))
+        for field, relation in (('version_count', 'versions'),
+                                ('supporter_count', 'supporter'),
+                                ('poll_count', 'polls')):
+            for pk, count in queryset.annotate(count=Count(relation)).values_list('pk', 'count'):
+                counters[pk][field] = count
+
+        repaired = 0
+        for row in queryset.values_list('pk', *Motion.counter_fields):
+            values = counters[row[0]]
+            if tuple(values[field] for field in Motion.counter_fields) != row[1:]:
+                self.filter(pk=row[0]).update(**values)
+                repaired += 1
+        return repaired
+
+    def set_state(self, motions, state):
+        """
+        Sets the state of the motions. The motions are not saved.
+
+        'state' can be the id of a state object or a state object. The
+        identifiers of all motions are set at once.
+        """
+        if type(state) is int:
+            state = Workflow.objects.get_graph().states[state]
+
+        if not state.dont_set_identifier:
+            self.set_identifiers(motions)
+        for motion in motions:
+            motion.state = state
+
+    def set_identifiers(self, motions):
+        """
+        Sets the identifiers of the motions automaticly according to the
+        config value if they are not set yet. The motions are not saved.
+
+        The numbers for all motions of one counter are taken with one
+        statement. Numbers whose identifiers are already used (e. g. set
+        manually) are skipped.
+        """
+        if config['motion_identifier'] == 'manually':
+            # Do not set an identifier.
+            return
+
+        motions_by_counter = {}
+        for motion in motions:
+            if motion.identifier:
+                continue
+            if config['motion_identifier'] == 'per_category':
+                if motion.category is None:
+                    key, queryset = 'no_category', self.filter(category=None)
+                else:
+                    key, queryset = 'category:%d' % motion.category.pk, self.filter(category=motion.category)
+            else:  # That means: config['motion_identifier'] == 'serially_numbered'
+                key, queryset = 'all', self.all()
+            motions_by_counter.setdefault(key, (queryset, []))[1].append(motion)
+
+        for key, (queryset, counter_motions) in motions_by_counter.items():
+            while counter_motions:
+                number = IdentifierCounter.objects.get_numbers(key, len(counter_motions), queryset)
+                identifiers = []
+                for motion in counter_motions:
+                    if motion.category is None or not motion.category.prefix:
+                        prefix = ''
+                    else:
+                        prefix = '%s ' % motion.category.prefix
+                    identifiers.append(('%s%d' % (prefix, number), number))
+                    number += 1
+                used_identifiers = set(self.filter(
+                    identifier__in=[identifier for identifier, identifier_number in identifiers]).values_list(
+                    'identifier', flat=True))
+                remaining_motions = []
+                for motion, (identifier, identifier_number) in zip(counter_motions, identifiers):
+                    if identifier in used_identifiers:
+                        remaining_motions.append(motion)
+                    else:
+                        motion.identifier = identifier
+                        motion.identifier_number = identifier_number
+                counter_motions = remaining_motions
+
+
 class Motion(SlideMixin, AbsoluteUrlMixin, models.Model):
     """
     The Motion Class.
@@ -30,6 +197,8 @@ class Motion(SlideMixin, AbsoluteUrlMixin, models.Model):
     Name of the callback for the slide-system.
     """
 
+    objects = MotionManager()
+
     active_version = models.ForeignKey('MotionVersion', null=True,
                                        related_name="active_version",
                                        on_delete=models.SET_NULL)
@@ -71,6 +240,29 @@ class Motion(SlideMixin, AbsoluteUrlMixin, models.Model):
     Many to many relation to mediafile objects.
     """
 
+    version_count = models.PositiveIntegerField(default=0)
+    """
+    Number of versions of the motion.
+
+    The counters are only changed by update queries in the signals of the
+    versions, supporters and polls. Motion.save never writes them.
+    """
+
+    supporter_count = models.PositiveIntegerField(default=0)
+    """
+    Number of supporters of the motion.
+    """
+
+    poll_count = models.PositiveIntegerField(default=0)
+    """
+    Number of polls of the motion.
+    """
+
+    counter_fields = ('version_count', 'supporter_count', 'poll_count')
+    """
+    The names of the counter fields.
+    """
+
     # TODO: proposal
     # master = models.ForeignKey('self', null=True, blank=True)
 
@@ -116,6 +308,10 @@ class Motion(SlideMixin, AbsoluteUrlMixin, models.Model):
         this version object before giving it to this save method. The properties
         motion.title, motion.text and motion.reason will be ignored.
         """
+        # Forget the data loaded by Motion.objects.get_list().
+        for attr in ('_last_version', '_submitters', '_supporters'):
+            self.__dict__.pop(attr, None)
+
         if not self.state:
             self.reset_state()
 
@@ -124,9 +320,16 @@ class Motion(SlideMixin, AbsoluteUrlMixin, models.Model):
         if not self.identifier and isinstance(self.identifier, basestring):
             self.identifier = None
 
+        only_some_fields = 'update_fields' in kwargs
+        if not only_some_fields and not self._state.adding:
+            # Do not overwrite the counters, see Motion.version_count.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.fields
+                if not field.primary_key and field.name not in self.counter_fields]
+
         super(Motion, self).save(*args, **kwargs)
 
-        if 'update_fields' in kwargs:
+        if only_some_fields:
             # Do not save the version data if only some motion fields are updated.
             return
 
@@ -151,6 +354,7 @@ class Motion(SlideMixin, AbsoluteUrlMixin, models.Model):
                 return
             version_number = self.versions.aggregate(Max('version_number'))['version_number__max'] or 0
             use_version.version_number = version_number + 1
+            self.version_count += 1
 
         # Necessary line if the version was set before the motion got an id.
         # This is probably a Django bug.
@@ -205,28 +409,7 @@ class Motion(SlideMixin, AbsoluteUrlMixin, models.Model):
         Sets the motion identifier automaticly according to the config
         value if it is not set yet.
         """
-        if config['motion_identifier'] == 'manually' or self.identifier:
-            # Do not set an identifier.
-            return
-        elif config['motion_identifier'] == 'per_category':
-            motions = Motion.objects.filter(category=self.category)
-        else:  # That means: config['motion_identifier'] == 'serially_numbered'
-            motions = Motion.objects.all()
-
-        number = motions.aggregate(Max('identifier_number'))['identifier_number__max'] or 0
-        if self.category is None or not self.category.prefix:
-            prefix = ''
-        else:
-            prefix = '%s ' % self.category.prefix
-
-        number += 1
-        identifier = '%s%d' % (prefix, number)
-        while Motion.objects.filter(identifier=identifier).exists():
-            number += 1
-            identifier = '%s%d' % (prefix, number)
-
-        self.identifier = identifier
-        self.identifier_number = number
+        Motion.objects.set_identifiers([self])
 
     def get_title(self):
         """
@@ -348,6 +531,10 @@ class Motion(SlideMixin, AbsoluteUrlMixin, models.Model):
         """
         Return the newest version of the motion.
         """
+        try:
+            return self._last_version
+        except AttributeError:
+            pass
         try:
             return self.versions.order_by('-version_number')[0]
         except IndexError:
@@ -355,20 +542,27 @@ class Motion(SlideMixin, AbsoluteUrlMixin, models.Model):
 
     @property
     def submitters(self):
-        return sorted([object.person for object in self.submitter.all()],
-                      key=lambda person: person.sort_name)
+        try:
+            persons = self._submitters
+        except AttributeError:
+            persons = [object.person for object in self.submitter.all()]
+        return sorted(persons, key=lambda person: person.sort_name)
 
     def is_submitter(self, person):
         """Return True, if person is a submitter of this motion. Else: False."""
-        return self.submitter.filter(person=person).exists()
+        return self.pk in Motion.objects.get_person_motion_ids(person)[0]
 
     @property
     def supporters(self):
-        return sorted([object.person for object in self.supporter.all()],
-                      key=lambda person: person.sort_name)
+        try:
+            persons = self._supporters
+        except AttributeError:
+            persons = [object.person for object in self.supporter.all()]
+        return sorted(persons, key=lambda person: person.sort_name)
 
     def add_submitter(self, person):
         MotionSubmitter.objects.create(motion=self, person=person)
+        Motion.objects.reset_person_motion_ids(person)
 
     def clear_submitters(self):
         MotionSubmitter.objects.filter(motion=self).delete()
@@ -377,7 +571,7 @@ class Motion(SlideMixin, AbsoluteUrlMixin, models.Model):
         """
         Return True, if person is a supporter of this motion. Else: False.
         """
-        return self.supporter.filter(person=person).exists()
+        return self.pk in Motion.objects.get_person_motion_ids(person)[1]
 
     def support(self, person):
         """
@@ -386,6 +580,8 @@ class Motion(SlideMixin, AbsoluteUrlMixin, models.Model):
         if self.state.allow_support:
             if not self.is_supporter(person):
                 MotionSupporter(motion=self, person=person).save()
+                self.supporter_count += 1
+                Motion.objects.reset_person_motion_ids(person)
         else:
             raise WorkflowError('You can not support a motion in state %s.' % self.state.name)
 
@@ -394,7 +590,10 @@ class Motion(SlideMixin, AbsoluteUrlMixin, models.Model):
         Remove 'person' as supporter from this motion.
         """
         if self.state.allow_support:
-            self.supporter.filter(person=person).delete()
+            for supporter in self.supporter.filter(person=person):
+                supporter.delete()
+                self.supporter_count -= 1
+            Motion.objects.reset_person_motion_ids(person)
         else:
             raise WorkflowError('You can not unsupport a motion in state %s.' % self.state.name)
 
@@ -404,6 +603,16 @@ class Motion(SlideMixin, AbsoluteUrlMixin, models.Model):
         """
         MotionSupporter.objects.filter(motion=self).delete()
 
+    def get_polls(self):
+        """
+        Returns the polls of the motion as list with their options and votes.
+        """
+        polls = list(self.polls.all())
+        for poll in polls:
+            poll.motion = self
+        load_vote_tables(polls)
+        return polls
+
     def create_poll(self):
         """
         Create a new poll for this motion.
@@ -415,22 +624,28 @@ class Motion(SlideMixin, AbsoluteUrlMixin, models.Model):
             poll_number = self.polls.aggregate(Max('poll_number'))['poll_number__max'] or 0
             poll = MotionPoll.objects.create(motion=self, poll_number=poll_number + 1)
             poll.set_options()
+            self.poll_count += 1
             return poll
         else:
             raise WorkflowError('You can not create a poll in state %s.' % self.state.name)
 
+    def update_counters(self):
+        """
+        Counts the versions, supporters and polls of the motion again and
+        saves the counters.
+        """
+        Motion.objects.update_counters(Motion.objects.filter(pk=self.pk))
+        counters = Motion.objects.filter(pk=self.pk).values(*self.counter_fields)[0]
+        for field, value in counters.items():
+            setattr(self, field, value)
+
     def set_state(self, state):
         """
         Set the state of the motion.
 
         'state' can be the id of a state object or a state object.
         """
-        if type(state) is int:
-            state = State.objects.get(pk=state)
-
-        if not state.dont_set_identifier:
-            self.set_identifier()
-        self.state = state
+        Motion.objects.set_state([self], state)
 
     def reset_state(self, workflow=None):
         """
@@ -441,17 +656,14 @@ class Motion(SlideMixin, AbsoluteUrlMixin, models.Model):
         If the motion is new and workflow is None, it chooses the default
         workflow from config.
         """
-        if type(workflow) is int:
-            workflow = Workflow.objects.get(pk=workflow)
-
-        if workflow is not None:
-            new_state = workflow.first_state
-        elif self.state:
-            new_state = self.state.workflow.first_state
-        else:
-            new_state = (Workflow.objects.get(pk=config['motion_workflow']).first_state or
-                         Workflow.objects.get(pk=config['motion_workflow']).state_set.all()[0])
-        self.set_state(new_state)
+        if workflow is None:
+            if self.state:
+                workflow = self.state.workflow_id
+            else:
+                workflow = int(config['motion_workflow'])
+        elif type(workflow) is not int:
+            workflow = workflow.pk
+        self.set_state(Workflow.objects.get_graph().first_states[workflow])
 
     def get_agenda_title(self):
         """
@@ -480,28 +692,34 @@ class Motion(SlideMixin, AbsoluteUrlMixin, models.Model):
         * unsupport
         * change_state
         * reset_state
+
+        The permissions and the motions of the person are loaded only once
+        per person object, see MotionManager.get_person_motion_ids.
         """
+        can_manage = person.has_perm('motion.can_manage_motion')
+        is_submitter = self.is_submitter(person)
+        is_supporter = self.is_supporter(person)
         actions = {
-            'update': ((self.is_submitter(person) and
+            'update': ((is_submitter and
                        self.state.allow_submitter_edit) or
-                       person.has_perm('motion.can_manage_motion')),
+                       can_manage),
 
-            'delete': person.has_perm('motion.can_manage_motion'),
+            'delete': can_manage,
 
-            'create_poll': (person.has_perm('motion.can_manage_motion') and
+            'create_poll': (can_manage and
                             self.state.allow_create_poll),
 
             'support': (self.state.allow_support and
                         config['motion_min_supporters'] > 0 and
-                        not self.is_submitter(person) and
-                        not self.is_supporter(person)),
+                        not is_submitter and
+                        not is_supporter),
 
             'unsupport': (self.state.allow_support and
-                          self.is_supporter(person)),
+                          is_supporter),
 
-            'change_state': person.has_perm('motion.can_manage_motion'),
+            'change_state': can_manage,
 
-            'reset_state': person.has_perm('motion.can_manage_motion')}
+            'reset_state': can_manage}
 
         actions['edit'] = actions['update']
 
@@ -517,6 +735,30 @@ class Motion(SlideMixin, AbsoluteUrlMixin, models.Model):
         MotionLog.objects.create(motion=self, message_list=message_list, person=person)
 
 
+class MotionVersionManager(models.Manager):
+    """
+    Manager for motion versions.
+    """
+
+    def encode_versions(self, queryset=None):
+        """
+        Saves the versions of the queryset again according to the setting
+        MOTION_VERSION_SNAPSHOT_INTERVAL, as delta or completely.
+
+        Returns the number of changed versions.
+        """
+        if queryset is None:
+            queryset = self.all()
+        changed = 0
+        for version in queryset.order_by('motion', 'version_number').iterator():
+            old_delta = (version.delta_base_id, version.delta)
+            version.encode()
+            if (version.delta_base_id, version.delta) != old_delta:
+                version.save(update_fields=['stored_text', 'stored_reason', 'delta_base', 'delta'])
+                changed += 1
+        return changed
+
+
 class MotionVersion(AbsoluteUrlMixin, models.Model):
     """
     A MotionVersion object saves some date of the motion.
@@ -534,15 +776,34 @@ class MotionVersion(AbsoluteUrlMixin, models.Model):
     title = models.CharField(max_length=255, verbose_name=ugettext_lazy("Title"))
     """The title of a motion."""
 
-    text = models.TextField(verbose_name=ugettext_lazy("Text"))
-    """The text of a motion."""
+    stored_text = models.TextField(db_column='text', blank=True, verbose_name=ugettext_lazy("Text"))
+    """
+    The text of a motion as saved in the database. It is empty, if the
+    version is saved as delta. Use the property text instead.
+    """
+
+    stored_reason = models.TextField(db_column='reason', null=True, blank=True,
+                                     verbose_name=ugettext_lazy("Reason"))
+    """
+    The reason for a motion as saved in the database. It is empty, if the
+    version is saved as delta. Use the property reason instead.
+    """
+
+    delta_base = models.ForeignKey('self', null=True, blank=True, related_name='delta_versions',
+                                   on_delete=models.SET_NULL)
+    """
+    The version to which the delta of this version refers. None if the text
+    and the reason are saved completely.
+    """
 
-    reason = models.TextField(null=True, blank=True, verbose_name=ugettext_lazy("Reason"))
-    """The reason for a motion."""
+    delta = models.TextField(null=True, blank=True)
+    """The delta of the text and the reason to the base version as json."""
 
     creation_time = models.DateTimeField(auto_now=True)
     """Time when the version was saved."""
 
+    objects = MotionVersionManager()
+
     # identifier = models.CharField(max_length=255, verbose_name=ugettext_lazy("Version identifier"))
     # note = models.TextField(null=True, blank=True)
 
@@ -561,10 +822,10 @@ class MotionVersion(AbsoluteUrlMixin, models.Model):
         The keyargument link can be 'detail' or 'delete'.
         """
         if link == 'detail':
-            url = reverse('motion_version_detail', args=[str(self.motion.pk),
+            url = reverse('motion_version_detail', args=[str(self.motion_id),
                                                          str(self.version_number)])
         elif link == 'delete':
-            url = reverse('motion_version_delete', args=[str(self.motion.pk),
+            url = reverse('motion_version_delete', args=[str(self.motion_id),
                                                          str(self.version_number)])
         else:
             url = super(MotionVersion, self).get_absolute_url(link)
@@ -575,6 +836,130 @@ class MotionVersion(AbsoluteUrlMixin, models.Model):
         """Return True, if the version is the active version of a motion. Else: False."""
         return self.active_version.exists()
 
+    def save(self, *args, **kwargs):
+        """
+        Saves the version.
+
+        If the setting MOTION_VERSION_SNAPSHOT_INTERVAL is set, the text and
+        the reason are saved as delta to the previous version. Every n-th
+        version is saved completely.
+        """
+        if getattr(self, '_data_changed', False):
+            if self.pk is not None:
+                # Other versions can not refer to the old data anymore. They
+                # are loaded without this instance, which has the new data.
+                for version in MotionVersion.objects.filter(delta_base=self.pk):
+                    version.expand()
+            self.encode()
+        super(MotionVersion, self).save(*args, **kwargs)
+        if self.delta_base_id is not None:
+            cache.set(self.get_data_cache_key(), self._data)
+        self._data_changed = False
+
+    def get_data_cache_key(self):
+        return 'motion_version_data:%d' % self.pk
+
+    def get_data(self):
+        """
+        Returns a dictionary with the text and the reason of the version.
+
+        The data of versions saved as delta is built from the data of their
+        base versions and is saved in the django cache.
+        """
+        try:
+            return self._data
+        except AttributeError:
+            pass
+        if self.delta_base_id is None:
+            data = {'text': self.stored_text, 'reason': self.stored_reason}
+        else:
+            data = cache.get(self.get_data_cache_key())
+            if data is None:
+                data = decode_delta(self.delta_base.get_data(), self.delta)
+                cache.set(self.get_data_cache_key(), data)
+        self._data = data
+        return data
+
+    def set_data(self, **kwargs):
+        """
+        Changes the text or the reason. The data is encoded, when the version
+        is saved.
+        """
+        data = dict(self.get_data())
+        for key, value in kwargs.items():
+            data[key] = None if value is None else force_text(value)
+        if data != self.get_data():
+            self._data = data
+            self._data_changed = True
+            if self.delta_base_id is None:
+                # The fields are filled at once, so that versions can also be
+                # saved without save(), e. g. with bulk_create. Deltas are
+                # only built by save().
+                self.stored_text = data['text']
+                self.stored_reason = data['reason']
+
+    @property
+    def text(self):
+        """The text of a motion."""
+        return self.get_data()['text']
+
+    @text.setter
+    def text(self, value):
+        self.set_data(text=value)
+
+    @property
+    def reason(self):
+        """The reason for a motion."""
+        return self.get_data()['reason']
+
+    @reason.setter
+    def reason(self, value):
+        self.set_data(reason=value)
+
+    def encode(self):
+        """
+        Sets the fields saved in the database from the text and the reason.
+
+        The version is saved as delta to the previous version of the motion,
+        if deltas are enabled, it is not a snapshot and the delta is shorter
+        than the data.
+        """
+        data = self.get_data()
+        self.stored_text = data['text']
+        self.stored_reason = data['reason']
+        self.delta_base = None
+        self.delta = None
+        interval = getattr(settings, 'MOTION_VERSION_SNAPSHOT_INTERVAL', None)
+        if not interval or (self.version_number - 1) % interval == 0:
+            return
+        try:
+            base = MotionVersion.objects.filter(
+                motion=self.motion_id,
+                version_number__lt=self.version_number).order_by('-version_number')[0]
+        except IndexError:
+            return
+        delta = encode_delta(base.get_data(), data)
+        if len(delta) < len(data['text'] or '') + len(data['reason'] or ''):
+            self.stored_text = ''
+            self.stored_reason = None
+            self.delta_base = base
+            self.delta = delta
+
+    def expand(self):
+        """
+        Saves the text and the reason of a version completely.
+        """
+        if self.delta_base_id is None:
+            return
+        data = self.get_data()
+        self.stored_text = data['text']
+        self.stored_reason = data['reason']
+        self.delta_base = None
+        self.delta = None
+        MotionVersion.objects.filter(pk=self.pk).update(
+            stored_text=self.stored_text, stored_reason=self.stored_reason,
+            delta_base=None, delta=None)
+
 
 class MotionSubmitter(RelatedModelMixin, models.Model):
     """Save the submitter of a Motion."""
@@ -607,6 +992,51 @@ class MotionSupporter(models.Model):
         return unicode(self.person)
 
 
+class IdentifierCounterManager(models.Manager):
+    def get_numbers(self, key, count, motions):
+        """
+        Increments the counter 'key' by 'count' and returns the first of the
+        new numbers.
+
+        A new counter starts behind the highest identifier number of the
+        motions in the queryset 'motions'. The update locks the counter until
+        the transaction ends, so concurrent calls get different numbers.
+        """
+        with transaction.commit_on_success():
+            if not self.filter(key=key).update(number=models.F('number') + count):
+                number = motions.aggregate(Max('identifier_number'))['identifier_number__max'] or 0
+                savepoint = transaction.savepoint()
+                try:
+                    self.create(key=key, number=number + count)
+                except IntegrityError:
+                    # The counter was created in the meantime.
+                    transaction.savepoint_rollback(savepoint)
+                    self.filter(key=key).update(number=models.F('number') + count)
+                else:
+                    transaction.savepoint_commit(savepoint)
+            return self.get(key=key).number - count + 1
+
+
+class IdentifierCounter(models.Model):
+    """
+    Counts the identifier numbers of the motions of one category or of all
+    motions.
+    """
+
+    objects = IdentifierCounterManager()
+
+    key = models.CharField(max_length=255, unique=True)
+    """
+    'category:<id>' or 'no_category' if the motions are numbered per
+    category, 'all' if they are serially numbered.
+    """
+
+    number = models.IntegerField(default=0)
+    """
+    The last used identifier number.
+    """
+
+
 class Category(AbsoluteUrlMixin, models.Model):
     name = models.CharField(max_length=255, verbose_name=ugettext_lazy("Category name"))
     """Name of the category."""
@@ -815,6 +1245,10 @@ class State(models.Model):
         """Returns the alternative name of the state if it exists."""
         return self.action_word or self.name
 
+    def get_next_states(self):
+        """Returns the next states from the workflow graph."""
+        return Workflow.objects.get_graph().next_states[self.pk]
+
     def check_next_states(self):
         """Checks whether all next states of a state belong to the correct workflow."""
         # No check if it is a new state which has not been saved yet.
@@ -825,6 +1259,63 @@ class State(models.Model):
                 raise WorkflowError('%s can not be next state of %s because it does not belong to the same workflow.' % (state, self))
 
 
+class WorkflowGraph(object):
+    """
+    All workflows and states with the relations between them.
+
+    states and workflows are dictionaries from the ids to the objects,
+    next_states and first_states dictionaries from the ids of states and
+    workflows to the next states and to the first state. The first state is
+    the first state of the workflow or, if it is not set, its state with the
+    lowest id. The objects must not be changed.
+    """
+
+    def __init__(self, workflows, states, next_state_ids):
+        self.workflows = dict((workflow.pk, workflow) for workflow in workflows)
+        self.states = dict((state.pk, state) for state in states)
+        for state in self.states.values():
+            # Set the related workflows without queries.
+            state.workflow = self.workflows[state.workflow_id]
+        self.next_states = dict((pk, []) for pk in self.states)
+        for from_state_id, to_state_id in next_state_ids:
+            self.next_states[from_state_id].append(self.states[to_state_id])
+        self.first_states = {}
+        for state in sorted(self.states.values(), key=lambda state: state.pk):
+            self.first_states.setdefault(state.workflow_id, state)
+        for workflow in self.workflows.values():
+            if workflow.first_state_id is not None:
+                self.first_states[workflow.pk] = self.states[workflow.first_state_id]
+
+
+class WorkflowManager(models.Manager):
+    """
+    Manager for workflows with a method to get the workflow graph.
+    """
+
+    graph_cache_key = 'motion_workflow_graph'
+
+    def get_graph(self):
+        """
+        Returns all workflows and states as WorkflowGraph.
+
+        The graph is loaded with three queries and saved in the cache until a
+        workflow or a state is changed.
+        """
+        graph = cache.get(self.graph_cache_key)
+        if graph is None:
+            graph = WorkflowGraph(
+                self.all(), State.objects.all(),
+                State.next_states.through.objects.values_list('from_state', 'to_state').order_by('pk'))
+            cache.set(self.graph_cache_key, graph)
+        return graph
+
+    def reset_graph(self):
+        """
+        Deletes the workflow graph from the cache.
+        """
+        cache.delete(self.graph_cache_key)
+
+
 class Workflow(models.Model):
     """Defines a workflow for a motion."""
 
@@ -834,6 +1325,8 @@ class Workflow(models.Model):
     first_state = models.OneToOneField(State, related_name='+', null=True)
     """A one-to-one relation to a state, the starting point for the workflow."""
 
+    objects = WorkflowManager()
+
     def __unicode__(self):
         """Returns the name of the workflow."""
         return self.name
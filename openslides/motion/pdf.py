@@ -1,9 +1,14 @@
 # -*- coding: utf-8 -*-
 
-from operator import attrgetter
+import hashlib
+import multiprocessing
 import random
+import sys
+from operator import attrgetter
+from threading import Lock
 
 from bs4 import BeautifulSoup
+from django.utils.datastructures import SortedDict
 from django.utils.translation import ugettext as _
 from natsort import natsorted
 from reportlab.lib import colors
@@ -11,30 +16,127 @@ from reportlab.lib.units import cm
 from reportlab.platypus import PageBreak, Paragraph, Spacer, Table, TableStyle
 
 from openslides.config.api import config
-from openslides.participant.models import Group, User
-from openslides.utils.pdf import stylesheet
+from openslides.participant.models import User
+from openslides.poll.models import load_vote_tables
+from openslides.utils.pdf import append_ballot_papers, stylesheet
 
 from .models import Category, Motion
 
 # Needed to count the delegates
 # TODO: find another way to do this.
 
+# Minimum number of html texts which are parsed in a pool of worker
+# processes.
+PARALLEL_MIN_TEXTS = 100
+
+
+class ParagraphCache(object):
+    """
+    Cache for the paragraphs of parsed html texts (see parse_html). If it is
+    full, the least recently used paragraphs are removed.
+
+    The key contains a checksum of the text, so a motion version which is
+    changed (e. g. with disabled versioning) never gets old paragraphs.
+    """
+
+    def __init__(self, max_entries=2000):
+        self.max_entries = max_entries
+        self.entries = SortedDict()
+        self.lock = Lock()
+
+    def get_key(self, text, paragraph_numbering):
+        """
+        Returns the cache key for the paragraphs of the text.
+        """
+        return '%s:%d' % (hashlib.md5(text.encode('utf-8')).hexdigest(), bool(paragraph_numbering))
+
+    def get_paragraphs(self, texts, paragraph_numbering, processes=1):
+        """
+        Returns a list with the paragraphs of the html texts.
+
+        The texts which are not in the cache are parsed in a pool of
+        'processes' worker processes if there are at least
+        PARALLEL_MIN_TEXTS of them.
+        """
+        keys = [self.get_key(text, paragraph_numbering) for text in texts]
+        paragraphs = {}
+        with self.lock:
+            for key in keys:
+                if key in self.entries:
+                    # Move the paragraphs to the end, which is the most
+                    # recently used.
+                    paragraphs[key] = self.entries[key] = self.entries.pop(key)
+
+        missing = SortedDict(
+            (key, (text, paragraph_numbering)) for key, text in zip(keys, texts)
+            if key not in paragraphs)
+        if missing:
+            # Worker processes are forked, which is not possible on Windows.
+            if processes > 1 and len(missing) >= PARALLEL_MIN_TEXTS and sys.platform != 'win32':
+                pool = multiprocessing.Pool(processes, initializer=random.seed)
+                try:
+                    parsed = pool.map(parse_html_args, missing.values(), chunksize=10)
+                finally:
+                    pool.terminate()
+            else:
+                parsed = map(parse_html_args, missing.values())
+            paragraphs.update(zip(missing.keys(), parsed))
+
+            with self.lock:
+                for key, value in zip(missing.keys(), parsed):
+                    self.entries[key] = value
+                for key in self.entries.keys()[:max(0, len(self.entries) - self.max_entries)]:
+                    del self.entries[key]
+        return [paragraphs[key] for key in keys]
+
+    def clear(self):
+        """
+        Removes all paragraphs from the memory.
+        """
+        with self.lock:
+            self.entries.clear()
+
+
+paragraph_cache = ParagraphCache()
+
 
-def motions_to_pdf(pdf):
+def motions_to_pdf(pdf, processes=None):
     """
     Create a PDF with all motions.
+
+    The motions are loaded with a constant number of queries. The html
+    texts are taken from the paragraph cache. If many of them are not in
+    the cache, they are parsed in a pool of 'processes' worker processes
+    (default: number of cpus). The flowables are created here.
     """
-    motions = Motion.objects.all()
-    motions = natsorted(motions, key=attrgetter('identifier'))
+    queryset = Motion.objects.prefetch_related('polls')
+    motions = natsorted(Motion.objects.get_list(queryset), key=attrgetter('identifier'))
+    load_vote_tables(poll for motion in motions for poll in motion.polls.all())
     all_motion_cover(pdf, motions)
+
+    texts = []
+    for motion in motions:
+        texts.append(motion.text)
+        if motion.reason:
+            texts.append(motion.reason)
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    paragraphs = iter(paragraph_cache.get_paragraphs(
+        texts, config['motion_pdf_paragraph_numbering'], processes))
+
     for motion in motions:
+        text = next(paragraphs)
+        reason = next(paragraphs) if motion.reason else None
         pdf.append(PageBreak())
-        motion_to_pdf(pdf, motion)
+        motion_to_pdf(pdf, motion, text, reason)
 
 
-def motion_to_pdf(pdf, motion):
+def motion_to_pdf(pdf, motion, text=None, reason=None):
     """
     Create a PDF for one motion.
+
+    'text' and 'reason' can be the already parsed text and reason of the
+    motion, see parse_html.
     """
     identifier = ""
     if motion.identifier:
@@ -50,7 +152,7 @@ def motion_to_pdf(pdf, motion):
                             stylesheet['Heading4']))
     cell1b = []
     cell1b.append(Spacer(0, 0.2 * cm))
-    for submitter in motion.submitter.all():
+    for submitter in motion.submitters:
         cell1b.append(Paragraph(unicode(submitter), stylesheet['Normal']))
     motion_data.append([cell1a, cell1b])
 
@@ -72,8 +174,7 @@ def motion_to_pdf(pdf, motion):
         cell3b = []
         cell3a.append(Paragraph("<font name='Ubuntu-Bold'>%s:</font><seqreset id='counter'>"
                                 % _("Supporters"), stylesheet['Heading4']))
-        supporters = motion.supporter.all()
-        for supporter in supporters:
+        for supporter in motion.supporters:
             cell3b.append(Paragraph("<seq id='counter'/>.&nbsp; %s" % unicode(supporter),
                                     stylesheet['Normal']))
         cell3b.append(Spacer(0, 0.2 * cm))
@@ -88,7 +189,7 @@ def motion_to_pdf(pdf, motion):
     motion_data.append([cell4a, cell4b])
 
     # Version number
-    if motion.versions.count() > 1:
+    if motion.version_count > 1:
         version = motion.get_active_version()
         cell5a = []
         cell5b = []
@@ -99,10 +200,10 @@ def motion_to_pdf(pdf, motion):
 
     # voting results
     polls = []
-    for poll in motion.polls.all():
-        if not poll.has_votes():
-            continue
-        polls.append(poll)
+    if motion.poll_count:
+        polls = list(motion.polls.all())
+        load_vote_tables(polls)
+        polls = [poll for poll in polls if poll.has_votes()]
 
     if polls:
         cell6a = []
@@ -112,7 +213,7 @@ def motion_to_pdf(pdf, motion):
         ballotcounter = 0
         for poll in polls:
             ballotcounter += 1
-            option = poll.get_options()[0]
+            option = poll.get_vote_table()[0]
             yes, no, abstain = (option['Yes'], option['No'], option['Abstain'])
             valid, invalid, votescast = ('', '', '')
             if poll.votesvalid is not None:
@@ -144,17 +245,53 @@ def motion_to_pdf(pdf, motion):
     pdf.append(Paragraph(motion.title, stylesheet['Heading3']))
 
     # motion text
-    convert_html_to_reportlab(pdf, motion.text)
+    if text is None:
+        convert_html_to_reportlab(pdf, motion.text)
+    else:
+        append_paragraphs(pdf, text)
     pdf.append(Spacer(0, 1 * cm))
 
     # motion reason
     if motion.reason:
         pdf.append(Paragraph(_("Reason") + ":", stylesheet['Heading3']))
-        convert_html_to_reportlab(pdf, motion.reason)
+        if reason is None:
+            convert_html_to_reportlab(pdf, motion.reason)
+        else:
+            append_paragraphs(pdf, reason)
     return pdf
 
 
 def convert_html_to_reportlab(pdf, text):
+    append_paragraphs(pdf, paragraph_cache.get_paragraphs(
+        [text], config["motion_pdf_paragraph_numbering"])[0])
+
+
+def append_paragraphs(pdf, paragraphs):
+    """
+    Appends the paragraphs returned by parse_html to the pdf.
+    """
+    for text, style, bullet in paragraphs:
+        pdf.append(Paragraph(text, stylesheet[style], bullet))
+
+
+def parse_html_args(args):
+    """
+    Calls parse_html with a tuple of the arguments, so that it can be called
+    by a process pool.
+    """
+    return parse_html(*args)
+
+
+def parse_html(text, paragraph_numbering):
+    """
+    Converts html text to a list of paragraphs for reportlab. Every
+    paragraph is a tuple of the text, the name of the style and the bullet
+    text.
+
+    The function does not use the database or the config so that it can be
+    called in a worker process.
+    """
+    paragraphs = []
     # parsing and replacing not supported html tags for reportlab...
     soup = BeautifulSoup(text)
     # read all list elements...
@@ -206,27 +343,28 @@ def convert_html_to_reportlab(pdf, text):
             continue
         if "<pre>" in paragraph:
             txt = paragraph.replace('\n', '<br/>').replace(' ', '&nbsp;')
-            if config["motion_pdf_paragraph_numbering"]:
-                pdf.append(Paragraph(txt, stylesheet['InnerMonotypeParagraph'], str(paragraph_number)))
+            if paragraph_numbering:
+                paragraphs.append((txt, 'InnerMonotypeParagraph', str(paragraph_number)))
                 paragraph_number += 1
             else:
-                pdf.append(Paragraph(txt, stylesheet['InnerMonotypeParagraph']))
+                paragraphs.append((txt, 'InnerMonotypeParagraph', None))
         elif "<para>" in paragraph:
-            pdf.append(Paragraph(paragraph, stylesheet['InnerListParagraph']))
+            paragraphs.append((paragraph, 'InnerListParagraph', None))
         elif "<seqreset" in paragraph:
             pass
         elif "<h1>" in paragraph:
-            pdf.append(Paragraph(paragraph, stylesheet['InnerH1Paragraph']))
+            paragraphs.append((paragraph, 'InnerH1Paragraph', None))
         elif "<h2>" in paragraph:
-            pdf.append(Paragraph(paragraph, stylesheet['InnerH2Paragraph']))
+            paragraphs.append((paragraph, 'InnerH2Paragraph', None))
         elif "<h3>" in paragraph:
-            pdf.append(Paragraph(paragraph, stylesheet['InnerH3Paragraph']))
+            paragraphs.append((paragraph, 'InnerH3Paragraph', None))
         else:
-            if config["motion_pdf_paragraph_numbering"]:
-                pdf.append(Paragraph(paragraph, stylesheet['InnerParagraph'], str(paragraph_number)))
+            if paragraph_numbering:
+                paragraphs.append((paragraph, 'InnerParagraph', str(paragraph_number)))
                 paragraph_number += 1
             else:
-                pdf.append(Paragraph(paragraph, stylesheet['InnerParagraph']))
+                paragraphs.append((paragraph, 'InnerParagraph', None))
+    return paragraphs
 
 
 def all_motion_cover(pdf, motions):
@@ -276,7 +414,6 @@ def motion_poll_to_pdf(pdf, poll):
                 % (circle, unicode(_("No"))), stylesheet['Ballot_option']))
     cell.append(Paragraph("<font name='circlefont' size='15'>%s</font> <font name='Ubuntu'>%s</font>"
                 % (circle, unicode(_("Abstention"))), stylesheet['Ballot_option']))
-    data = []
     # get ballot papers config values
     ballot_papers_selection = config["motion_pdf_ballot_papers_selection"]
     ballot_papers_number = config["motion_pdf_ballot_papers_number"]
@@ -284,11 +421,7 @@ def motion_poll_to_pdf(pdf, poll):
     # set number of ballot papers
     if ballot_papers_selection == "NUMBER_OF_DELEGATES":
         # TODO: get this number from persons
-        try:
-            if Group.objects.get(pk=3):
-                number = User.objects.filter(groups__pk=3).count()
-        except Group.DoesNotExist:
-            number = 0
+        number = User.objects.filter(groups__pk=3).count()
     elif ballot_papers_selection == "NUMBER_OF_ALL_PARTICIPANTS":
         # TODO: get the number from the persons
         number = int(User.objects.count())
@@ -297,15 +430,4 @@ def motion_poll_to_pdf(pdf, poll):
     number = max(1, number)
 
     # print ballot papers
-    if number > 0:
-        # TODO: try [cell, cell] * (number / 2)
-        for user in xrange(number / 2):
-            data.append([cell, cell])
-        rest = number % 2
-        if rest:
-            data.append([cell, ''])
-        t = Table(data, 10.5 * cm, 7.42 * cm)
-        t.setStyle(TableStyle(
-            [('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
-             ('VALIGN', (0, 0), (-1, -1), 'TOP')]))
-        pdf.append(t)
+    append_ballot_papers(pdf, [cell], 7.42 * cm, number)
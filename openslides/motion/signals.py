@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 from django import forms
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.utils.translation import ugettext as _
 from django.utils.translation import ugettext_lazy, ugettext_noop
@@ -10,7 +12,14 @@ from openslides.config.signals import config_signal
 from openslides.core.signals import post_database_setup
 from openslides.poll.models import PERCENT_BASE_CHOICES
 
-from .models import State, Workflow
+from .models import (Category, IdentifierCounter, Motion, MotionPoll,
+                     MotionSupporter, MotionVersion, State, Workflow)
+
+# The counter fields of Motion with the models they count.
+COUNTED_MODELS = {
+    MotionVersion: 'version_count',
+    MotionSupporter: 'supporter_count',
+    MotionPoll: 'poll_count'}
 
 
 @receiver(config_signal, dispatch_uid='setup_motion_config')
@@ -227,3 +236,62 @@ def create_builtin_workflows(sender, **kwargs):
         state_2_2.next_states.add(state_2_3, state_2_4, state_2_5, state_2_6, state_2_7, state_2_8, state_2_9)
         workflow_2.first_state = state_2_1
         workflow_2.save()
+
+
+@receiver(post_delete, sender=Category, dispatch_uid='motion_delete_identifier_counter')
+def delete_identifier_counter(sender, instance, **kwargs):
+    """
+    Receiver to delete the identifier counter of a deleted category.
+    """
+    IdentifierCounter.objects.filter(key='category:%d' % instance.pk).delete()
+
+
+def change_motion_counter(sender, instance, value):
+    """
+    Adds value to the counter of the motion of instance, if it is a version,
+    a supporter or a poll.
+    """
+    field = COUNTED_MODELS.get(sender)
+    if field is not None:
+        Motion.objects.filter(pk=instance.motion_id).update(**{field: F(field) + value})
+
+
+@receiver(post_save, dispatch_uid='motion_increase_counter')
+def increase_motion_counter(sender, instance, created, **kwargs):
+    """
+    Receiver to increase the counter of a motion for a new version,
+    supporter or poll.
+    """
+    if created:
+        change_motion_counter(sender, instance, 1)
+
+
+@receiver(post_delete, dispatch_uid='motion_decrease_counter')
+def decrease_motion_counter(sender, instance, **kwargs):
+    """
+    Receiver to decrease the counter of a motion for a deleted version,
+    supporter or poll.
+    """
+    change_motion_counter(sender, instance, -1)
+
+
+@receiver(post_save, sender=State, dispatch_uid='motion_reset_workflow_graph_on_state_save')
+@receiver(post_delete, sender=State, dispatch_uid='motion_reset_workflow_graph_on_state_delete')
+@receiver(post_save, sender=Workflow, dispatch_uid='motion_reset_workflow_graph_on_workflow_save')
+@receiver(post_delete, sender=Workflow, dispatch_uid='motion_reset_workflow_graph_on_workflow_delete')
+@receiver(m2m_changed, sender=State.next_states.through, dispatch_uid='motion_reset_workflow_graph_on_next_states_change')
+def reset_workflow_graph(sender, **kwargs):
+    """
+    Receiver to reset the workflow graph if a workflow or a state is changed.
+    """
+    Workflow.objects.reset_graph()
+
+
+@receiver(pre_delete, sender=MotionVersion, dispatch_uid='motion_expand_delta_versions')
+def expand_delta_versions(sender, instance, **kwargs):
+    """
+    Saves the versions completely, which are saved as delta to a deleted
+    version.
+    """
+    for version in instance.delta_versions.all():
+        version.expand()
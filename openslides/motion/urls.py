@@ -66,6 +66,18 @@ urlpatterns = patterns(
         'poll_pdf',
         name='motion_poll_pdf'),
 
+    url(r'^(?P<pk>\d+)/poll/(?P<poll_number>\d+)/ballot/$',
+        'poll_ballot',
+        name='motion_poll_ballot'),
+
+    url(r'^(?P<pk>\d+)/poll/(?P<poll_number>\d+)/ballot_box/open/$',
+        'poll_ballot_box_open',
+        name='motion_poll_ballot_box_open'),
+
+    url(r'^(?P<pk>\d+)/poll/(?P<poll_number>\d+)/ballot_box/close/$',
+        'poll_ballot_box_close',
+        name='motion_poll_ballot_box_close'),
+
     url(r'^(?P<pk>\d+)/set_state/(?P<state>\d+)/$',
         'set_state',
         name='motion_set_state'),
@@ -10,14 +10,16 @@ from reportlab.platypus import SimpleDocTemplate
 
 from openslides.agenda.views import CreateRelatedAgendaItemView as _CreateRelatedAgendaItemView
 from openslides.config.api import config
-from openslides.poll.views import PollFormView
+from openslides.poll.views import BallotBoxView, BallotView, PollFormView
 from openslides.projector.api import get_active_slide, update_projector
-from openslides.utils.utils import html_strong, htmldiff
+from openslides.utils.pdf_cache import bulk_write
+from openslides.utils.utils import html_strong
 from openslides.utils.views import (CreateView, CSVImportView, DeleteView, DetailView,
                                     ListView, PDFView, QuestionView,
                                     RedirectView, SingleObjectMixin, UpdateView)
 
 from .csv_import import import_motions
+from .diff import get_version_diffs
 from .forms import (BaseMotionForm, MotionCategoryMixin,
                     MotionDisableVersioningMixin, MotionIdentifierMixin,
                     MotionCSVImportForm, MotionSubmitterMixin,
@@ -33,6 +35,14 @@ class MotionListView(ListView):
     """
     permission_required = 'motion.can_see_motion'
     model = Motion
+    template_name = 'motion/motion_list.html'
+    context_object_name = 'motion_list'
+
+    def get_queryset(self):
+        """
+        Returns the motions with all data for the list at once.
+        """
+        return Motion.objects.get_list()
 
 motion_list = MotionListView.as_view()
 
@@ -101,16 +111,19 @@ class MotionEditMixin(object):
 
         # Save the submitter an the supporter so the motion.
         # TODO: Only delete and save neccessary submitters and supporters
-        if 'submitter' in form.cleaned_data:
-            self.object.submitter.all().delete()
-            MotionSubmitter.objects.bulk_create(
-                [MotionSubmitter(motion=self.object, person=person)
-                 for person in form.cleaned_data['submitter']])
-        if 'supporter' in form.cleaned_data:
-            self.object.supporter.all().delete()
-            MotionSupporter.objects.bulk_create(
-                [MotionSupporter(motion=self.object, person=person)
-                 for person in form.cleaned_data['supporter']])
+        with bulk_write('motion'):
+            if 'submitter' in form.cleaned_data:
+                self.object.submitter.all().delete()
+                MotionSubmitter.objects.bulk_create(
+                    [MotionSubmitter(motion=self.object, person=person)
+                     for person in form.cleaned_data['submitter']])
+            if 'supporter' in form.cleaned_data:
+                self.object.supporter.all().delete()
+                MotionSupporter.objects.bulk_create(
+                    [MotionSupporter(motion=self.object, person=person)
+                     for person in form.cleaned_data['supporter']])
+                # bulk_create does not send the signal to count the supporters.
+                self.object.update_counters()
 
         # Save the attachments
         self.object.attachments.clear()
@@ -385,8 +398,7 @@ class VersionDiffView(DetailView):
             rev2 = int(self.request.GET['rev2'])
             version_rev1 = self.object.versions.get(version_number=rev1)
             version_rev2 = self.object.versions.get(version_number=rev2)
-            diff_text = htmldiff(version_rev1.text, version_rev2.text)
-            diff_reason = htmldiff(version_rev1.reason, version_rev2.reason)
+            diff_text, diff_reason = get_version_diffs(version_rev1, version_rev2)
         except (KeyError, ValueError, MotionVersion.DoesNotExist):
             messages.error(self.request, _('At least one version number is not valid.'))
             version_rev1 = None
@@ -600,6 +612,9 @@ class PollPDFView(PollMixin, PDFView):
 
     permission_required = 'motion.can_manage_motion'
     top_space = 0
+    pdf_cache_apps = ('motion', 'participant')
+    pdf_cache_config_keys = (
+        'motion_pdf_ballot_papers_selection', 'motion_pdf_ballot_papers_number')
 
     def get(self, *args, **kwargs):
         self.object = self.get_object()
@@ -628,6 +643,36 @@ class PollPDFView(PollMixin, PDFView):
 poll_pdf = PollPDFView.as_view()
 
 
+class PollBallotView(PollMixin, BallotView):
+    """
+    View to cast an electronic ballot for a MotionPoll.
+    """
+
+    permission_required = 'motion.can_see_motion'
+
+poll_ballot = PollBallotView.as_view()
+
+
+class PollBallotBoxView(PollMixin, BallotBoxView):
+    """
+    View to open or close the ballot box of a MotionPoll.
+    """
+
+    def pre_redirect(self, request, *args, **kwargs):
+        """
+        Write a log message.
+        """
+        super(PollBallotBoxView, self).pre_redirect(request, *args, **kwargs)
+        if self.open_box:
+            message = ugettext_noop('Ballot box opened')
+        else:
+            message = ugettext_noop('Ballot box closed')
+        self.poll.motion.write_log([message], request.user)
+
+poll_ballot_box_open = PollBallotBoxView.as_view(open_box=True)
+poll_ballot_box_close = PollBallotBoxView.as_view(open_box=False)
+
+
 class MotionSetStateView(SingleObjectMixin, RedirectView):
     """
     View to set the state of a motion.
@@ -651,7 +696,7 @@ class MotionSetStateView(SingleObjectMixin, RedirectView):
             success = True
         elif self.object.state.id == int(kwargs['state']):
             messages.error(request, _('You can not set the state of the motion. It is already done.'))
-        elif int(kwargs['state']) not in [state.id for state in self.object.state.next_states.all()]:
+        elif int(kwargs['state']) not in [state.id for state in self.object.state.get_next_states()]:
             messages.error(request, _('You can not set the state of the motion to %s.') % _(State.objects.get(pk=int(kwargs['state'])).name))
         else:
             self.object.set_state(int(kwargs['state']))
@@ -698,6 +743,11 @@ class MotionPDFView(SingleObjectMixin, PDFView):
     model = Motion
     top_space = 0
     print_all_motions = False
+    pdf_cache_apps = ('motion', 'participant')
+    pdf_cache_config_keys = PDFView.pdf_cache_config_keys + (
+        'motion_pdf_title', 'motion_pdf_preamble', 'motion_pdf_paragraph_numbering',
+        'motion_min_supporters', 'motion_poll_100_percent_base',
+        'participant_sort_users_by_first_name')
 
     def get(self, request, *args, **kwargs):
         """
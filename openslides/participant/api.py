@@ -2,7 +2,11 @@
 
 from random import choice
 
-from .models import Group, User
+from openslides.config.api import config
+from openslides.utils.person import PersonSummary, get_persons
+from openslides.utils.person.api import split_person_id
+
+from .models import Group, User, get_clean_name
 
 
 def gen_password():
@@ -41,6 +45,49 @@ def gen_username(first_name, last_name):
             return test_name
 
 
+def get_person_summaries(person_ids):
+    """
+    Returns a dictionary with the person ids in 'person_ids' as keys and
+    PersonSummary objects as values.
+
+    The users and the groups are loaded with one values() query each. Other
+    persons are loaded with get_persons.
+    """
+    person_ids = set(person_ids)
+    pks = {User.person_prefix: [], Group.person_prefix: []}
+    for person_id in person_ids:
+        try:
+            person_prefix, pk = split_person_id(person_id)
+        except TypeError:
+            continue
+        if person_prefix in pks and pk.isdigit():
+            pks[person_prefix].append(int(pk))
+
+    summaries = {}
+    if pks[User.person_prefix]:
+        sort_by_first_name = config['participant_sort_users_by_first_name']
+        for user in User.objects.filter(pk__in=pks[User.person_prefix]).values(
+                'pk', 'title', 'first_name', 'last_name', 'username', 'structure_level'):
+            summary = PersonSummary(
+                User.person_prefix, user['pk'],
+                get_clean_name(user['title'], user['first_name'], user['last_name'], user['username']),
+                user['structure_level'],
+                (user['first_name'] if sort_by_first_name else user['last_name']).lower(),
+                'user_view')
+            summaries[summary.person_id] = summary
+    if pks[Group.person_prefix]:
+        for group in Group.objects.filter(
+                pk__in=pks[Group.person_prefix], group_as_person=True).values('pk', 'name'):
+            summary = PersonSummary(Group.person_prefix, group['pk'], group['name'],
+                                    url_name='user_group_view')
+            summaries[summary.person_id] = summary
+
+    missing = person_ids.difference(summaries)
+    if missing:
+        summaries.update(get_persons(missing))
+    return summaries
+
+
 def get_registered_group():
     """
     Returns the group 'Registered' (pk=2).
@@ -82,11 +82,7 @@ class User(SlideMixin, PersonMixin, Person, AbsoluteUrlMixin, DjangoUser):
 
     @property
     def clean_name(self):
-        if self.title:
-            name = "%s %s" % (self.title, self.get_full_name())
-        else:
-            name = self.get_full_name()
-        return name or self.username
+        return get_clean_name(self.title, self.first_name, self.last_name, self.username)
 
     def get_name_suffix(self):
         return self.structure_level
@@ -112,6 +108,16 @@ class User(SlideMixin, PersonMixin, Person, AbsoluteUrlMixin, DjangoUser):
         return self.last_name.lower()
 
 
+def get_clean_name(title, first_name, last_name, username):
+    """
+    Returns the name of a user with title and without the name suffix.
+    """
+    name = (u'%s %s' % (first_name, last_name)).strip()
+    if title:
+        name = u'%s %s' % (title, name)
+    return name or username
+
+
 class Group(SlideMixin, PersonMixin, Person, AbsoluteUrlMixin, DjangoGroup):
     slide_callback_name = 'group'
     person_prefix = 'group'
@@ -147,10 +153,13 @@ class UsersAndGroupsToPersons(object):
     """
     Object to send all Users and Groups or a special User or Group to
     the Person-API via receice_persons()
+
+    The id_list_filter is a list of ids, see get_persons.
     """
-    def __init__(self, person_prefix_filter=None, id_filter=None):
+    def __init__(self, person_prefix_filter=None, id_filter=None, id_list_filter=None):
         self.person_prefix_filter = person_prefix_filter
         self.id_filter = id_filter
+        self.id_list_filter = id_list_filter
         if config['participant_sort_users_by_first_name']:
             self.users = User.objects.all().order_by('first_name')
         else:
@@ -160,25 +169,27 @@ class UsersAndGroupsToPersons(object):
     def __iter__(self):
         if (not self.person_prefix_filter or
                 self.person_prefix_filter == User.person_prefix):
-            if self.id_filter:
-                try:
-                    yield self.users.get(pk=self.id_filter)
-                except User.DoesNotExist:
-                    pass
-            else:
-                for user in self.users:
-                    yield user
+            for user in self.filter(self.users):
+                yield user
 
         if (not self.person_prefix_filter or
                 self.person_prefix_filter == Group.person_prefix):
-            if self.id_filter:
-                try:
-                    yield self.groups.get(pk=self.id_filter)
-                except Group.DoesNotExist:
-                    pass
-            else:
-                for group in self.groups:
-                    yield group
+            for group in self.filter(self.groups):
+                yield group
+
+    def filter(self, queryset):
+        """
+        Returns the objects of the queryset which match the id_filter or
+        the id_list_filter.
+        """
+        if self.id_list_filter is not None:
+            return queryset.filter(pk__in=self.id_list_filter)
+        elif not self.id_filter:
+            return queryset
+        try:
+            return [queryset.get(pk=self.id_filter)]
+        except queryset.model.DoesNotExist:
+            return []
 
 
 @receiver(receive_persons, dispatch_uid="participant")
@@ -188,7 +199,8 @@ def receive_persons(sender, **kwargs):
     """
     return UsersAndGroupsToPersons(
         person_prefix_filter=kwargs['person_prefix_filter'],
-        id_filter=kwargs['id_filter'])
+        id_filter=kwargs['id_filter'],
+        id_list_filter=kwargs.get('id_list_filter'))
 
 
 @receiver(signals.post_save, sender=DjangoUser)
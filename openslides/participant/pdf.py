@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+from django.contrib.auth.models import User as DjangoUser
 from django.utils.translation import ugettext as _
 from reportlab.graphics.barcode.qr import QrCodeWidget
 from reportlab.graphics.shapes import Drawing
@@ -9,50 +10,116 @@ from reportlab.platypus import (LongTable, PageBreak, Paragraph, Spacer, Table,
                                 TableStyle)
 
 from openslides.config.api import config
-from openslides.utils.pdf import stylesheet
+from openslides.utils.pdf import FormDrawing, append_chunks, stylesheet
 
 from .models import User
 
+# Number of users, which are drawn at once. The number has to be even, so
+# that the row backgrounds of the participant list alternate correctly.
+USER_CHUNK_SIZE = 100
 
-def participants_to_pdf(pdf):
+
+def get_user_chunks():
     """
-    Create a list of all participants as PDF
+    Yields lists of USER_CHUNK_SIZE users sorted like the participant list.
+    The users are read with one query, but they are not cached in the
+    queryset.
     """
-    data = [['#', _('Title'), _('Last Name'), _('First Name'),
-             _('Structure level'), _('Group')]]
     if config['participant_sort_users_by_first_name']:
         sort = 'first_name'
     else:
         sort = 'last_name'
+    chunk = []
+    for user in User.objects.order_by(sort).iterator():
+        chunk.append(user)
+        if len(chunk) == USER_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def get_group_names(users):
+    """
+    Returns a dictionary with the ids of the users as keys and the names of
+    their groups, but the group 'Registered', as values.
+    """
+    group_names = {}
+    memberships = (DjangoUser.groups.through.objects
+                   .filter(user__in=[user.pk for user in users])
+                   .exclude(group=2).order_by('pk')
+                   .values_list('user_id', 'group__name'))
+    for user_id, group_name in memberships:
+        group_names.setdefault(user_id, []).append(group_name)
+    return group_names
+
+
+def get_participant_tables():
+    """
+    Yields a list with the table of the participant list for every chunk of
+    users. Only the first table has the header row and only the last table
+    the line below.
+    """
+    rows = []
     counter = 0
-    for user in User.objects.all().order_by(sort):
-        counter += 1
-        groups = ''
-        for group in user.groups.all():
-            if group.pk != 2:
-                groups += "%s<br/>" % unicode(_(group.name))
-        data.append([
-            counter,
-            Paragraph(user.title, stylesheet['Tablecell']),
-            Paragraph(user.last_name, stylesheet['Tablecell']),
-            Paragraph(user.first_name, stylesheet['Tablecell']),
-            Paragraph(user.structure_level, stylesheet['Tablecell']),
-            Paragraph(groups, stylesheet['Tablecell'])])
-    t = LongTable(data, style=[
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LINEABOVE', (0, 0), (-1, 0), 2, colors.black),
-        ('LINEABOVE', (0, 1), (-1, 1), 1, colors.black),
-        ('LINEBELOW', (0, -1), (-1, -1), 2, colors.black),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1),
-            (colors.white, (.9, .9, .9)))])
-    t._argW[0] = 0.75 * cm
-    pdf.append(t)
+    first = True
+    for users in get_user_chunks():
+        if rows:
+            yield [get_participant_table(rows, first)]
+            first = False
+        group_names = get_group_names(users)
+        rows = []
+        for user in users:
+            counter += 1
+            groups = ''
+            for group_name in group_names.get(user.pk, []):
+                groups += "%s<br/>" % unicode(_(group_name))
+            rows.append([
+                counter,
+                Paragraph(user.title, stylesheet['Tablecell']),
+                Paragraph(user.last_name, stylesheet['Tablecell']),
+                Paragraph(user.first_name, stylesheet['Tablecell']),
+                Paragraph(user.structure_level, stylesheet['Tablecell']),
+                Paragraph(groups, stylesheet['Tablecell'])])
+    yield [get_participant_table(rows, first, last=True)]
+
+
+def get_participant_table(rows, first, last=False):
+    """
+    Returns a table of the participant list with the given rows.
+    """
+    if first:
+        # The header cells are paragraphs, so that they do not change the
+        # widths of the columns, which have to be the same in all tables.
+        data = [['#'] + [Paragraph(title, stylesheet['Normal']) for title in (
+            _('Title'), _('Last Name'), _('First Name'), _('Structure level'), _('Group'))]] + rows
+        style = [('LINEABOVE', (0, 0), (-1, 0), 2, colors.black),
+                 ('LINEABOVE', (0, 1), (-1, 1), 1, colors.black),
+                 ('ROWBACKGROUNDS', (0, 1), (-1, -1), (colors.white, (.9, .9, .9)))]
+    else:
+        data = rows
+        style = [('ROWBACKGROUNDS', (0, 0), (-1, -1), (colors.white, (.9, .9, .9)))]
+    style.append(('VALIGN', (0, 0), (-1, -1), 'TOP'))
+    if last:
+        style.append(('LINEBELOW', (0, -1), (-1, -1), 2, colors.black))
+    table = LongTable(data, style=style)
+    table._argW[0] = 0.75 * cm
+    return table
+
+
+def participants_to_pdf(pdf):
+    """
+    Create a list of all participants as PDF. The list is drawn in chunks of
+    USER_CHUNK_SIZE users.
+    """
+    append_chunks(pdf, get_participant_tables())
     return pdf
 
 
 def participants_passwords_to_pdf(pdf):
     """
-    Create access data sheets for all participants as PDF
+    Create access data sheets for all participants as PDF. The sheets are
+    created in chunks of USER_CHUNK_SIZE users.
     """
     participant_pdf_wlan_ssid = config["participant_pdf_wlan_ssid"] or "-"
     participant_pdf_wlan_password = config["participant_pdf_wlan_password"] or "-"
@@ -60,10 +127,6 @@ def participants_passwords_to_pdf(pdf):
     participant_pdf_url = config["participant_pdf_url"] or "-"
     participant_pdf_welcometitle = config["participant_pdf_welcometitle"]
     participant_pdf_welcometext = config["participant_pdf_welcometext"]
-    if config['participant_sort_users_by_first_name']:
-        sort = 'first_name'
-    else:
-        sort = 'last_name'
     qrcode_size = 2 * cm
     # qrcode for system url
     qrcode_url = QrCodeWidget(participant_pdf_url)
@@ -72,6 +135,7 @@ def participants_passwords_to_pdf(pdf):
     qrcode_url.barBorder = 0
     qrcode_url_draw = Drawing(45, 45)
     qrcode_url_draw.add(qrcode_url)
+    qrcode_url_draw = FormDrawing(qrcode_url_draw, 'qrcode_url')
     # qrcode for wlan
     text = "WIFI:S:%s;T:%s;P:%s;;" % (participant_pdf_wlan_ssid, participant_pdf_wlan_encryption, participant_pdf_wlan_password)
     qrcode_wlan = QrCodeWidget(text)
@@ -80,68 +144,75 @@ def participants_passwords_to_pdf(pdf):
     qrcode_wlan.barBorder = 0
     qrcode_wlan_draw = Drawing(45, 45)
     qrcode_wlan_draw.add(qrcode_wlan)
+    qrcode_wlan_draw = FormDrawing(qrcode_wlan_draw, 'qrcode_wlan')
 
-    for user in User.objects.all().order_by(sort):
-        pdf.append(Paragraph(unicode(user), stylesheet['h1']))
-        pdf.append(Spacer(0, 1 * cm))
-        data = []
-        # WLAN access data
-        cell = []
-        cell.append(Paragraph(_("WLAN access data"),
-                    stylesheet['h2']))
-        cell.append(Paragraph("%s:" % _("WLAN name (SSID)"),
-                    stylesheet['formfield']))
-        cell.append(Paragraph(participant_pdf_wlan_ssid,
-                    stylesheet['formfield_value']))
-        cell.append(Paragraph("%s:" % _("WLAN password"),
-                    stylesheet['formfield']))
-        cell.append(Paragraph(participant_pdf_wlan_password,
-                    stylesheet['formfield_value']))
-        cell.append(Paragraph("%s:" % _("WLAN encryption"),
-                    stylesheet['formfield']))
-        cell.append(Paragraph(participant_pdf_wlan_encryption,
-                    stylesheet['formfield_value']))
-        cell.append(Spacer(0, 0.5 * cm))
-        # OpenSlides access data
-        cell2 = []
-        cell2.append(Paragraph(_("OpenSlides access data"),
+    # The flowables, which are the same for all participants, are created
+    # once and drawn on every page.
+    # WLAN access data
+    wlan_cell = []
+    wlan_cell.append(Paragraph(_("WLAN access data"),
                      stylesheet['h2']))
-        cell2.append(Paragraph("%s:" % _("Username"),
+    wlan_cell.append(Paragraph("%s:" % _("WLAN name (SSID)"),
                      stylesheet['formfield']))
-        cell2.append(Paragraph(user.username,
+    wlan_cell.append(Paragraph(participant_pdf_wlan_ssid,
                      stylesheet['formfield_value']))
-        cell2.append(Paragraph("%s:" % _("Password"),
+    wlan_cell.append(Paragraph("%s:" % _("WLAN password"),
                      stylesheet['formfield']))
-        cell2.append(Paragraph(user.default_password,
+    wlan_cell.append(Paragraph(participant_pdf_wlan_password,
                      stylesheet['formfield_value']))
-        cell2.append(Paragraph("URL:",
+    wlan_cell.append(Paragraph("%s:" % _("WLAN encryption"),
                      stylesheet['formfield']))
-        cell2.append(Paragraph(participant_pdf_url,
+    wlan_cell.append(Paragraph(participant_pdf_wlan_encryption,
                      stylesheet['formfield_value']))
-        data.append([cell, cell2])
-        # QRCodes
-        cell = []
-        if participant_pdf_wlan_ssid != "-" and participant_pdf_wlan_encryption != "-":
-            cell.append(qrcode_wlan_draw)
-            cell.append(Paragraph(_("Scan this QRCode to connect WLAN."),
-                        stylesheet['qrcode_comment']))
-        cell2 = []
-        if participant_pdf_url != "-":
-            cell2.append(qrcode_url_draw)
-            cell2.append(Paragraph(_("Scan this QRCode to open URL."),
-                         stylesheet['qrcode_comment']))
-        data.append([cell, cell2])
-        # build table
-        table = Table(data)
-        table._argW[0] = 8 * cm
-        table._argW[1] = 8 * cm
-        table.setStyle(TableStyle([('VALIGN', (0, 0), (-1, -1), 'TOP')]))
-        pdf.append(table)
-        pdf.append(Spacer(0, 2 * cm))
-
-        # welcome title and text
-        pdf.append(Paragraph(participant_pdf_welcometitle, stylesheet['h2']))
-        pdf.append(Paragraph(participant_pdf_welcometext.replace('\r\n', '<br/>'),
-                   stylesheet['Paragraph12']))
-        pdf.append(PageBreak())
+    wlan_cell.append(Spacer(0, 0.5 * cm))
+    # OpenSlides access data
+    access_data_title = Paragraph(_("OpenSlides access data"), stylesheet['h2'])
+    username_label = Paragraph("%s:" % _("Username"), stylesheet['formfield'])
+    password_label = Paragraph("%s:" % _("Password"), stylesheet['formfield'])
+    url_label = Paragraph("URL:", stylesheet['formfield'])
+    url_value = Paragraph(participant_pdf_url, stylesheet['formfield_value'])
+    # QRCodes
+    qrcode_wlan_cell = []
+    if participant_pdf_wlan_ssid != "-" and participant_pdf_wlan_encryption != "-":
+        qrcode_wlan_cell.append(qrcode_wlan_draw)
+        qrcode_wlan_cell.append(Paragraph(_("Scan this QRCode to connect WLAN."),
+                                stylesheet['qrcode_comment']))
+    qrcode_url_cell = []
+    if participant_pdf_url != "-":
+        qrcode_url_cell.append(qrcode_url_draw)
+        qrcode_url_cell.append(Paragraph(_("Scan this QRCode to open URL."),
+                               stylesheet['qrcode_comment']))
+    # welcome title and text
+    welcome = [
+        Spacer(0, 2 * cm),
+        Paragraph(participant_pdf_welcometitle, stylesheet['h2']),
+        Paragraph(participant_pdf_welcometext.replace('\r\n', '<br/>'),
+                  stylesheet['Paragraph12'])]
+
+    def get_access_data_chunks():
+        for users in get_user_chunks():
+            chunk = []
+            for user in users:
+                chunk.append(Paragraph(unicode(user), stylesheet['h1']))
+                chunk.append(Spacer(0, 1 * cm))
+                access_data_cell = [
+                    access_data_title,
+                    username_label,
+                    Paragraph(user.username, stylesheet['formfield_value']),
+                    password_label,
+                    Paragraph(user.default_password, stylesheet['formfield_value']),
+                    url_label,
+                    url_value]
+                # build table
+                table = Table([[wlan_cell, access_data_cell],
+                               [qrcode_wlan_cell, qrcode_url_cell]])
+                table._argW[0] = 8 * cm
+                table._argW[1] = 8 * cm
+                table.setStyle(TableStyle([('VALIGN', (0, 0), (-1, -1), 'TOP')]))
+                chunk.append(table)
+                chunk.extend(welcome)
+                chunk.append(PageBreak())
+            yield chunk
+
+    append_chunks(pdf, get_access_data_chunks())
     return pdf
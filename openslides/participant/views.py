@@ -212,6 +212,9 @@ class ParticipantsListPDF(PDFView):
     permission_required = 'participant.can_see_participant'
     filename = ugettext_lazy("Participant-list")
     document_title = ugettext_lazy('List of Participants')
+    pdf_cache_apps = ('participant',)
+    pdf_cache_config_keys = PDFView.pdf_cache_config_keys + (
+        'participant_sort_users_by_first_name',)
 
     def append_to_pdf(self, pdf):
         """
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import threading
+
+from django.conf import settings
+from django.db import connection
+from django.utils.translation import ugettext as _
+
+from openslides.utils.exceptions import OpenSlidesError
+
+from .models import BallotCounter, BallotVoter
+
+
+def get_log_path(db_table, poll_id):
+    """
+    Returns the path of the log file of a poll or None, if
+    settings.BALLOT_LOG_PATH is not set.
+    """
+    if not settings.BALLOT_LOG_PATH:
+        return None
+    return os.path.join(settings.BALLOT_LOG_PATH, '%s-%d.log' % (db_table, poll_id))
+
+
+class BallotBox(object):
+    """
+    Collects the electronic ballots of one poll.
+
+    A ballot is a dictionary with option ids as keys and vote values as
+    values. The ballots are appended to a list and, if
+    settings.BALLOT_LOG_PATH is set, to a log file, which is read again when
+    the box is created after a restart. The log contains the voters and the
+    ballots as separate entries, so no ballot is saved with the person who
+    cast it. Every person can cast one ballot.
+
+    The ballots are counted in batches with BasePoll.add_votes. The number
+    of counted ballots and their voters are saved in the same transaction
+    as the votes (see BallotCounter and BallotVoter), so the ballots from
+    the log are not counted twice and the voters of counted ballots can not
+    vote again after a restart, even without log.
+    """
+
+    def __init__(self, poll):
+        self.poll_class = type(poll)
+        self.poll_id = poll.pk
+        self.option_ids = set(unicode(option.pk) for option in poll.get_options())
+        self.vote_values = set(poll.get_vote_values())
+        self.max_options = poll.get_ballot_max_options()
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.is_open = True
+        self.voters = BallotVoter.objects.get_voters(poll)
+        # Voters, who are not saved in the database yet.
+        self.new_voters = []
+        self.ballots = []
+        self.timer = None
+        self.log_file = None
+        path = self.get_log_path()
+        if path is not None:
+            if os.path.exists(path):
+                self.read_log(path)
+            elif not os.path.isdir(settings.BALLOT_LOG_PATH):
+                os.makedirs(settings.BALLOT_LOG_PATH)
+            self.log_file = open(path, 'ab')
+        self.counted = BallotCounter.objects.get_counted(poll)
+        # Number of counted ballots, which are not in the list, because
+        # there was no log.
+        self.first = max(self.counted - len(self.ballots), 0)
+
+    def get_log_path(self):
+        return get_log_path(self.poll_class._meta.db_table, self.poll_id)
+
+    def read_log(self, path):
+        """
+        Reads the voters and the ballots from the log file. An incomplete
+        last line after a crash is removed, so that the next entry starts on
+        a new line.
+        """
+        with open(path, 'r+b') as log_file:
+            content = log_file.read()
+            end = content.rfind('\n') + 1
+            if end < len(content):
+                log_file.truncate(end)
+        for line in content[:end].splitlines():
+            entry = json.loads(line)
+            if 'voter' in entry:
+                if entry['voter'] not in self.voters:
+                    self.voters.add(entry['voter'])
+                    self.new_voters.append(entry['voter'])
+            else:
+                self.ballots.append(entry['ballot'])
+
+    def write_log(self, *entries):
+        """
+        Appends entries to the log file. The caller has to hold self.lock.
+        """
+        if self.log_file is not None:
+            self.log_file.write(''.join(
+                json.dumps(entry, separators=(',', ':')) + '\n' for entry in entries))
+            self.log_file.flush()
+
+    def has_voted(self, person_id):
+        return person_id in self.voters
+
+    def get_pending(self):
+        """
+        Returns the number of ballots, which are not counted yet.
+        """
+        return self.first + len(self.ballots) - self.counted
+
+    def submit(self, person_id, ballot):
+        """
+        Adds the ballot of a person to the box.
+
+        Raises OpenSlidesError, if the box is closed, the ballot is empty,
+        invalid or has too many options or the person has already voted.
+        Returns True, if a batch of ballots is complete and should be
+        counted with flush. Otherwise a timer to
+        count the ballots after settings.BALLOT_FLUSH_INTERVAL seconds is
+        started.
+        """
+        if not ballot:
+            raise OpenSlidesError(_('The ballot is empty.'))
+        if self.max_options is not None and len(ballot) > self.max_options:
+            raise OpenSlidesError(_('The ballot has too many votes.'))
+        for option_id, value in ballot.items():
+            if option_id not in self.option_ids or value not in self.vote_values:
+                raise OpenSlidesError(_('The ballot is invalid.'))
+        with self.lock:
+            if not self.is_open:
+                raise OpenSlidesError(_('The ballot box is closed.'))
+            if person_id in self.voters:
+                raise OpenSlidesError(_('You have already voted.'))
+            self.voters.add(person_id)
+            self.new_voters.append(person_id)
+            self.ballots.append(ballot)
+            self.write_log({'voter': person_id}, {'ballot': ballot})
+            if self.get_pending() >= settings.BALLOT_BATCH_SIZE:
+                return True
+            self.start_timer()
+            return False
+
+    def start_timer(self):
+        """
+        Starts a timer to count the pending ballots after
+        settings.BALLOT_FLUSH_INTERVAL seconds, if it is not started yet.
+        The caller has to hold self.lock.
+        """
+        if self.timer is None and settings.BALLOT_FLUSH_INTERVAL is not None:
+            self.timer = threading.Timer(settings.BALLOT_FLUSH_INTERVAL, self.flush_in_thread)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self, blocking=True):
+        """
+        Counts the pending ballots.
+
+        The votes of the poll are increased with one transaction. Saving the
+        poll sends the new tally to the projector. If 'blocking' is False and
+        another thread counts the ballots at the moment, the timer is started
+        to count the pending ballots later.
+        """
+        if not self.flush_lock.acquire(blocking):
+            with self.lock:
+                self.start_timer()
+            return
+        try:
+            with self.lock:
+                if self.timer is not None:
+                    self.timer.cancel()
+                    self.timer = None
+            # The poll is loaded again, so that changes in the poll form
+            # are not overwritten.
+            try:
+                poll = self.poll_class.objects.get(pk=self.poll_id)
+            except self.poll_class.DoesNotExist:
+                # The poll was deleted. The ballots are only marked as counted.
+                with self.lock:
+                    self.counted = self.first + len(self.ballots)
+                return
+            counted = BallotCounter.objects.get_counted(poll)
+            with self.lock:
+                ballots = self.ballots[max(counted - self.first, 0):]
+                voters = list(self.new_voters)
+            if ballots or voters:
+                counts = {}
+                for ballot in ballots:
+                    for option_id, value in ballot.items():
+                        key = (int(option_id), value)
+                        counts[key] = counts.get(key, 0) + 1
+                poll.add_votes(counts, len(ballots), voters)
+            with self.lock:
+                self.counted = counted + len(ballots)
+                del self.new_voters[:len(voters)]
+        finally:
+            self.flush_lock.release()
+
+    def flush_in_thread(self):
+        """
+        Counts the pending ballots in the thread of the timer.
+        """
+        try:
+            self.flush()
+        finally:
+            connection.close()
+
+    def open(self):
+        with self.lock:
+            self.is_open = True
+
+    def close(self):
+        """
+        Closes the box and counts the pending ballots.
+        """
+        with self.lock:
+            self.is_open = False
+        self.flush()
+
+    def discard(self):
+        """
+        Closes the box without counting the pending ballots and closes the
+        log file. Used when the poll is deleted.
+        """
+        with self.lock:
+            self.is_open = False
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if self.log_file is not None:
+                self.log_file.close()
+                self.log_file = None
+
+
+class BallotBoxes(object):
+    """
+    Registry of the ballot boxes of the process.
+
+    Closed boxes are kept, so that the voters are known, if the box is opened
+    again.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.boxes = {}
+
+    def get_key(self, poll):
+        return (poll._meta.db_table, poll.pk)
+
+    def get(self, poll):
+        """
+        Returns the ballot box of the poll or None.
+        """
+        return self.boxes.get(self.get_key(poll))
+
+    def open(self, poll):
+        """
+        Opens the ballot box of the poll and returns it. Ballots from the log,
+        which are not counted yet, are counted.
+        """
+        with self.lock:
+            box = self.boxes.get(self.get_key(poll))
+            if box is None:
+                box = self.boxes[self.get_key(poll)] = BallotBox(poll)
+        box.open()
+        box.flush()
+        return box
+
+    def close(self, poll):
+        """
+        Closes the ballot box of the poll, if it exists.
+        """
+        box = self.get(poll)
+        if box is not None:
+            box.close()
+        return box
+
+    def remove(self, poll):
+        """
+        Removes the ballot box and the log file of a deleted poll, so that a
+        new poll with the same id starts with an empty box.
+        """
+        with self.lock:
+            box = self.boxes.pop(self.get_key(poll), None)
+        if box is not None:
+            box.discard()
+        path = get_log_path(poll._meta.db_table, poll.pk)
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+
+ballot_boxes = BallotBoxes()
@@ -1,13 +1,12 @@
 # -*- coding: utf-8 -*-
 
-import locale
-
-from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
+from django.utils import formats
 from django.utils.translation import ugettext as _
-from django.utils.translation import ugettext_lazy, ugettext_noop
+from django.utils.translation import get_language, ugettext_lazy, ugettext_noop
 
 from openslides.utils.models import MinMaxIntegerField
+from openslides.utils.pdf_cache import bulk_write
 
 
 class BaseOption(models.Model):
@@ -33,6 +32,14 @@ class BaseOption(models.Model):
         return self.vote_class
 
     def __getitem__(self, name):
+        """
+        Returns the vote object for the value 'name' or None. If the votes
+        were loaded with BasePoll.get_vote_table, no query is needed.
+        """
+        try:
+            return self._votes.get(name)
+        except AttributeError:
+            pass
         try:
             return self.get_votes().get(value=name)
         except self.get_vote_class().DoesNotExist:
@@ -147,6 +154,87 @@ class PublishPollMixin(models.Model):
         self.save()
 
 
+class BallotCounterManager(models.Manager):
+    def get_key(self, poll):
+        return '%s:%d' % (poll._meta.db_table, poll.pk)
+
+    def get_counted(self, poll):
+        """
+        Returns the number of counted electronic ballots of the poll.
+        """
+        try:
+            return self.get(key=self.get_key(poll)).counted
+        except BallotCounter.DoesNotExist:
+            return 0
+
+    def add(self, poll, ballots):
+        """
+        Increases the number of counted electronic ballots of the poll. Has
+        to be called in the transaction, in which the ballots are counted.
+        """
+        key = self.get_key(poll)
+        if not self.filter(key=key).update(counted=models.F('counted') + ballots):
+            self.create(key=key, counted=ballots)
+
+
+class BallotCounter(models.Model):
+    """
+    Counts the electronic ballots of a poll, which are added to its votes,
+    see openslides.poll.ballots.
+    """
+
+    objects = BallotCounterManager()
+
+    key = models.CharField(max_length=255, unique=True)
+    """
+    '<table of the poll>:<id of the poll>'.
+    """
+
+    counted = models.IntegerField(default=0)
+    """
+    The number of counted ballots.
+    """
+
+
+class BallotVoterManager(models.Manager):
+    def get_voters(self, poll):
+        """
+        Returns a set with the person ids of the voters of the poll, whose
+        ballots are counted.
+        """
+        return set(self.filter(key=BallotCounter.objects.get_key(poll)).values_list('person', flat=True))
+
+    def add(self, poll, voters):
+        """
+        Saves the voters of counted ballots. Has to be called in the
+        transaction, in which the ballots are counted.
+        """
+        key = BallotCounter.objects.get_key(poll)
+        self.bulk_create([self.model(key=key, person=person_id) for person_id in voters])
+
+
+class BallotVoter(models.Model):
+    """
+    A person whose electronic ballot for a poll is counted. The ballot itself
+    is not saved with the person.
+    """
+
+    objects = BallotVoterManager()
+
+    key = models.CharField(max_length=255)
+    """
+    '<table of the poll>:<id of the poll>', like BallotCounter.key.
+    """
+
+    person = models.CharField(max_length=255)
+    """
+    The person id of the voter.
+    """
+
+    class Meta:
+        unique_together = ('key', 'person')
+
+
 class BasePoll(models.Model):
     """
     Base poll class.
@@ -160,20 +248,18 @@ class BasePoll(models.Model):
         """
         Returns True if there are votes in the poll.
         """
-        if self.get_votes().exists():
-            return True
-        return False
+        return any(option._votes for option in self.get_vote_table())
 
     def set_options(self, options_data=[]):
         """
-        Adds new option objects to the poll.
+        Adds new option objects to the poll with one query.
 
         option_data: A list of arguments for the option.
         """
-        for option_data in options_data:
-            option = self.get_option_class()(**option_data)
-            option.poll = self
-            option.save()
+        option_class = self.get_option_class()
+        with bulk_write(option_class._meta.app_label):
+            option_class.objects.bulk_create(
+                [option_class(poll=self, **option_data) for option_data in options_data])
 
     def get_options(self):
         """
@@ -181,6 +267,26 @@ class BasePoll(models.Model):
         """
         return self.get_option_class().objects.filter(poll=self)
 
+    def get_vote_table(self):
+        """
+        Returns the options of the poll as list. The votes of all options
+        are loaded with one query, so that option[value] needs no query.
+        """
+        try:
+            return self._vote_table
+        except AttributeError:
+            load_vote_tables([self])
+            return self._vote_table
+
+    def reset_vote_table(self):
+        """
+        Deletes the loaded options and votes of the poll.
+        """
+        try:
+            del self._vote_table
+        except AttributeError:
+            pass
+
     def get_option_class(self):
         """
         Returns the option class for the poll. Default is self.option_class.
@@ -193,6 +299,13 @@ class BasePoll(models.Model):
         """
         return self.vote_values
 
+    def get_ballot_max_options(self):
+        """
+        Returns the maximum number of options, which can be chosen on one
+        electronic ballot, or None, if there is no maximum. Default is None.
+        """
+        return None
+
     def get_vote_class(self):
         """
         Returns the related vote class.
@@ -207,28 +320,97 @@ class BasePoll(models.Model):
 
     def set_vote_objects_with_values(self, option, data):
         """
-        Creates or updates the vote objects for the poll.
+        Creates or updates the vote objects of one option of the poll.
         """
-        for value in self.get_vote_values():
-            try:
-                vote = self.get_votes().filter(option=option).get(value=value)
-            except ObjectDoesNotExist:
-                vote = self.get_vote_class()(option=option, value=value)
-            vote.weight = data[value]
-            vote.save()
+        self.set_votes([(option, data)])
+
+    def set_votes(self, votes_data):
+        """
+        Creates or updates the vote objects of many options of the poll in
+        one transaction.
+
+        'votes_data' is a list of tuples with an option and a dictionary with
+        the weights of all vote values. The existing votes are loaded with
+        one query. The new votes are created with one query and the changed
+        votes are updated with one query per weight.
+        """
+        vote_class = self.get_vote_class()
+        values = self.get_vote_values()
+        votes = dict(((vote.option_id, vote.value), vote) for vote in self.get_votes())
+        new_votes = []
+        changed_votes = {}
+        for option, data in votes_data:
+            for value in values:
+                weight = data[value]
+                vote = votes.get((option.pk, value))
+                if vote is None:
+                    new_votes.append(vote_class(option=option, value=value, weight=weight))
+                elif vote.weight != weight:
+                    changed_votes.setdefault(weight, []).append(vote.pk)
+        with bulk_write(vote_class._meta.app_label):
+            vote_class.objects.bulk_create(new_votes)
+            for weight, vote_ids in changed_votes.items():
+                vote_class.objects.filter(pk__in=vote_ids).update(weight=weight)
+        self.reset_vote_table()
+
+    def add_votes(self, counts, ballots=0, voters=()):
+        """
+        Increases the weights of the votes of the poll in one transaction.
+        Used to count electronic ballots, see openslides.poll.ballots.
+
+        'counts' is a dictionary with tuples of an option id and a vote value
+        as keys and the numbers to add as values. Missing votes are created.
+        Weights without number (majority, undocumented) are replaced.
+        'ballots' is added to the valid votes and the votes cast, if the poll
+        collects them, and to the counted ballots of the poll (see
+        BallotCounter). The person ids in 'voters' are saved as voters of
+        the poll (see BallotVoter). The poll is saved, so the projector is
+        updated.
+        """
+        vote_class = self.get_vote_class()
+        votes = dict(((vote.option_id, vote.value), vote) for vote in self.get_votes())
+        new_votes = []
+        increased_votes = {}
+        replaced_votes = {}
+        for (option_id, value), count in counts.items():
+            vote = votes.get((option_id, value))
+            if vote is None:
+                new_votes.append(vote_class(option_id=option_id, value=value, weight=count))
+            elif vote.weight is None or vote.weight < 0:
+                replaced_votes.setdefault(count, []).append(vote.pk)
+            else:
+                increased_votes.setdefault(count, []).append(vote.pk)
+        with bulk_write(vote_class._meta.app_label):
+            vote_class.objects.bulk_create(new_votes)
+            for count, vote_ids in increased_votes.items():
+                vote_class.objects.filter(pk__in=vote_ids).update(weight=models.F('weight') + count)
+            for count, vote_ids in replaced_votes.items():
+                vote_class.objects.filter(pk__in=vote_ids).update(weight=count)
+            if ballots:
+                BallotCounter.objects.add(self, ballots)
+            if voters:
+                BallotVoter.objects.add(self, voters)
+                if isinstance(self, CollectDefaultVotesMixin):
+                    for field in ('votesvalid', 'votescast'):
+                        setattr(self, field, max(getattr(self, field) or 0, 0) + ballots)
+            self.save()
+        self.reset_vote_table()
 
     def get_vote_objects_with_values(self, option_id):
         """
-        Returns the vote values and their weight as a list with two elements.
+        Returns the vote objects of the option for all vote values as list.
+        Missing votes are represented by unsaved vote objects without weight.
         """
+        votes = {}
+        for option in self.get_vote_table():
+            if option.pk == int(option_id):
+                votes = option._votes
         values = []
         for value in self.get_vote_values():
-            try:
-                vote = self.get_votes().filter(option=option_id).get(value=value)
-            except ObjectDoesNotExist:
-                values.append(self.get_vote_class()(value=value, weight=''))
-            else:
-                values.append(vote)
+            vote = votes.get(value)
+            if vote is None:
+                vote = self.get_vote_class()(value=value, weight='')
+            values.append(vote)
         return values
 
     def get_vote_form(self, **kwargs):
@@ -244,7 +426,7 @@ class BasePoll(models.Model):
         Returns a list of forms for the poll.
         """
         forms = []
-        for option in self.get_options():
+        for option in self.get_vote_table():
             form = self.get_vote_form(formid=option.id, **kwargs)
             form.option = option
             forms.append(form)
@@ -258,10 +440,57 @@ class BasePoll(models.Model):
         pass
 
 
-def print_value(value, percent_base=0):
+def load_vote_tables(polls):
+    """
+    Loads the options and the votes of the polls for BasePoll.get_vote_table.
+
+    All polls have to be objects of the same class. The options and the votes
+    of all polls are loaded with one query each. Polls with loaded votes are
+    skipped.
+    """
+    polls = [poll for poll in polls if not hasattr(poll, '_vote_table')]
+    if not polls:
+        return
+    poll_dict = dict((poll.pk, poll) for poll in polls)
+    option_dict = {}
+    for poll in polls:
+        poll._vote_table = []
+    for option in polls[0].get_option_class().objects.filter(poll__in=poll_dict).order_by('pk'):
+        option.poll = poll_dict[option.poll_id]
+        option._votes = {}
+        option.poll._vote_table.append(option)
+        option_dict[option.pk] = option
+    for vote in polls[0].get_vote_class().objects.filter(option__poll__in=poll_dict):
+        vote.option = option_dict[vote.option_id]
+        vote.option._votes[vote.value] = vote
+
+
+# The decimal separators of the languages, see get_decimal_separator.
+decimal_separators = {}
+
+
+def get_decimal_separator():
+    """
+    Returns the decimal separator of the active language. The separators are
+    cached per language. The global locale of the process is not changed, so
+    the function can be used in many threads.
+    """
+    language = get_language()
+    try:
+        return decimal_separators[language]
+    except KeyError:
+        separator = formats.get_format('DECIMAL_SEPARATOR', language, use_l10n=True)
+        decimal_separators[language] = separator
+        return separator
+
+
+def print_value(value, percent_base=0, decimal_separator=None):
     """
     Returns a human readable string for the vote value. It is 'majority',
     'undocumented' or the vote value with percent value if so.
+
+    The percent value is formatted with the decimal separator of the active
+    language, if 'decimal_separator' is not given.
     """
     if value == -1:
         verbose_value = _('majority')
@@ -271,8 +500,10 @@ def print_value(value, percent_base=0):
         verbose_value = _('undocumented')
     else:
         if percent_base:
-            locale.setlocale(locale.LC_ALL, '')
-            verbose_value = u'%d (%s %%)' % (value, locale.format('%.1f', value * percent_base))
+            if decimal_separator is None:
+                decimal_separator = get_decimal_separator()
+            percent = (u'%.1f' % (value * percent_base)).replace(u'.', decimal_separator)
+            verbose_value = u'%d (%s %%)' % (value, percent)
         else:
             verbose_value = u'%s' % value
     return verbose_value
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .ballots import ballot_boxes
+from .models import BallotCounter, BallotVoter, BasePoll
+
+
+@receiver(post_delete, dispatch_uid='poll_remove_ballot_box')
+def remove_ballot_box(sender, instance, **kwargs):
+    """
+    Receiver to remove the ballot box, the log file, the ballot counter and
+    the voters of a deleted poll. The databases reuse the ids of deleted polls.
+    """
+    if isinstance(instance, BasePoll):
+        ballot_boxes.remove(instance)
+        key = BallotCounter.objects.get_key(instance)
+        BallotCounter.objects.filter(key=key).delete()
+        BallotVoter.objects.filter(key=key).delete()
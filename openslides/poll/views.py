@@ -1,20 +1,49 @@
 # -*- coding: utf-8 -*-
 
+import json
+
+from django.contrib import messages
 from django.forms.models import modelform_factory
-from django.http import HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseRedirect
+from django.utils.translation import ugettext as _
+
+from openslides.utils.exceptions import OpenSlidesError
+from openslides.utils.views import AjaxView, FormMixin, RedirectView, TemplateView
 
-from openslides.utils.views import TemplateView, FormMixin
+from .ballots import ballot_boxes
 
 
-class PollFormView(FormMixin, TemplateView):
+class PollClassMixin(object):
+    """
+    Mixin for views of one poll of the class poll_class.
+    """
     poll_class = None
 
+    def get_poll_class(self):
+        if self.poll_class is not None:
+            return self.poll_class
+        else:
+            raise NotImplementedError(
+                'No poll class defined. Either provide a poll_class or define '
+                'a get_poll_class method.')
+
+    def get_object(self):
+        return self.get_poll_class().objects.get(pk=self.kwargs['poll_id'])
+
+
+class PollFormView(PollClassMixin, FormMixin, TemplateView):
     def get(self, request, *args, **kwargs):
         self.poll = self.object = self.get_object()
         return super(PollFormView, self).get(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
         self.poll = self.object = self.get_object()
+        ballot_box = ballot_boxes.get(self.poll)
+        if ballot_box is not None and (ballot_box.is_open or ballot_box.get_pending()):
+            # The form would overwrite the ballots counted since it was
+            # rendered.
+            messages.error(request, _('The votes can not be changed while the ballot box is open.'))
+            return HttpResponseRedirect(request.get_full_path())
         option_forms = self.poll.get_vote_forms(data=self.request.POST)
 
         FormClass = self.get_modelform_class()
@@ -34,30 +63,20 @@ class PollFormView(FormMixin, TemplateView):
                 forms=option_forms,
                 pollform=pollform))
         else:
-            for form in option_forms:
-                data = {}
-                for value in self.poll.get_vote_values():
-                    data[value] = form.cleaned_data[value]
-                self.poll.set_vote_objects_with_values(form.option, data)
-
+            # The votes are saved at once. Only saving the poll updates the
+            # projector.
+            self.poll.set_votes(
+                (form.option, dict((value, form.cleaned_data[value])
+                                   for value in self.poll.get_vote_values()))
+                for form in option_forms)
             pollform.save()
             response = HttpResponseRedirect(self.get_success_url())
         return response
 
-    def get_poll_class(self):
-        if self.poll_class is not None:
-            return self.poll_class
-        else:
-            raise NotImplementedError(
-                'No poll class defined. Either provide a poll_class or define '
-                'a get_poll_class method.')
-
-    def get_object(self):
-        return self.get_poll_class().objects.get(pk=self.kwargs['poll_id'])
-
     def get_context_data(self, **kwargs):
         context = super(PollFormView, self).get_context_data(**kwargs)
         context['poll'] = self.poll
+        context['ballot_box'] = ballot_boxes.get(self.poll)
         if 'forms' in kwargs:
             context['forms'] = kwargs['forms']
             context['pollform'] = kwargs['pollform']
@@ -72,3 +91,65 @@ class PollFormView(FormMixin, TemplateView):
         fields = []
         self.poll.append_pollform_fields(fields)
         return modelform_factory(type(self.poll), fields=fields)
+
+
+class BallotView(PollClassMixin, AjaxView):
+    """
+    View to cast an electronic ballot for a poll.
+
+    A POST request casts the ballot of the request user. The data contains
+    the vote value for every chosen option as 'option-<id>'. A GET request
+    returns whether the ballot box is open and whether the user has voted.
+    Both answers are json objects.
+    """
+
+    def has_permission(self, request, *args, **kwargs):
+        """
+        Only delegates can vote.
+        """
+        return (request.user.is_authenticated() and
+                request.user.groups.filter(pk=3).exists() and
+                super(BallotView, self).has_permission(request, *args, **kwargs))
+
+    def get_ajax_context(self, **kwargs):
+        ballot_box = ballot_boxes.get(self.get_object())
+        return super(BallotView, self).get_ajax_context(
+            open=ballot_box is not None and ballot_box.is_open,
+            voted=ballot_box is not None and ballot_box.has_voted(self.request.user.person_id),
+            **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        ballot_box = ballot_boxes.get(self.get_object())
+        if ballot_box is None:
+            return HttpResponseBadRequest(json.dumps({'error': _('The ballot box is closed.')}))
+        ballot = dict((key[len('option-'):], value) for key, value in request.POST.items()
+                      if key.startswith('option-'))
+        try:
+            complete = ballot_box.submit(request.user.person_id, ballot)
+        except OpenSlidesError as error:
+            return HttpResponseBadRequest(json.dumps({'error': unicode(error)}))
+        if complete:
+            # If another thread counts the ballots at the moment, the
+            # ballots are counted by the timer.
+            ballot_box.flush(blocking=False)
+        return HttpResponse(json.dumps({'open': True, 'voted': True}))
+
+
+class BallotBoxView(PollClassMixin, RedirectView):
+    """
+    View to open or close the ballot box of a poll. Closing the box counts
+    the pending ballots.
+    """
+    open_box = True
+
+    def pre_redirect(self, request, *args, **kwargs):
+        self.poll = self.get_object()
+        if self.open_box:
+            ballot_boxes.open(self.poll)
+            messages.success(request, _('The ballot box is open.'))
+        else:
+            ballot_boxes.close(self.poll)
+            messages.success(request, _('The ballot box is closed.'))
+
+    def get_redirect_url(self, **kwargs):
+        return self.poll.get_absolute_url()
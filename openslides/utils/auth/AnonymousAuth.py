@@ -27,17 +27,22 @@ class AnonymousAuth(object):
         Return the permissions a user is graneted by his group membership(s).
 
         - try to return the permissions for the 'Anonymous' group (pk=1).
+        - the permissions are loaded once per user object (like in Django's
+          ModelBackend), so only once per request.
         """
         if (not user_obj.is_anonymous() or obj is not None or
                 not config['system_enable_anonymous']):
             return set()
 
+        try:
+            return user_obj._anonymous_perm_cache
+        except AttributeError:
+            pass
         perms = Permission.objects.filter(group__pk=1)
-        if perms is None:
-            return set()
         perms = perms.values_list('content_type__app_label', 'codename') \
             .order_by()
-        return set([u'%s.%s' % (ct, name) for ct, name in perms])
+        user_obj._anonymous_perm_cache = set([u'%s.%s' % (ct, name) for ct, name in perms])
+        return user_obj._anonymous_perm_cache
 
     def get_all_permissions(self, user_obj, obj=None):
         """
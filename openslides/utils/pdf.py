@@ -6,11 +6,14 @@ from os.path import join as path_join
 from django.conf import settings
 from django.utils import formats
 from django.utils.translation import ugettext as _
+from reportlab.graphics import renderPDF
 from reportlab.lib import colors
 from reportlab.lib.styles import ParagraphStyle, StyleSheet1
 from reportlab.lib.units import cm
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import Flowable, Frame, PageBreak
+from reportlab.platypus.doctemplate import ActionFlowable
 from reportlab.rl_config import defaultPageSize
 
 from openslides.config.api import config
@@ -269,3 +272,153 @@ def laterPages(canvas, doc):
     canvas.setFillGray(0.4)
     canvas.drawString(10 * cm, 1 * cm, _("Page %s") % doc.page)
     canvas.restoreState()
+
+
+# Width of a column of a ballot paper. Two columns fit on a page.
+BALLOT_COLUMN_WIDTH = 10.5 * cm
+
+
+class BallotPaperPage(Flowable):
+    """
+    Flowable for one page with ballot papers.
+
+    The ballot paper is drawn once into a PDF form object of the document,
+    which is only placed on the page for every ballot paper. 'columns' is a
+    list of lists of flowables. Every list is drawn into a column of the
+    width BALLOT_COLUMN_WIDTH and the given height. The ballot papers are
+    placed in rows from the top of the page, so the page template should
+    have no margins.
+
+    The name of the form object is derived from the list 'columns', so the
+    pages of one kind of ballot paper share it, while other ballot papers in
+    the same document get their own form.
+    """
+
+    def __init__(self, columns, height, count):
+        Flowable.__init__(self)
+        self.columns = columns
+        self.form_name = 'ballot_paper_%d' % id(columns)
+        self.ballot_height = height
+        self.count = count
+
+    def wrap(self, availWidth, availHeight):
+        # The flowable takes the rest of the page.
+        self.width = availWidth
+        self.height = availHeight
+        return availWidth, availHeight
+
+    def draw_form(self):
+        canvas = self.canv
+        width = len(self.columns) * BALLOT_COLUMN_WIDTH
+        canvas.beginForm(self.form_name, 0, 0, width, self.ballot_height)
+        for number, column in enumerate(self.columns):
+            Frame(number * BALLOT_COLUMN_WIDTH, 0, BALLOT_COLUMN_WIDTH, self.ballot_height,
+                  topPadding=3, bottomPadding=3).addFromList(list(column), canvas)
+        canvas.setStrokeColor(colors.grey)
+        canvas.setLineWidth(0.25)
+        for number in range(len(self.columns)):
+            canvas.rect(number * BALLOT_COLUMN_WIDTH, 0, BALLOT_COLUMN_WIDTH, self.ballot_height)
+        canvas.endForm()
+
+    def draw(self):
+        canvas = self.canv
+        if not canvas.hasForm(self.form_name):
+            self.draw_form()
+        per_row = get_ballot_papers_per_row(self.columns)
+        width = len(self.columns) * BALLOT_COLUMN_WIDTH
+        # The rows are centered like a table.
+        left = (self.width - per_row * width) / 2
+        for number in range(self.count):
+            row, position = divmod(number, per_row)
+            canvas.saveState()
+            canvas.translate(left + position * width, self.height - (row + 1) * self.ballot_height)
+            canvas.doForm(self.form_name)
+            canvas.restoreState()
+
+
+def get_ballot_papers_per_row(columns):
+    # One point is added against rounding errors of the widths.
+    return max(1, int((PAGE_WIDTH + 1) // (len(columns) * BALLOT_COLUMN_WIDTH)))
+
+
+def append_ballot_papers(story, columns, height, number):
+    """
+    Appends pages with 'number' ballot papers to the story. See
+    BallotPaperPage for the arguments 'columns' and 'height'.
+    """
+    per_page = get_ballot_papers_per_row(columns) * max(1, int((PAGE_HEIGHT + 1) // height))
+    for first in range(0, number, per_page):
+        if first:
+            story.append(PageBreak())
+        story.append(BallotPaperPage(columns, height, min(per_page, number - first)))
+
+
+class FormDrawing(Flowable):
+    """
+    Flowable for a drawing, e. g. a QR code, which is used on many pages.
+
+    The drawing is drawn once into a PDF form object of the document with
+    the given name, which is only placed on the pages.
+    """
+
+    def __init__(self, drawing, form_name):
+        Flowable.__init__(self)
+        self.drawing = drawing
+        self.form_name = form_name
+
+    def wrap(self, availWidth, availHeight):
+        return self.drawing.wrap(availWidth, availHeight)
+
+    def draw(self):
+        canvas = self.canv
+        if not canvas.hasForm(self.form_name):
+            canvas.beginForm(self.form_name, *self.drawing.getBounds())
+            renderPDF.draw(self.drawing, canvas, 0, 0, showBoundary=False)
+            canvas.endForm()
+        canvas.doForm(self.form_name)
+
+
+class StoryChunks(ActionFlowable):
+    """
+    Flowable, which inserts the next chunk of flowables into the story, when
+    the document template reaches it.
+
+    'chunks' is an iterable of lists of flowables, e. g. a generator. The
+    flowables of a chunk are drawn and dropped before the chunk after the
+    next one is created, so only two chunks are kept in memory while the
+    document is built. 'story' has to be the list, which is built by the
+    document template.
+    """
+
+    def __init__(self, story, chunks):
+        ActionFlowable.__init__(self)
+        self.story = story
+        self.chunks = iter(chunks)
+        self.next_chunk = None
+
+    def get_chunk(self):
+        for chunk in self.chunks:
+            return list(chunk)
+        return None
+
+    def apply(self, doc):
+        if self.next_chunk is None:
+            self.next_chunk = self.get_chunk()
+        # The next chunk is created in advance, so that this flowable is not
+        # inserted after the last chunk. It would start an empty page after
+        # a page break at the end of the document.
+        chunk, self.next_chunk = self.next_chunk, self.get_chunk()
+        if chunk is None:
+            return
+        if self.next_chunk is not None:
+            chunk.append(self)
+        self.story[0:0] = chunk
+
+
+def append_chunks(story, chunks):
+    """
+    Appends the flowables of the iterable 'chunks' to the story. The chunks
+    are created one after the other while the document is built. See
+    StoryChunks.
+    """
+    story.append(StoryChunks(story, chunks))
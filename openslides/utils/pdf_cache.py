@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+# Timeout of the stamps in the django cache. An expired stamp only causes
+# new builds of the documents.
+STAMP_TIMEOUT = 30 * 24 * 60 * 60
+
+# Cache backends, which keep the stamps in one process. Other processes would
+# not see new stamps and deliver old documents.
+LOCAL_CACHE_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',
+                        'django.core.cache.backends.dummy.DummyCache')
+
+
+def get_stamp(app_label):
+    """
+    Returns the stamp of the data of an app. The stamp is changed every
+    time an object of the app is saved or deleted.
+    """
+    key = 'pdf_cache_stamp:%s' % app_label
+    stamp = cache.get(key)
+    if stamp is None:
+        stamp = uuid.uuid4().hex
+        if not cache.add(key, stamp, STAMP_TIMEOUT):
+            stamp = cache.get(key, stamp)
+    return stamp
+
+
+def update_stamp(app_label):
+    """
+    Sets a new stamp for the data of an app.
+    """
+    cache.set('pdf_cache_stamp:%s' % app_label, uuid.uuid4().hex, STAMP_TIMEOUT)
+
+
+@contextmanager
+def bulk_write(app_label, using=None):
+    """
+    Context manager for writes, which send no model signals, e. g. with
+    bulk_create, update or raw queries. The block runs in a transaction and
+    the stamp of the app is changed after the commit, so that no document is
+    cached with the data from before the commit.
+    """
+    with transaction.commit_on_success(using=using):
+        yield
+    update_stamp(app_label)
+
+
+def get_key(*values):
+    """
+    Returns a key for the cache built from the unicode representations of
+    the values.
+    """
+    return md5(u'\n'.join(unicode(value) for value in values).encode('utf-8')).hexdigest()
+
+
+class PDFCache(object):
+    """
+    Cache for PDF documents in the directory settings.PDF_CACHE_PATH.
+
+    The files are named by their keys. If the files get bigger than
+    settings.PDF_CACHE_MAX_SIZE bytes, the least recently used files are
+    deleted. Concurrent requests for the same key in one process wait for
+    one build of the document.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.builds = {}
+
+    def is_enabled(self):
+        """
+        Returns True, if settings.PDF_CACHE_PATH is set. Raises
+        ImproperlyConfigured, if the default django cache, which holds the
+        stamps, is not shared by all processes.
+        """
+        if not getattr(settings, 'PDF_CACHE_PATH', None):
+            return False
+        if settings.CACHES['default']['BACKEND'] in LOCAL_CACHE_BACKENDS:
+            raise ImproperlyConfigured(
+                'PDF_CACHE_PATH needs a default cache backend, which is shared '
+                'by all processes, e. g. memcached or the database cache.')
+        return True
+
+    def get_path(self, key):
+        return os.path.join(settings.PDF_CACHE_PATH, '%s.pdf' % key)
+
+    def open(self, key):
+        """
+        Returns the cached document as open file or None.
+        """
+        path = self.get_path(key)
+        try:
+            pdf_file = open(path, 'rb')
+        except IOError:
+            return None
+        try:
+            # Mark the file as recently used.
+            os.utime(path, None)
+        except OSError:
+            pass
+        return pdf_file
+
+    def get_or_build(self, key, write):
+        """
+        Returns the document for the key as open file. If it is not in the
+        cache, write(file) is called to build it. Other threads asking for
+        the same key meanwhile wait for this build.
+        """
+        pdf_file = self.open(key)
+        if pdf_file is not None:
+            return pdf_file
+
+        with self.lock:
+            build = self.builds.get(key)
+            if build is None:
+                build = self.builds[key] = threading.Event()
+                builder = True
+            else:
+                builder = False
+
+        if not builder:
+            build.wait()
+            # If the build failed, the next thread tries it again.
+            return self.get_or_build(key, write)
+
+        try:
+            pdf_file = self.save(key, write)
+        finally:
+            with self.lock:
+                del self.builds[key]
+            build.set()
+        self.evict()
+        return pdf_file
+
+    def save(self, key, write):
+        """
+        Builds the document into a temporary file, moves it into the cache
+        and returns it as open file.
+        """
+        if not os.path.isdir(settings.PDF_CACHE_PATH):
+            os.makedirs(settings.PDF_CACHE_PATH)
+        descriptor, temp_path = tempfile.mkstemp(suffix='.tmp', dir=settings.PDF_CACHE_PATH)
+        try:
+            with os.fdopen(descriptor, 'wb') as temp_file:
+                write(temp_file)
+            try:
+                os.rename(temp_path, self.get_path(key))
+            except OSError:
+                # On Windows, the file can exist already (built by another
+                # process). It is equal to the new one.
+                pass
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return open(self.get_path(key), 'rb')
+
+    def evict(self):
+        """
+        Deletes the least recently used files until the cache is not bigger
+        than settings.PDF_CACHE_MAX_SIZE.
+        """
+        files = []
+        for name in os.listdir(settings.PDF_CACHE_PATH):
+            if not name.endswith('.pdf'):
+                continue
+            path = os.path.join(settings.PDF_CACHE_PATH, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        size = sum(file_size for mtime, file_size, path in files)
+        for mtime, file_size, path in sorted(files):
+            if size <= settings.PDF_CACHE_MAX_SIZE:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # The file is open on Windows.
+                continue
+            size -= file_size
+
+
+pdf_cache = PDFCache()
@@ -1,17 +1,65 @@
 # -*- coding: utf-8 -*-
 
+from django.core.urlresolvers import reverse
+
 from openslides.utils.person.signals import receive_persons
 from openslides.utils.person.api import (
-    generate_person_id, get_person, Person, Persons)
+    generate_person_id, get_person, get_persons, Person, Persons)
 from openslides.utils.person.forms import PersonFormField, MultiplePersonFormField
 from openslides.utils.person.models import PersonField, PersonMixin
 
-__all__ = ['receive_persons', 'generate_person_id', 'get_person', 'Person',
+__all__ = ['receive_persons', 'generate_person_id', 'get_person', 'get_persons', 'Person',
            'Persons', 'PersonFormField', 'MultiplePersonFormField',
-           'PersonField', 'PersonMixin', 'EmptyPerson']
+           'PersonField', 'PersonMixin', 'EmptyPerson', 'PersonSummary']
 
 
 class EmptyPerson(PersonMixin, Person):
     @property
     def person_id(self):
         return 'empty'
+
+
+class PersonSummary(PersonMixin, Person):
+    """
+    Small person object with the data to show and sort a person.
+
+    It can be used instead of the full person objects in long lists of
+    persons. It is equal to all person objects with the same person_id.
+    """
+    __slots__ = ('person_prefix', 'pk', 'clean_name', 'name_suffix', 'sort_name', 'url_name')
+
+    def __init__(self, person_prefix, pk, clean_name, name_suffix='', sort_name=None, url_name=None):
+        self.person_prefix = person_prefix
+        self.pk = pk
+        self.clean_name = clean_name
+        self.name_suffix = name_suffix
+        self.sort_name = clean_name.lower() if sort_name is None else sort_name
+        self.url_name = url_name
+
+    def __unicode__(self):
+        if self.name_suffix:
+            return u'%s (%s)' % (self.clean_name, self.name_suffix)
+        return self.clean_name
+
+    def __str__(self):
+        return unicode(self).encode('utf-8')
+
+    def __repr__(self):
+        return '<PersonSummary: %s>' % self
+
+    def __eq__(self, other):
+        return self.person_id == getattr(other, 'person_id', None)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.person_id)
+
+    def get_absolute_url(self, link='detail'):
+        """
+        Returns the url to the detail view of the person, if url_name is set.
+        """
+        if link == 'detail' and self.url_name is not None:
+            return reverse(self.url_name, args=[str(self.pk)])
+        raise ValueError('This person object has no url.')
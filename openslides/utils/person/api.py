@@ -7,6 +7,8 @@ class Person(object):
     """
     Meta-class for all person objects
     """
+    __slots__ = ()
+
     def person_id(self):
         """
         Return an id for representation of ths person. Has to be unique.
@@ -65,9 +67,10 @@ class Persons(object):
     """
     A Storage for a multiplicity of different Person-Objects.
     """
-    def __init__(self, person_prefix_filter=None, id_filter=None):
+    def __init__(self, person_prefix_filter=None, id_filter=None, id_list_filter=None):
         self.person_prefix_filter = person_prefix_filter
         self.id_filter = id_filter
+        self.id_list_filter = id_list_filter
 
     def __iter__(self):
         try:
@@ -88,7 +91,8 @@ class Persons(object):
     def iter_persons(self):
         self._cache = list()
         for receiver, persons in receive_persons.send(
-                sender='persons', person_prefix_filter=self.person_prefix_filter, id_filter=self.id_filter):
+                sender='persons', person_prefix_filter=self.person_prefix_filter, id_filter=self.id_filter,
+                id_list_filter=self.id_list_filter):
             for person in persons:
                 self._cache.append(person)
                 yield person
@@ -116,3 +120,32 @@ def get_person(person_id):
         from openslides.utils.person import EmptyPerson
         return EmptyPerson()
     return Persons(person_prefix_filter=person_prefix, id_filter=id)[0]
+
+
+def get_persons(person_ids):
+    """
+    Returns a dictionary with the person objects of all person ids in
+    'person_ids' as values and the person ids as keys.
+
+    The persons are requested with one signal per person prefix. The
+    receivers get the list of ids as 'id_list_filter' and None as
+    'id_filter'. Receivers, which do not know the argument 'id_list_filter',
+    return all their persons, so the persons of the list are found as well.
+    Unknown or invalid person ids are mapped to an EmptyPerson.
+    """
+    from openslides.utils.person import EmptyPerson
+    person_ids = set(person_ids)
+    ids_by_prefix = {}
+    for person_id in person_ids:
+        try:
+            person_prefix, id = split_person_id(person_id)
+        except TypeError:
+            continue
+        ids_by_prefix.setdefault(person_prefix, []).append(id)
+    persons = {}
+    for person_prefix, ids in ids_by_prefix.items():
+        for person in Persons(person_prefix_filter=person_prefix, id_list_filter=ids):
+            if person.person_id in person_ids:
+                persons[person.person_id] = person
+    return dict((person_id, persons.get(person_id) or EmptyPerson())
+                for person_id in person_ids)
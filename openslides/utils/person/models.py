@@ -62,6 +62,8 @@ class PersonField(models.fields.Field):
 
 
 class PersonMixin(object):
+    __slots__ = ()
+
     @property
     def person_id(self):
         try:
@@ -2,4 +2,4 @@
 
 from django.dispatch import Signal
 
-receive_persons = Signal(providing_args=['person_prefix_filter', 'id_filter'])
+receive_persons = Signal(providing_args=['person_prefix_filter', 'id_filter', 'id_list_filter'])
@@ -40,6 +40,8 @@ MEDIA_ROOT = os.path.join(OPENSLIDES_USER_DATA_PATH, 'media', '')
 
 HAYSTACK_CONNECTIONS['default']['PATH'] = os.path.join(OPENSLIDES_USER_DATA_PATH, 'whoosh_index', '')
 
+PDF_CACHE_PATH = os.path.join(OPENSLIDES_USER_DATA_PATH, 'pdf_cache', '')
+
 TEMPLATE_DIRS = (
     os.path.join(OPENSLIDES_USER_DATA_PATH, 'templates'),
     filesystem2unicode(os.path.join(SITE_ROOT, 'templates')))
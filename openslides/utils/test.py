@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+from django.core.cache import cache
 from django.core.management import call_command
 from django.test import TestCase as _TestCase
 
@@ -10,7 +11,8 @@ from openslides.core.signals import post_database_setup
 class TestCase(_TestCase):
     """
     Overwrites Django's TestCase class to call the post_database_setup
-    signal after the preparation of every test. Also refreshs the config cache.
+    signal after the preparation of every test. Also refreshs the config cache
+    and clears the cache.
     """
     def _pre_setup(self, *args, **kwargs):
         return_value = super(TestCase, self)._pre_setup(*args, **kwargs)
@@ -25,6 +27,8 @@ class TestCase(_TestCase):
         except AttributeError:
             # The cache has only to be deleted if it exists.
             pass
+        # Clear the cache, because it is not rolled back with the database
+        cache.clear()
         # Clear the whoosh search index
         call_command('clear_index', interactive=False, verbosity=0)
         return return_value
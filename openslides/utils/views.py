@@ -1,26 +1,32 @@
 # -*- coding: utf-8 -*-
 
 import json
-from cStringIO import StringIO
+import os
+from tempfile import SpooledTemporaryFile
 
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.context_processors import csrf
 from django.core.exceptions import ImproperlyConfigured, PermissionDenied
+from django.core.servers.basehttp import FileWrapper
 from django.core.urlresolvers import reverse
-from django.http import (HttpResponse, HttpResponseRedirect)
+from django.http import (HttpResponse, HttpResponseRedirect,
+                         StreamingHttpResponse)
 from django.utils.decorators import method_decorator
-from django.utils.translation import ugettext as _
+from django.utils.translation import get_language, ugettext as _
 from django.utils.translation import ugettext_lazy
 from django.views import generic as django_views
 from django.views.generic.detail import SingleObjectMixin
 from reportlab.lib.units import cm
 from reportlab.platypus import SimpleDocTemplate, Spacer
 
+from openslides.config.api import config
+
 from .exceptions import OpenSlidesError
 from .forms import CSVImportForm
 from .pdf import firstPage, laterPages
+from .pdf_cache import get_key, get_stamp, pdf_cache
 from .signals import template_manipulation
 from .utils import html_strong
 
@@ -536,11 +542,22 @@ class DetailView(PermissionMixin, ExtraContextMixin, django_views.DetailView):
 class PDFView(PermissionMixin, View):
     """
     View to generate an PDF.
+
+    The PDF is written to a temporary file, which is kept in memory up to
+    spool_max_size bytes, and streamed to the client.
+
+    If pdf_cache_apps is a list of app labels, the PDF is saved in the PDF
+    cache (see settings.PDF_CACHE_PATH). It is built again, if data of one
+    of these apps, one of the config variables in pdf_cache_config_keys, the
+    url or the language change.
     """
 
     filename = _('undefined-filename')
     top_space = 3
     document_title = None
+    spool_max_size = 1024 * 1024
+    pdf_cache_apps = None
+    pdf_cache_config_keys = ('event_name', 'event_description', 'event_date', 'event_location')
 
     def get_top_space(self):
         return self.top_space
@@ -561,12 +578,24 @@ class PDFView(PermissionMixin, View):
         pdf_document.build(
             story, onFirstPage=firstPage, onLaterPages=laterPages)
 
-    def render_to_response(self, filename):
-        response = HttpResponse(mimetype='application/pdf')
-        filename = u'filename=%s.pdf;' % self.get_filename()
-        response['Content-Disposition'] = filename.encode('utf-8')
+    def get_pdf_cache_key(self):
+        """
+        Returns the key of the PDF in the PDF cache or None, if the PDF is
+        not cached.
+        """
+        if self.pdf_cache_apps is None or not pdf_cache.is_enabled():
+            return None
+        return get_key(
+            '%s.%s' % (type(self).__module__, type(self).__name__),
+            self.request.get_full_path(),
+            get_language(),
+            *([get_stamp(app_label) for app_label in sorted(self.pdf_cache_apps)] +
+              [repr(config[key]) for key in self.pdf_cache_config_keys]))
 
-        buffer = StringIO()
+    def write_pdf(self, buffer):
+        """
+        Builds the PDF into the file like object buffer.
+        """
         pdf_document = self.get_template(buffer)
         pdf_document.title = self.get_document_title()
         story = [Spacer(1, self.get_top_space() * cm)]
@@ -575,9 +604,20 @@ class PDFView(PermissionMixin, View):
 
         self.build_document(pdf_document, story)
 
-        pdf = buffer.getvalue()
-        buffer.close()
-        response.write(pdf)
+    def render_to_response(self, filename):
+        key = self.get_pdf_cache_key()
+        if key is None:
+            buffer = SpooledTemporaryFile(max_size=self.spool_max_size)
+            self.write_pdf(buffer)
+            size = buffer.tell()
+            buffer.seek(0)
+        else:
+            buffer = pdf_cache.get_or_build(key, self.write_pdf)
+            size = os.fstat(buffer.fileno()).st_size
+        response = StreamingHttpResponse(FileWrapper(buffer), content_type='application/pdf')
+        response['Content-Length'] = size
+        filename = u'filename=%s.pdf;' % self.get_filename()
+        response['Content-Disposition'] = filename.encode('utf-8')
         return response
 
     def get(self, request, *args, **kwargs):
@@ -45,6 +45,14 @@ class ListOfSpeakerModelTests(TestCase):
         self.assertEqual(speaker1_item2.weight, 1)
         self.assertEqual(speaker2_item1.weight, 2)
 
+    def test_append_speaker_after_speach(self):
+        speaker1_item1 = Speaker.objects.add(self.speaker1, self.item1)
+        speaker2_item1 = Speaker.objects.add(self.speaker2, self.item1)
+        speaker1_item1.begin_speach()
+        self.assertEqual(Speaker.objects.add(self.speaker1, self.item1).weight, 3)
+        speaker2_item1.begin_speach()
+        self.assertEqual(Speaker.objects.add(self.speaker2, self.item1).weight, 4)
+
     def test_open_close_list_of_speaker(self):
         self.assertFalse(Item.objects.get(pk=self.item1.pk).speaker_list_closed)
         self.item1.speaker_list_closed = True
@@ -227,6 +235,28 @@ class TestSpeakerEndSpeachView(SpeakerViewTestCase):
         self.assertIsNone(speaker.weight)
 
 
+class TestSpeakerChangeOrderView(SpeakerViewTestCase):
+    def test_post(self):
+        speaker1 = Speaker.objects.add(self.speaker1, self.item1)
+        speaker2 = Speaker.objects.add(self.speaker2, self.item1)
+        response = self.admin_client.post(
+            '/agenda/1/speaker/change_order/',
+            {'sort_order': 'speaker_%d,speaker_%d' % (speaker2.pk, speaker1.pk)})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            list(Speaker.objects.filter(item=self.item1).order_by('weight').values_list('pk', flat=True)),
+            [speaker2.pk, speaker1.pk])
+
+    def test_post_invalid_data(self):
+        speaker1 = Speaker.objects.add(self.speaker1, self.item1)
+        speaker2 = Speaker.objects.add(self.speaker2, self.item2)
+        response = self.admin_client.post(
+            '/agenda/1/speaker/change_order/',
+            {'sort_order': 'speaker_%d,speaker_%d' % (speaker2.pk, speaker1.pk)})
+        self.assertMessage(response, 'Could not change order. Invalid data.')
+        self.assertEqual(Speaker.objects.get(pk=speaker1.pk).weight, 1)
+
+
 class SpeakerListOpenView(SpeakerViewTestCase):
     def test_get(self):
         self.check_url('/agenda/1/speaker/close/', self.admin_client, 302)
@@ -1,15 +1,25 @@
 # -*- coding: utf-8 -*-
 
+import shutil
+import tempfile
+from datetime import datetime
+
 from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test.client import Client
+from django.test.utils import CaptureQueriesContext, override_settings
 from mock import patch
 
+from openslides.agenda import views
 from openslides.agenda.models import Item
+from openslides.config.api import config
 from openslides.agenda.slides import agenda_slide
 from openslides.participant.models import User
 from openslides.projector.api import set_active_slide
+from openslides.utils.exceptions import OpenSlidesError
 from openslides.utils.test import TestCase
 
 from .models import BadRelatedItem, RelatedItem
@@ -66,6 +76,113 @@ class ItemTest(TestCase):
         new_item2.delete(with_children=True)
         self.assertFalse(new_item3 in Item.objects.all())
 
+    def assertTreeUnchangedByRebuild(self):
+        """
+        Checks that a rebuild of the tree does not change the tree fields.
+        Gaps between the tree ids are ignored.
+        """
+        def get_tree_fields():
+            rows = Item.objects.values_list('pk', 'parent', 'lft', 'rght', 'level', 'tree_id').order_by('pk')
+            tree_ids = sorted(set(row[-1] for row in rows))
+            return [row[:-1] + (tree_ids.index(row[-1]),) for row in rows]
+
+        tree_fields = get_tree_fields()
+        Item.objects.rebuild()
+        self.assertEqual(get_tree_fields(), tree_fields)
+
+    def test_delete_item_promotes_children(self):
+        parent = Item.objects.create(title='parent', weight=10)
+        item = Item.objects.create(title='item', parent=parent, weight=1)
+        child1 = Item.objects.create(title='child1', parent=item, weight=2)
+        child2 = Item.objects.create(title='child2', parent=item, weight=3)
+        Item.objects.create(title='grandchild', parent=child2)
+        Item.objects.create(title='sibling', parent=parent, weight=4)
+        item.delete()
+        self.assertEqual(
+            [child.title for child in Item.objects.get(pk=parent.pk).get_children()],
+            ['child1', 'child2', 'sibling'])
+        self.assertEqual(Item.objects.get(pk=child1.pk).level, 1)
+        self.assertTreeUnchangedByRebuild()
+
+    def test_delete_root_item_promotes_children(self):
+        item = Item.objects.create(title='item', weight=10)
+        Item.objects.create(title='child1', parent=item, weight=11)
+        child2 = Item.objects.create(title='child2', parent=item, weight=12)
+        Item.objects.create(title='grandchild', parent=child2)
+        Item.objects.create(title='last root', weight=13)
+        item.delete()
+        self.assertEqual(
+            [root.title for root in Item.objects.root_nodes()],
+            ['item1', 'item2', 'item5', 'child1', 'child2', 'last root'])
+        self.assertTreeUnchangedByRebuild()
+
+    def test_delete_item_with_children_closes_gap(self):
+        self.item3.delete(with_children=True)
+        self.assertFalse(Item.objects.filter(pk__in=[self.item3.pk, self.item4.pk]).exists())
+        self.assertTreeUnchangedByRebuild()
+
+    def test_set_tree(self):
+        Item.objects.set_tree({
+            self.item1.pk: (self.item2.pk, 2),
+            self.item3.pk: (0, 1),
+            self.item4.pk: (self.item2.pk, 1)})
+        item2 = Item.objects.get(pk=self.item2.pk)
+        self.assertEqual(
+            [item.pk for item in item2.get_children()],
+            [self.item4.pk, self.item1.pk])
+        self.assertIsNone(Item.objects.get(pk=self.item3.pk).parent)
+        tree_fields = list(Item.objects.values_list('pk', 'lft', 'rght', 'level', 'tree_id').order_by('pk'))
+        Item.objects.rebuild()
+        self.assertEqual(
+            list(Item.objects.values_list('pk', 'lft', 'rght', 'level', 'tree_id').order_by('pk')),
+            tree_fields)
+
+    def test_set_tree_with_circle(self):
+        self.assertRaises(
+            OpenSlidesError,
+            Item.objects.set_tree,
+            {self.item1.pk: (self.item4.pk, 0)})
+        self.assertIsNone(Item.objects.get(pk=self.item1.pk).parent)
+
+    def test_set_tree_query_count(self):
+        tree = dict((item.pk, (0, item.pk)) for item in Item.objects.all())
+        with self.assertNumQueries(2):
+            Item.objects.set_tree(tree)
+
+    def test_schedule(self):
+        Item.objects.filter(pk=self.item1.pk).update(duration='1:30')
+        Item.objects.filter(pk=self.item4.pk).update(duration='45')
+        Item.objects.filter(pk=self.item2.pk).update(duration='10')
+        config['agenda_start_event_date_time'] = '01.06.2014 09:00'
+        schedule = Item.objects.get_schedule()
+        self.assertEqual(schedule.durations, {
+            self.item1.pk: '1:30', self.item4.pk: '0:45', self.item2.pk: '0:10'})
+        self.assertEqual(schedule.end_times, {
+            self.item1.pk: datetime(2014, 6, 1, 10, 30),
+            self.item4.pk: datetime(2014, 6, 1, 11, 15),
+            self.item2.pk: datetime(2014, 6, 1, 11, 25)})
+        self.assertEqual(schedule.start, datetime(2014, 6, 1, 9, 0))
+        self.assertEqual(schedule.end, datetime(2014, 6, 1, 11, 25))
+        self.assertEqual(schedule.duration, '2:25')
+
+    def test_schedule_is_cached(self):
+        self.assertEqual(Item.objects.get_schedule().duration, '0:00')
+        with self.assertNumQueries(0):
+            Item.objects.get_schedule()
+
+        # Changes of items and of the start of the event reset the schedule.
+        self.item1.duration = '20'
+        self.item1.save()
+        self.assertEqual(Item.objects.get_schedule().duration, '0:20')
+        Item.objects.set_tree({self.item1.pk: (self.item2.pk, 0)})
+        self.assertIsNone(cache.get(Item.objects.schedule_cache_key))
+        config['agenda_start_event_date_time'] = '01.06.2014 09:00'
+        self.assertEqual(
+            Item.objects.get_schedule().end_times,
+            {self.item1.pk: datetime(2014, 6, 1, 9, 20)})
+        self.item1.delete()
+        self.assertEqual(Item.objects.get_schedule().duration, '0:00')
+
     def test_absolute_url(self):
         self.assertEqual(self.item1.get_absolute_url(), '/agenda/1/')
         self.assertEqual(self.item1.get_absolute_url('update'), '/agenda/1/edit/')
@@ -152,6 +269,45 @@ class ViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.context['items']), len(Item.objects.all()))
 
+    def test_overview_related_items_query_count(self):
+        """
+        The related objects of all items are loaded with one query per
+        content type.
+        """
+        def count_queries(url):
+            client = self.adminClient
+            with CaptureQueriesContext(connection) as context:
+                client.get(url)
+            return len(context)
+
+        for number in range(2):
+            Item.objects.create(content_object=RelatedItem.objects.create(name='related%d' % number))
+        query_counts = (count_queries('/agenda/'), count_queries('/agenda/print/'))
+        for number in range(2, 6):
+            Item.objects.create(content_object=RelatedItem.objects.create(name='related%d' % number))
+        self.assertEqual((count_queries('/agenda/'), count_queries('/agenda/print/')), query_counts)
+
+    def test_print_after_set_tree(self):
+        """
+        The cached agenda PDF is built again after the items are reordered.
+        """
+        path = tempfile.mkdtemp()
+        try:
+            # The PDF cache needs a cache backend for all processes.
+            caches = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': path}}
+            with override_settings(PDF_CACHE_PATH=path, CACHES=caches):
+                with patch('openslides.agenda.views.Paragraph', wraps=views.Paragraph) as mock_paragraph:
+                    client = self.adminClient
+                    self.assertEqual(client.get('/agenda/print/').status_code, 200)
+                    self.assertEqual(client.get('/agenda/print/').status_code, 200)
+                    self.assertEqual(mock_paragraph.call_count, 2)
+                    Item.objects.set_tree({self.item2.pk: (self.item1.pk, 0)})
+                    self.assertEqual(client.get('/agenda/print/').status_code, 200)
+                    self.assertEqual(mock_paragraph.call_count, 4)
+                    self.assertIn('&nbsp;', mock_paragraph.call_args[0][0])
+        finally:
+            shutil.rmtree(path)
+
     def testClose(self):
         c = self.adminClient
 
@@ -229,6 +385,19 @@ class ViewTest(TestCase):
         self.assertIsNone(Item.objects.get(pk=1).parent)
         self.assertEqual(Item.objects.get(pk=2).parent_id, 1)
 
+    def test_change_item_order_invalid(self):
+        data = {
+            'i1-self': 1,
+            'i1-weight': 50,
+            'i1-parent': 2,
+            'i2-self': 2,
+            'i2-weight': 50,
+            'i2-parent': 1}
+        response = self.adminClient.post('/agenda/', data)
+        self.assertContains(response, 'Errors when reordering of the agenda')
+        self.assertIsNone(Item.objects.get(pk=1).parent)
+        self.assertIsNone(Item.objects.get(pk=2).parent)
+
     def test_delete(self):
         response = self.adminClient.get('/agenda/%s/del/' % self.item1.pk)
         self.assertRedirects(response, '/agenda/')
@@ -3,7 +3,7 @@
 from django.test.client import Client
 
 from openslides.agenda.models import Item, Speaker
-from openslides.assignment.models import Assignment
+from openslides.assignment.models import Assignment, AssignmentPoll
 from openslides.participant.models import User
 from openslides.utils.test import TestCase
 
@@ -39,3 +39,79 @@ class AssignmentModelTest(TestCase):
         self.assertTrue(item.speaker_set.filter(person=person_1).exists())
         self.assertTrue(item.speaker_set.filter(person=person_2).exists())
         self.assertTrue(item.speaker_set.filter(person=person_3).exists())
+
+    def test_candidates(self):
+        assignment = Assignment.objects.create(name='test_assignment_ch7dfs6dh4ghd8sgfd', posts=2)
+        person = User.objects.create(username='user_ndfh7shdgd6g4hfjsd', last_name='A')
+        assignment.run(person, person)
+        self.assertIn(person, assignment.candidates)
+        self.assertEqual(assignment.get_participants(), [person])
+        self.assertEqual([unicode(candidate) for candidate in assignment.get_participants()], ['A'])
+
+    def test_gen_poll_queries(self):
+        assignment = Assignment.objects.create(name='test_assignment_hd7d6shf4hdk8s7dhf3k', posts=1)
+        item = Item.objects.create(content_object=assignment)
+        persons = [User.objects.create(username='user_%d_md8s7dh3hd6fjs8dhf7d' % number)
+                   for number in range(5)]
+        for person in persons:
+            assignment.run(person, person)
+        Speaker.objects.add(persons[0], item)
+        # Lock, ballot number, mode (2), poll, candidates, persons, options,
+        # items, lock, last weight, waiting speakers, speakers and active slide
+        with self.assertNumQueries(14):
+            poll = assignment.gen_poll()
+        self.assertEqual([option.candidate for option in poll.get_options()], persons)
+        self.assertEqual(list(item.speaker_set.order_by('weight').values_list('weight', flat=True)),
+                         [1, 2, 3, 4, 5])
+
+    def test_vote_results(self):
+        assignment = Assignment.objects.create(name='test_assignment_vhd7s6dhf8s7ddfsjhg2', posts=1)
+        person_1 = User.objects.create(username='user_1_hd8d7fhs6dg6dshdfhd7', last_name='A')
+        person_2 = User.objects.create(username='user_2_jd7fhs9dhe7dhsdcb3hd', last_name='B')
+        assignment.run(person_1, person_1)
+        assignment.run(person_2, person_2)
+        poll = assignment.gen_poll()
+        option = poll.get_options().get(candidate=person_1)
+        poll.set_vote_objects_with_values(option, {'Votes': 7})
+        assignment.run(User.objects.create(username='user_3_kdf7ehd6sg4fhfjdh3', last_name='C'), self.admin)
+        assignment.gen_poll()
+
+        person_3 = User.objects.get(username='user_3_kdf7ehd6sg4fhfjdh3')
+        assignment.set_elected(person_1)
+        # Polls, options with votes, elected candidates and persons
+        with self.assertNumQueries(4):
+            results = assignment.vote_results(only_published=False)
+        self.assertEqual([row.candidate for row in results.rows], [person_1, person_2, person_3])
+        self.assertEqual([row.elected for row in results.rows], [True, False, False])
+        self.assertEqual(results.rows[0].votes, [{'Votes': u'7'}, {}])
+        self.assertEqual(results.rows[1].votes, [{}, {}])
+        self.assertEqual(results.rows[2].votes, [None, {}])
+        self.assertEqual(results.columns, [(results.polls[0], True), (results.polls[1], False)])
+
+    def test_ballot_number(self):
+        assignment = Assignment.objects.create(name='test_assignment_mdh4sd7fh3k8dhs6dhd9', posts=1)
+        for number in range(3):
+            assignment.gen_poll()
+        with self.assertNumQueries(1):
+            self.assertEqual([unicode(poll) for poll in assignment.poll_set.all()],
+                             ['Ballot 1', 'Ballot 2', 'Ballot 3'])
+        assignment.poll_set.get(ballot_number=2).delete()
+        self.assertEqual([poll.get_ballot() for poll in assignment.poll_set.all()], [1, 2])
+        self.assertEqual(assignment.gen_poll().get_ballot(), 3)
+        # Polls deleted with a queryset are renumbered too.
+        assignment.gen_poll()
+        assignment.poll_set.filter(ballot_number__in=[1, 3]).delete()
+        self.assertEqual([poll.get_ballot() for poll in assignment.poll_set.order_by('pk')], [1, 2])
+
+    def test_vote_values(self):
+        assignment = Assignment.objects.create(name='test_assignment_ks8d7fh3hd6shdj4hd8s', posts=1)
+        poll = assignment.gen_poll()
+        self.assertTrue(poll.yesnoabstain)
+        with self.assertNumQueries(0):
+            self.assertEqual(poll.get_vote_values(), ['Yes', 'No', 'Abstain'])
+
+        # A poll without the mode is not saved on reading.
+        AssignmentPoll.objects.filter(pk=poll.pk).update(yesnoabstain=None)
+        poll = AssignmentPoll.objects.get(pk=poll.pk)
+        self.assertEqual(poll.get_vote_values(), ['Yes', 'No', 'Abstain'])
+        self.assertIsNone(AssignmentPoll.objects.get(pk=poll.pk).yesnoabstain)
@@ -4,6 +4,7 @@ from django.test.client import Client
 
 from openslides.assignment.models import Assignment
 from openslides.participant.models import Group, User
+from openslides.projector.api import get_projector_content
 from openslides.utils.test import TestCase
 
 
@@ -81,3 +82,46 @@ class TestAssignmentDetailView(AssignmentViewTestCase):
         response = self.staff_client.get('/assignment/1/')
         self.assertContains(response, 'No candidates available.')
         self.assertContains(response, 'Blocked Candidates')
+
+
+class TestAssignmentResults(AssignmentViewTestCase):
+    def setUp(self):
+        super(TestAssignmentResults, self).setUp()
+        self.assignment1.description = 'description'
+        self.assignment1.save()
+        self.assignment1.run(self.delegate, self.admin)
+        poll = self.assignment1.gen_poll()
+        poll.yesnoabstain = True
+        poll.published = True
+        poll.save()
+        poll.set_vote_objects_with_values(poll.get_options().get(), {'Yes': 12, 'No': 3, 'Abstain': 1})
+
+    def test_detail_view(self):
+        response = self.admin_client.get('/assignment/1/')
+        self.assertContains(response, 'delegate')
+        self.assertContains(response, '12')
+
+    def test_slide(self):
+        content = get_projector_content({'callback': 'assignment', 'pk': 1})
+        self.assertIn('delegate', content)
+        self.assertIn('12', content)
+
+    def test_slide_query_count(self):
+        """
+        The candidates are loaded once as person summaries for the whole
+        slide.
+        """
+        for number in range(3):
+            self.assignment1.run(User.objects.create(username='candidate%d' % number), self.admin)
+        with self.assertNumQueries(7):
+            content = get_projector_content({'callback': 'assignment', 'pk': 1})
+        self.assertIn('candidate2', content)
+
+    def test_elected(self):
+        self.assignment1.set_elected(self.delegate)
+        response = self.admin_client.get('/assignment/1/')
+        self.assertContains(response, '<b>elected</b>')
+        self.assertEqual(response.context['candidates'], [])
+
+    def test_pdf(self):
+        self.check_url('/assignment/1/print/', self.admin_client, 200)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+from django.test.client import Client
+from mock import patch
+
+from openslides.motion.diff import VersionDiffCache, version_diff_cache
+from openslides.motion.models import Motion
+from openslides.utils.test import TestCase
+
+
+class VersionDiffCacheTest(TestCase):
+    def setUp(self):
+        self.motion = Motion.objects.create(title='title', text='text 1', reason='reason')
+        self.motion.text = 'text 2'
+        self.motion.save(use_version=self.motion.get_new_version())
+        self.version1, self.version2 = self.motion.versions.order_by('version_number')
+
+    def test_get_diffs(self):
+        cache = VersionDiffCache()
+        diff_text, diff_reason = cache.get_diffs(self.version1, self.version2)
+        self.assertIn('text', diff_text)
+        self.assertIsNone(diff_reason)
+        with patch('openslides.motion.diff.htmldiff') as mock_htmldiff:
+            self.assertEqual(cache.get_diffs(self.version1, self.version2), (diff_text, None))
+        self.assertFalse(mock_htmldiff.called)
+
+    def test_changed_version(self):
+        cache = VersionDiffCache()
+        diff_text = cache.get_diffs(self.version1, self.version2)[0]
+        self.version2.text = 'text 3'
+        self.version2.save()
+        self.assertNotEqual(cache.get_diffs(self.version1, self.version2)[0], diff_text)
+
+    def test_least_recently_used(self):
+        cache = VersionDiffCache(max_entries=2)
+        cache.get_diffs(self.version1, self.version2)
+        cache.get_diffs(self.version2, self.version1)
+        cache.get_diffs(self.version1, self.version2)
+        cache.get_diffs(self.version1, self.version1)
+        self.assertEqual(
+            cache.entries.keys(),
+            [cache.get_key(self.version1, self.version2), cache.get_key(self.version1, self.version1)])
+
+    def test_diff_view(self):
+        version_diff_cache.clear()
+        client = Client()
+        client.login(username='admin', password='admin')
+        response = client.get('/motion/%d/diff/?rev1=1&rev2=2' % self.motion.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(version_diff_cache.entries), 1)
@@ -1,8 +1,14 @@
 # -*- coding: utf-8 -*-
 
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test.utils import override_settings
+
 from openslides.config.api import config
 from openslides.motion.exceptions import WorkflowError
-from openslides.motion.models import Motion, State, Workflow
+from openslides.motion.delta import apply_delta, make_delta
+from openslides.motion.models import (Category, IdentifierCounter, Motion,
+                                      MotionVersion, State, Workflow)
 from openslides.participant.models import User
 from openslides.utils.test import TestCase
 
@@ -76,6 +82,31 @@ class ModelTest(TestCase):
         poll = self.motion.create_poll()
         self.assertEqual(poll.poll_number, 1)
 
+    def test_vote_table(self):
+        self.motion.state = State.objects.get(pk=1)
+        for number in range(3):
+            poll = self.motion.create_poll()
+        poll.set_vote_objects_with_values(poll.get_options().get(), {'Yes': 10, 'No': 5, 'Abstain': 1})
+        with self.assertNumQueries(3):
+            polls = self.motion.get_polls()
+            self.assertEqual([item.has_votes() for item in polls], [False, False, True])
+            option = polls[2].get_vote_table()[0]
+            self.assertEqual((option['Yes'].weight, option['No'].weight, option['Abstain'].weight), (10, 5, 1))
+            self.assertEqual(polls[0].get_vote_table()[0]['Yes'], None)
+            self.assertEqual([vote.weight for vote in polls[2].get_vote_objects_with_values(option.pk)],
+                             [10, 5, 1])
+
+    def test_set_votes(self):
+        self.motion.state = State.objects.get(pk=1)
+        poll = self.motion.create_poll()
+        option = poll.get_options().get()
+        poll.set_vote_objects_with_values(option, {'Yes': 10, 'No': 5, 'Abstain': 1})
+        # Load the votes and update the two votes with the weight 5.
+        with self.assertNumQueries(2):
+            poll.set_votes([(option, {'Yes': 5, 'No': 5, 'Abstain': 1})])
+        self.assertEqual(dict(poll.get_votes().values_list('value', 'weight')),
+                         {'Yes': 5, 'No': 5, 'Abstain': 1})
+
     def test_state(self):
         self.motion.reset_state()
         self.assertEqual(self.motion.state.name, 'submitted')
@@ -116,6 +147,45 @@ class ModelTest(TestCase):
         Motion.objects.create(title='foo', text='bar', identifier='')
         Motion.objects.create(title='foo2', text='bar2', identifier='')
 
+    def test_identifier_per_category(self):
+        category = Category.objects.create(name='category', prefix='C')
+        Motion.objects.create(title='manual', identifier='C 2')
+        motion1 = Motion.objects.create(title='motion1', category=category)
+        motion2 = Motion.objects.create(title='motion2', category=category)
+        motion3 = Motion.objects.create(title='motion3')
+        self.assertEqual(motion1.identifier, 'C 1')
+        # The identifier 'C 2' is already used.
+        self.assertEqual(motion2.identifier, 'C 3')
+        self.assertEqual(motion2.identifier_number, 3)
+        self.assertEqual(motion3.identifier, '%d' % (self.motion.identifier_number + 1))
+
+        # A new counter of a deleted category does not use the old numbers.
+        category.delete()
+        category = Category.objects.create(name='category', prefix='C')
+        self.assertEqual(Motion.objects.create(title='motion4', category=category).identifier, 'C 1')
+
+    def test_identifier_serially_numbered(self):
+        config['motion_identifier'] = 'serially_numbered'
+        category = Category.objects.create(name='category', prefix='C')
+        motion1 = Motion.objects.create(title='motion1', category=category)
+        motion2 = Motion.objects.create(title='motion2')
+        self.assertEqual(motion1.identifier_number + 1, motion2.identifier_number)
+        self.assertEqual(motion1.identifier, 'C %d' % motion1.identifier_number)
+        self.assertEqual(motion2.identifier, '%d' % motion2.identifier_number)
+
+    def test_set_state_of_many_motions(self):
+        state = State.objects.create(name='S1', workflow=self.workflow, dont_set_identifier=True)
+        motions = [Motion.objects.create(title='motion%d' % number, state=state) for number in range(5)]
+        self.assertFalse(any(motion.identifier for motion in motions))
+        first_state = self.workflow.first_state
+        # Two queries for the counter, one to check the new identifiers
+        with self.assertNumQueries(3):
+            Motion.objects.set_state(motions, first_state)
+        last_number = IdentifierCounter.objects.get(key='no_category').number
+        self.assertEqual(
+            [motion.identifier for motion in motions],
+            [str(number) for number in range(last_number - 4, last_number + 1)])
+
     def test_do_not_create_new_version_when_permit_old_version(self):
         motion = Motion()
         motion.title = 'foo'
@@ -137,6 +207,53 @@ class ModelTest(TestCase):
         motion.save(use_version=False)
         self.assertEqual(motion.versions.count(), 2)
 
+    def test_counters(self):
+        motion = Motion.objects.create(title='Title eeN0aev3', text='Text')
+        motion.state = State.objects.get(pk=1)
+        motion.save(use_version=motion.get_new_version(title='New title eeN0aev3'))
+        motion.support(self.test_user)
+        poll = motion.create_poll()
+        counters = (2, 1, 1)
+        self.assertEqual((motion.version_count, motion.supporter_count, motion.poll_count), counters)
+        motion = Motion.objects.get(pk=motion.pk)
+        self.assertEqual((motion.version_count, motion.supporter_count, motion.poll_count), counters)
+
+        # Saving an old motion object does not overwrite the counters.
+        old_motion = Motion.objects.get(pk=motion.pk)
+        motion.unsupport(self.test_user)
+        poll.delete()
+        old_motion.save()
+        motion = Motion.objects.get(pk=motion.pk)
+        self.assertEqual((motion.version_count, motion.supporter_count, motion.poll_count), (2, 0, 0))
+
+    def test_update_counters(self):
+        Motion.objects.filter(pk=self.motion.pk).update(version_count=5, poll_count=3)
+        self.assertEqual(Motion.objects.update_counters(), 1)
+        self.assertEqual(Motion.objects.update_counters(), 0)
+        motion = Motion.objects.get(pk=self.motion.pk)
+        self.assertEqual((motion.version_count, motion.supporter_count, motion.poll_count), (1, 0, 0))
+
+    def test_allowed_actions_of_many_motions(self):
+        for number in range(5):
+            Motion.objects.create(title='Motion %d' % number, text='Text')
+        motions = list(Motion.objects.select_related('state'))
+        user = User.objects.get(pk=self.test_user.pk)
+        motions[0].add_submitter(user)
+        # Permissions of the user and of the groups, submitted and supported motions.
+        with self.assertNumQueries(4):
+            allowed_actions = [motion.get_allowed_actions(user) for motion in motions]
+        self.assertTrue(allowed_actions[0]['update'])
+        self.assertFalse(allowed_actions[1]['update'])
+
+    def test_allowed_actions_for_anonymous(self):
+        config['system_enable_anonymous'] = True
+        motions = list(Motion.objects.select_related('state'))
+        user = AnonymousUser()
+        with self.assertNumQueries(3):
+            for number in range(2):
+                allowed_actions = [motion.get_allowed_actions(user) for motion in motions]
+        self.assertFalse(allowed_actions[0]['update'])
+
     def test_unicode_with_no_active_version(self):
         motion = Motion.objects.create(title='foo', text='bar', identifier='')
         motion.active_version = None
@@ -147,3 +264,99 @@ class ModelTest(TestCase):
 class ConfigTest(TestCase):
     def test_stop_submitting(self):
         self.assertFalse(config['motion_stop_submitting'])
+
+
+class WorkflowGraphTest(TestCase):
+    def test_get_graph(self):
+        with self.assertNumQueries(3):
+            graph = Workflow.objects.get_graph()
+        with self.assertNumQueries(0):
+            self.assertEqual(Workflow.objects.get_graph().first_states[1].name, 'submitted')
+            self.assertEqual(
+                [state.name for state in graph.states[graph.first_states[1].pk].get_next_states()],
+                ['accepted', 'rejected', 'not decided'])
+            self.assertEqual(graph.first_states[1].workflow.name, 'Simple Workflow')
+
+    def test_reset_graph(self):
+        workflow = Workflow.objects.create(name='Workflow ohk5Jo')
+        state_1 = State.objects.create(name='State 1 ohk5Jo', workflow=workflow)
+        state_2 = State.objects.create(name='State 2 ohk5Jo', workflow=workflow)
+        self.assertEqual(Workflow.objects.get_graph().first_states[workflow.pk], state_1)
+        self.assertEqual(state_1.get_next_states(), [])
+        state_1.next_states.add(state_2)
+        self.assertEqual(state_1.get_next_states(), [state_2])
+        workflow.first_state = state_2
+        workflow.save()
+        self.assertEqual(Workflow.objects.get_graph().first_states[workflow.pk], state_2)
+
+    def test_reset_state(self):
+        motion = Motion.objects.create(title='Title ohk5Jo')
+        Workflow.objects.get_graph()
+        with self.assertNumQueries(0):
+            motion.reset_state(2)
+        self.assertEqual(motion.state.name, 'published')
+
+
+@override_settings(MOTION_VERSION_SNAPSHOT_INTERVAL=3)
+class VersionDeltaTest(TestCase):
+    def setUp(self):
+        self.motion = Motion.objects.create(title='title', text=self.get_text(0), reason='reason')
+        for number in range(1, 5):
+            self.motion.text = self.get_text(number)
+            self.motion.save(use_version=self.motion.get_new_version())
+
+    def get_text(self, number):
+        paragraphs = ['<p>Paragraph %d with some text.</p>\n' % index for index in range(20)]
+        paragraphs[number] = u'<p>Changed paragraph \xfc %d.</p>\n' % number
+        return ''.join(paragraphs)
+
+    def get_versions(self):
+        cache.clear()
+        return list(MotionVersion.objects.filter(motion=self.motion).order_by('version_number'))
+
+    def test_delta(self):
+        old = self.get_text(0)
+        new = self.get_text(1) + '<p>End'
+        self.assertEqual(apply_delta(old, make_delta(old, new)), new)
+        self.assertEqual(apply_delta(old, make_delta(old, '')), '')
+        self.assertEqual(make_delta(old, None), None)
+
+    def test_snapshots(self):
+        versions = self.get_versions()
+        self.assertEqual([version.delta_base_id for version in versions],
+                         [None, versions[0].pk, versions[1].pk, None, versions[3].pk])
+        self.assertEqual(versions[1].stored_text, '')
+        for number, version in enumerate(versions):
+            self.assertEqual(version.text, self.get_text(number))
+            self.assertEqual(version.reason, 'reason')
+        self.assertEqual(Motion.objects.get(pk=self.motion.pk).get_active_version().text, self.get_text(4))
+
+    def test_change_base_version(self):
+        version = self.get_versions()[1]
+        version.text = 'new text'
+        version.save()
+        versions = self.get_versions()
+        self.assertEqual(versions[1].text, 'new text')
+        self.assertEqual(versions[2].delta_base_id, None)
+        self.assertEqual(versions[2].text, self.get_text(2))
+
+    def test_delete_base_version(self):
+        self.get_versions()[1].delete()
+        versions = self.get_versions()
+        self.assertEqual(versions[1].delta_base_id, None)
+        self.assertEqual([version.text for version in versions],
+                         [self.get_text(number) for number in (0, 2, 3, 4)])
+
+    def test_bulk_create(self):
+        MotionVersion.objects.bulk_create([MotionVersion(
+            motion=self.motion, version_number=6, title='title', text='text 6', reason='reason 6')])
+        version = self.get_versions()[5]
+        self.assertEqual((version.delta_base_id, version.text, version.reason), (None, 'text 6', 'reason 6'))
+
+    def test_encode_versions(self):
+        with self.settings(MOTION_VERSION_SNAPSHOT_INTERVAL=None):
+            self.assertEqual(MotionVersion.objects.encode_versions(), 3)
+        self.assertEqual([version.delta_base_id for version in self.get_versions()], [None] * 5)
+        self.assertEqual(MotionVersion.objects.encode_versions(), 3)
+        self.assertEqual([version.text for version in self.get_versions()],
+                         [self.get_text(number) for number in range(5)])
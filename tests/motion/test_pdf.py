@@ -1,5 +1,13 @@
 # -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+
 from django.test.client import Client
+from django.test.utils import override_settings
+from mock import patch
+from openslides.config.api import config
+from openslides.motion import pdf
 from openslides.motion.models import Motion
 from openslides.participant.models import User
 from openslides.utils.test import TestCase
@@ -24,3 +32,79 @@ class MotionPDFTest(TestCase):
                  '<li>Element 2 rel0liiGh0bi3ree6Jei</li></ul>')
         response = self.admin_client.get('/motion/1/pdf/')
         self.assertEqual(response.status_code, 200)
+
+    def test_all_motions(self):
+        for number in range(3):
+            Motion.objects.create(title='Motion %d' % number, text='<p>Text</p><p>Text</p>',
+                                  reason='<p>Reason</p>')
+        response = self.admin_client.get('/motion/pdf/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        content = ''.join(response.streaming_content)
+        self.assertTrue(content.startswith('%PDF'))
+        self.assertEqual(int(response['Content-Length']), len(content))
+
+    def test_all_motions_in_worker_processes(self):
+        for number in range(3):
+            Motion.objects.create(title='Motion %d' % number, text='<p>Text %d</p><p>Text</p>' % number,
+                                  reason='<p>Reason</p>')
+        serial_story = []
+        pdf.motions_to_pdf(serial_story, processes=1)
+        pdf.paragraph_cache.clear()
+        parallel_story = []
+        with patch('openslides.motion.pdf.PARALLEL_MIN_TEXTS', 2):
+            pdf.motions_to_pdf(parallel_story, processes=2)
+        self.assertEqual([type(flowable) for flowable in serial_story],
+                         [type(flowable) for flowable in parallel_story])
+
+    def test_paragraph_cache(self):
+        motion = Motion.objects.create(title='Title ieLae0ohqu1f', text='<p>Text ieLae0ohqu1f</p>')
+        pdf.paragraph_cache.clear()
+        with patch('openslides.motion.pdf.parse_html', wraps=pdf.parse_html) as mock_parse_html:
+            for number in range(2):
+                story = []
+                pdf.motion_to_pdf(story, motion)
+            self.assertEqual(mock_parse_html.call_count, 1)
+            config['motion_pdf_paragraph_numbering'] = True
+            pdf.motion_to_pdf(story, motion)
+            self.assertEqual(mock_parse_html.call_count, 2)
+
+    def test_paragraph_cache_least_recently_used(self):
+        cache = pdf.ParagraphCache(max_entries=3)
+        for number in (1, 2, 1):
+            cache.get_paragraphs(['<p>Text %d</p>' % number], False)
+        self.assertEqual(len(cache.entries), 2)
+        for number in (3, 4):
+            cache.get_paragraphs(['<p>Text %d</p>' % number], False)
+        self.assertEqual(
+            cache.entries.keys(),
+            [cache.get_key('<p>Text %d</p>' % number, False) for number in (1, 3, 4)])
+
+    def test_parse_html(self):
+        self.assertEqual(
+            pdf.parse_html('<p>Text 1</p>\n<h2>Title</h2>\n<p>Text 2</p>', True),
+            [(u'<p>Text 1</p>', 'InnerParagraph', '1'),
+             (u'<h2>Title</h2>', 'InnerH2Paragraph', None),
+             (u'<p>Text 2</p>', 'InnerParagraph', '2')])
+
+    def test_pdf_cache(self):
+        motion = Motion.objects.create(title='Title ahR4eixoo5ih', text='Text')
+        path = tempfile.mkdtemp()
+        try:
+            # The PDF cache needs a cache backend for all processes.
+            caches = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': path}}
+            with override_settings(PDF_CACHE_PATH=path, CACHES=caches):
+                with patch('openslides.motion.views.motion_to_pdf') as mock_motion_to_pdf:
+                    self.assertEqual(self.admin_client.get('/motion/1/pdf/').status_code, 200)
+                    self.assertEqual(self.admin_client.get('/motion/1/pdf/').status_code, 200)
+                    self.assertEqual(mock_motion_to_pdf.call_count, 1)
+                    motion.title = 'New title ahR4eixoo5ih'
+                    motion.save()
+                    self.assertEqual(self.admin_client.get('/motion/1/pdf/').status_code, 200)
+                    self.assertEqual(mock_motion_to_pdf.call_count, 2)
+                    config['motion_pdf_paragraph_numbering'] = True
+                    self.assertEqual(self.admin_client.get('/motion/1/pdf/').status_code, 200)
+                    self.assertEqual(mock_motion_to_pdf.call_count, 3)
+            self.assertEqual(len(os.listdir(path)), 3)
+        finally:
+            shutil.rmtree(path)
@@ -4,11 +4,14 @@ import os
 import tempfile
 
 from django.conf import settings
+from django.db import connection
 from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
 
 from openslides.config.api import config
 from openslides.mediafile.models import Mediafile
-from openslides.motion.models import Category, Motion, MotionLog, State
+from openslides.motion.models import (Category, Motion, MotionLog, MotionSubmitter,
+                                      MotionSupporter, MotionVersion, State)
 from openslides.participant.models import Group, User
 from openslides.utils.test import TestCase
 
@@ -54,6 +57,38 @@ class TestMotionListView(MotionViewTestCase):
     def test_get(self):
         self.check_url('/motion/', self.admin_client, 200)
 
+    def test_query_count_with_many_motions(self):
+        """
+        The number of queries does not depend on the number of motions.
+        """
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                response = self.admin_client.get('/motion/')
+            self.assertEqual(response.status_code, 200)
+            return len(context)
+
+        config['motion_min_supporters'] = 1
+        category = Category.objects.create(name='category', prefix='C')
+        for motion in (self.motion1, self.motion2):
+            motion.category = category
+            motion.save()
+            motion.add_submitter(self.delegate)
+            motion.support(self.staff)
+        query_count = count_queries()
+
+        state = self.motion1.state
+        pks = range(100, 1100)
+        Motion.objects.bulk_create(
+            Motion(pk=pk, identifier='C %d' % pk, category=category, state=state, active_version_id=pk)
+            for pk in pks)
+        MotionVersion.objects.bulk_create(
+            MotionVersion(pk=pk, motion_id=pk, title='motion%d' % pk, text='text') for pk in pks)
+        MotionSubmitter.objects.bulk_create(
+            MotionSubmitter(motion_id=pk, person=person) for pk in pks for person in (self.delegate, self.staff))
+        MotionSupporter.objects.bulk_create(
+            MotionSupporter(motion_id=pk, person=self.registered) for pk in pks)
+        self.assertEqual(count_queries(), query_count)
+
 
 class TestMotionDetailView(MotionViewTestCase):
     def test_get(self):
@@ -1,8 +1,8 @@
 # -*- coding: utf-8 -*-
 
-from openslides.participant.api import gen_password, gen_username
+from openslides.participant.api import gen_password, gen_username, get_person_summaries
 from openslides.participant.models import Group, User
-from openslides.utils.person import get_person, Persons
+from openslides.utils.person import EmptyPerson, get_person, get_persons, Persons
 from openslides.utils.test import TestCase
 
 
@@ -43,6 +43,33 @@ class UserTest(TestCase):
         self.assertEqual(get_person('user:2'), self.user1)
         self.assertEqual(len(Persons(person_prefix_filter='user')), 2)
 
+    def test_get_persons(self):
+        with self.assertNumQueries(1):
+            persons = get_persons(['user:1', 'user:2', 'user:42', 'invalid'])
+        self.assertEqual(persons['user:1'], User.objects.get(pk=1))
+        self.assertEqual(persons['user:2'], self.user1)
+        self.assertIsInstance(persons['user:42'], EmptyPerson)
+        self.assertIsInstance(persons['invalid'], EmptyPerson)
+
+    def test_get_person_summaries(self):
+        self.user1.title = u'Dr.'
+        self.user1.structure_level = u'München'
+        self.user1.save()
+        group = Group.objects.create(name='Test Group', group_as_person=True)
+        with self.assertNumQueries(2):
+            summaries = get_person_summaries(['user:2', group.person_id, 'invalid'])
+        summary = summaries['user:2']
+        self.assertFalse(hasattr(summary, '__dict__'))
+        self.assertEqual(summary, self.user1)
+        self.assertEqual(unicode(summary), unicode(self.user1))
+        self.assertEqual(str(summary), unicode(self.user1).encode('utf-8'))
+        self.assertEqual('%s' % summary, str(self.user1))
+        self.assertEqual(repr(summary), '<PersonSummary: %s>' % str(self.user1))
+        self.assertEqual(summary.sort_name, self.user1.sort_name)
+        self.assertEqual(summary.get_absolute_url(), '/participant/2/')
+        self.assertEqual(unicode(summaries[group.person_id]), 'Test Group')
+        self.assertIsInstance(summaries['invalid'], EmptyPerson)
+
     def test_get_absolute_url(self):
         urls = (('detail', '/participant/2/'),
                 ('update', '/participant/2/edit/'),
@@ -5,6 +5,7 @@ import re
 from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
 from django.test.client import Client
+from mock import patch
 
 from openslides.config.api import config
 from openslides.participant.api import get_registered_group
@@ -56,6 +57,32 @@ class UserViews(TestCase):
         self.assertEqual(response.status_code, 302)
 
 
+class ParticipantPDFViews(TestCase):
+    """
+    Tests the PDFs with all participants, which are drawn in chunks.
+    """
+    def setUp(self):
+        self.client = Client()
+        self.client.login(username='admin', password='admin')
+        for number in range(4):
+            User.objects.create(username='user_%d' % number, last_name='name_%d' % number)
+
+    @patch('openslides.participant.pdf.USER_CHUNK_SIZE', 2)
+    def test_participant_list(self):
+        response = self.client.get('/participant/print/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+    @patch('openslides.participant.pdf.USER_CHUNK_SIZE', 2)
+    def test_passwords(self):
+        response = self.client.get('/participant/passwords/print/')
+        self.assertEqual(response.status_code, 200)
+        content = ''.join(response.streaming_content)
+        # Every participant gets a page. The QR code of the url is saved once.
+        self.assertEqual(content.count('/Type /Page >>'), 5)
+        self.assertEqual(content.count('/Subtype /Form'), 1)
+
+
 class GroupViews(TestCase):
     """
     Tests the detail view for groups and later also the other views.
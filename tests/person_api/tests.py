@@ -2,7 +2,8 @@
 
 from django.contrib.auth.models import AnonymousUser
 
-from openslides.utils.person.api import get_person
+from openslides.utils.person import EmptyPerson
+from openslides.utils.person.api import get_person, get_persons
 from openslides.utils.test import TestCase
 
 from .models import TestModel, TestPerson
@@ -23,6 +24,13 @@ class PersonTest(TestCase):
         test_object.save()
         self.assertEqual(TestModel.objects.get(pk=test_object.pk).person, self.person1)
 
+    def test_get_persons(self):
+        # The receiver of the test persons does not know the argument
+        # id_list_filter.
+        persons = get_persons(['test:1', 'test:42'])
+        self.assertEqual(persons['test:1'], self.person1)
+        self.assertIsInstance(persons['test:42'], EmptyPerson)
+
     def test_save_anonymous_user_in_person_field(self):
         with self.assertRaisesRegexp(
                 AttributeError,
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import shutil
+import tempfile
+
+from django.test.client import Client
+from django.test.utils import override_settings
+from mock import patch
+
+from openslides.assignment.models import Assignment
+from openslides.motion.models import Motion
+from openslides.participant.models import User
+from openslides.poll.ballots import BallotBox, ballot_boxes
+from openslides.utils.exceptions import OpenSlidesError
+from openslides.utils.test import TestCase
+
+
+class BallotBoxTest(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.settings = override_settings(
+            BALLOT_LOG_PATH=self.path, BALLOT_BATCH_SIZE=3, BALLOT_FLUSH_INTERVAL=None)
+        self.settings.enable()
+        self.motion = Motion.objects.create(title='motion', text='text')
+        self.poll = self.motion.create_poll()
+        self.option_id = unicode(self.poll.get_options().get().pk)
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.path)
+        ballot_boxes.boxes.clear()
+
+    def get_weights(self):
+        self.poll = type(self.poll).objects.get(pk=self.poll.pk)
+        option = self.poll.get_vote_table()[0]
+        return dict((value, option[value] and option[value].weight)
+                    for value in ('Yes', 'No', 'Abstain'))
+
+    def test_submit(self):
+        box = BallotBox(self.poll)
+        self.assertFalse(box.submit('user:1', {self.option_id: 'Yes'}))
+        self.assertTrue(box.has_voted('user:1'))
+        self.assertRaises(OpenSlidesError, box.submit, 'user:1', {self.option_id: 'No'})
+        self.assertRaises(OpenSlidesError, box.submit, 'user:2', {self.option_id: 'Maybe'})
+        self.assertRaises(OpenSlidesError, box.submit, 'user:2', {'0': 'Yes'})
+        self.assertRaises(OpenSlidesError, box.submit, 'user:2', {})
+        self.assertFalse(box.submit('user:2', {self.option_id: 'No'}))
+        self.assertTrue(box.submit('user:3', {self.option_id: 'Yes'}))
+        box.close()
+        self.assertRaises(OpenSlidesError, box.submit, 'user:4', {self.option_id: 'Yes'})
+
+    def test_max_options(self):
+        assignment = Assignment.objects.create(name='assignment', posts=1)
+        for number in range(2):
+            person = User.objects.create(username='candidate_%d' % number)
+            assignment.run(person, person)
+        poll = assignment.gen_poll()
+        self.assertEqual(poll.get_vote_values(), ['Votes'])
+        option_ids = [unicode(option.pk) for option in poll.get_options()]
+        box = BallotBox(poll)
+        self.assertRaises(OpenSlidesError, box.submit, 'user:1', dict((option_id, 'Votes') for option_id in option_ids))
+        self.assertFalse(box.submit('user:1', {option_ids[0]: 'Votes'}))
+
+    def test_flush(self):
+        self.poll.set_vote_objects_with_values(
+            self.poll.get_options().get(), {'Yes': 2, 'No': -2, 'Abstain': 0})
+        self.poll.votescast = -1
+        self.poll.save()
+        box = BallotBox(self.poll)
+        for number, value in enumerate(['Yes', 'No', 'Yes', 'Abstain']):
+            box.submit('user:%d' % number, {self.option_id: value})
+        with self.assertNumQueries(11):
+            box.flush()
+        self.assertEqual(box.get_pending(), 0)
+        self.assertEqual(self.get_weights(), {'Yes': 4, 'No': 1, 'Abstain': 1})
+        self.assertEqual(self.poll.votesvalid, 4)
+        self.assertEqual(self.poll.votescast, 4)
+
+    def test_flush_in_other_thread(self):
+        box = BallotBox(self.poll)
+        for number in range(3):
+            box.submit('user:%d' % number, {self.option_id: 'Yes'})
+        with patch('openslides.poll.ballots.threading.Timer') as timer:
+            with override_settings(BALLOT_FLUSH_INTERVAL=1):
+                box.flush_lock.acquire()
+                box.flush(blocking=False)
+                box.flush_lock.release()
+        self.assertEqual(box.get_pending(), 3)
+        timer.assert_called_once_with(1, box.flush_in_thread)
+        self.assertTrue(timer.return_value.start.called)
+
+    def test_log(self):
+        box = BallotBox(self.poll)
+        box.submit('user:1', {self.option_id: 'Yes'})
+        box.flush()
+        box.submit('user:2', {self.option_id: 'No'})
+        # A new box reads the log after a restart and counts only the
+        # second ballot.
+        box = ballot_boxes.open(self.poll)
+        self.assertTrue(box.has_voted('user:1'))
+        self.assertTrue(box.has_voted('user:2'))
+        self.assertEqual(box.get_pending(), 0)
+        self.assertEqual(self.get_weights(), {'Yes': 1, 'No': 1, 'Abstain': None})
+
+    def test_restart_without_log(self):
+        with override_settings(BALLOT_LOG_PATH=None):
+            box = ballot_boxes.open(self.poll)
+            box.submit('user:5', {self.option_id: 'Yes'})
+            ballot_boxes.close(self.poll)
+            # The voters of counted ballots are known after a restart.
+            ballot_boxes.boxes.clear()
+            box = ballot_boxes.open(self.poll)
+            self.assertTrue(box.has_voted('user:5'))
+            self.assertRaises(OpenSlidesError, box.submit, 'user:5', {self.option_id: 'Yes'})
+            ballot_boxes.close(self.poll)
+        self.assertEqual(self.get_weights(), {'Yes': 1, 'No': None, 'Abstain': None})
+
+    def test_incomplete_log(self):
+        box = BallotBox(self.poll)
+        box.submit('user:1', {self.option_id: 'Yes'})
+        path = box.get_log_path()
+        # The ballots are not saved with the voters.
+        with open(path, 'rb') as log_file:
+            self.assertEqual([json.loads(line).keys() for line in log_file], [['voter'], ['ballot']])
+        box.log_file.write('{"vot')
+        box.log_file.close()
+        box = BallotBox(self.poll)
+        box.submit('user:2', {self.option_id: 'No'})
+        box.log_file.close()
+        box = BallotBox(self.poll)
+        self.assertTrue(box.has_voted('user:2'))
+        box.flush()
+        self.assertEqual(self.get_weights(), {'Yes': 1, 'No': 1, 'Abstain': None})
+
+    def test_crash_after_counting(self):
+        box = BallotBox(self.poll)
+        box.submit('user:1', {self.option_id: 'Yes'})
+        box.submit('user:2', {self.option_id: 'No'})
+        # The process stops after the votes are saved.
+        add_votes = type(self.poll).add_votes
+
+        def add_votes_and_stop(poll, *args):
+            add_votes(poll, *args)
+            raise SystemExit
+
+        with patch.object(type(self.poll), 'add_votes', add_votes_and_stop):
+            self.assertRaises(SystemExit, box.flush)
+        self.assertEqual(self.get_weights(), {'Yes': 1, 'No': 1, 'Abstain': None})
+        # After the restart, the ballots from the log are not counted again.
+        box = ballot_boxes.open(self.poll)
+        self.assertEqual(box.get_pending(), 0)
+        self.assertEqual(self.get_weights(), {'Yes': 1, 'No': 1, 'Abstain': None})
+        self.assertEqual(self.poll.votescast, 2)
+
+    def test_delete_poll(self):
+        box = ballot_boxes.open(self.poll)
+        box.submit('user:1', {self.option_id: 'Yes'})
+        path = box.get_log_path()
+        poll_id = self.poll.pk
+        self.poll.delete()
+        self.assertEqual(ballot_boxes.boxes, {})
+        self.assertFalse(os.path.exists(path))
+        # A new poll can get the id of the deleted one.
+        new_poll = self.motion.create_poll()
+        new_poll.pk = poll_id
+        box = ballot_boxes.open(new_poll)
+        self.assertFalse(box.has_voted('user:1'))
+
+
+@override_settings(BALLOT_LOG_PATH=None, BALLOT_FLUSH_INTERVAL=None)
+class BallotViewTest(TestCase):
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.login(username='admin', password='admin')
+        User.objects.create_user('delegate', 'delegate@user.user', 'delegate').groups.add(3)
+        User.objects.create_user('staff', 'staff@user.user', 'staff').groups.add(4)
+        self.delegate_client = Client()
+        self.delegate_client.login(username='delegate', password='delegate')
+        self.motion = Motion.objects.create(title='motion', text='text')
+        self.poll = self.motion.create_poll()
+        self.option_id = self.poll.get_options().get().pk
+        self.url = '/motion/%d/poll/1/ballot/' % self.motion.pk
+
+    def tearDown(self):
+        ballot_boxes.boxes.clear()
+
+    def test_vote(self):
+        data = {'option-%d' % self.option_id: 'Yes'}
+        response = self.delegate_client.post(self.url, data)
+        self.assertEqual(response.status_code, 400)
+
+        response = self.admin_client.get('/motion/%d/poll/1/ballot_box/open/' % self.motion.pk)
+        self.assertRedirects(response, '/motion/%d/poll/1/edit/' % self.motion.pk)
+        response = self.delegate_client.post(self.url, data)
+        self.assertEqual(json.loads(response.content), {'open': True, 'voted': True})
+        response = self.delegate_client.post(self.url, data)
+        self.assertEqual(response.status_code, 400)
+        response = self.delegate_client.get(self.url)
+        self.assertEqual(json.loads(response.content), {'open': True, 'voted': True})
+        response = Client().post(self.url, data)
+        self.assertEqual(response.status_code, 302)
+        staff_client = Client()
+        staff_client.login(username='staff', password='staff')
+        response = staff_client.post(self.url, data)
+        self.assertEqual(response.status_code, 403)
+        response = self.admin_client.get('/motion/%d/poll/1/edit/' % self.motion.pk)
+        self.assertContains(response, '1 electronic ballot')
+        # The votes can not be changed manually while the box is open.
+        response = self.admin_client.post('/motion/%d/poll/1/edit/' % self.motion.pk, {})
+        self.assertRedirects(response, '/motion/%d/poll/1/edit/' % self.motion.pk)
+        self.assertFalse(self.poll.get_votes().exists())
+
+        self.admin_client.get('/motion/%d/poll/1/ballot_box/close/' % self.motion.pk)
+        self.assertEqual(self.poll.get_vote_table()[0]['Yes'].weight, 1)
+        response = self.delegate_client.get(self.url)
+        self.assertEqual(json.loads(response.content), {'open': False, 'voted': True})
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+from django.utils import translation
+
+from openslides.poll.models import print_value
+from openslides.utils.test import TestCase
+
+
+class PrintValueTest(TestCase):
+    def test_print_value(self):
+        with translation.override('de'):
+            self.assertEqual(print_value(3, 100 / 7.0), u'3 (42,9 %)')
+        with translation.override('en'):
+            self.assertEqual(print_value(3, 100 / 7.0), u'3 (42.9 %)')
+            self.assertEqual(print_value(3), u'3')
+            self.assertEqual(print_value(-1), u'majority')
+            self.assertEqual(print_value(None, 50.0), u'undocumented')
+            self.assertEqual(print_value(1, 50.0, u','), u'1 (50,0 %)')
+
+    def test_threads(self):
+        """
+        Formats values in many threads with different languages at the same
+        time.
+        """
+        results = {}
+        start = threading.Event()
+
+        def format_values(language):
+            with translation.override(language):
+                start.wait()
+                results[language] = set(print_value(1, 100 / 3.0) for number in range(2000))
+
+        threads = [threading.Thread(target=format_values, args=(language,))
+                   for language in ('de', 'en', 'fr')]
+        for thread in threads:
+            thread.start()
+        start.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, {
+            'de': set([u'1 (33,3 %)']),
+            'en': set([u'1 (33.3 %)']),
+            'fr': set([u'1 (33,3 %)'])})
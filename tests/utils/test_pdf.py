@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+from io import BytesIO
+
+from reportlab.lib.units import cm
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate
+
+from openslides.utils.pdf import (BallotPaperPage, append_ballot_papers,
+                                  append_chunks, stylesheet)
+from openslides.utils.test import TestCase
+
+
+class BallotPaperTest(TestCase):
+    def test_pages(self):
+        story = []
+        cell = [Paragraph('Ballot', stylesheet['Ballot_title'])]
+        append_ballot_papers(story, [cell], 7.42 * cm, 19)
+        self.assertEqual([flowable.__class__ for flowable in story],
+                         [BallotPaperPage, PageBreak, BallotPaperPage, PageBreak, BallotPaperPage])
+        self.assertEqual([flowable.count for flowable in story[::2]], [8, 8, 3])
+
+        buffer = BytesIO()
+        SimpleDocTemplate(buffer, topMargin=-6, bottomMargin=-6, leftMargin=0, rightMargin=0).build(story)
+        content = buffer.getvalue()
+        # The ballot paper is saved once in the document.
+        self.assertEqual(content.count('/Subtype /Form'), 1)
+        self.assertEqual(content.count('/Type /Page >>'), 3)
+
+    def test_different_ballot_papers(self):
+        story = []
+        for title in ('Ballot 1', 'Ballot 2'):
+            append_ballot_papers(story, [[Paragraph(title, stylesheet['Ballot_title'])]], 7.42 * cm, 2)
+            story.append(PageBreak())
+        buffer = BytesIO()
+        SimpleDocTemplate(buffer, topMargin=-6, bottomMargin=-6, leftMargin=0, rightMargin=0).build(story)
+        # Every kind of ballot paper has its own form.
+        self.assertEqual(buffer.getvalue().count('/Subtype /Form'), 2)
+
+
+class StoryChunksTest(TestCase):
+    def test_build(self):
+        created = []
+
+        def get_chunks():
+            for number in range(3):
+                created.append(number)
+                # The chunks are created, when the former ones are drawn.
+                self.assertEqual(story, [])
+                yield [Paragraph('Chunk %d' % number, stylesheet['Normal']), PageBreak()]
+
+        story = []
+        append_chunks(story, get_chunks())
+        self.assertEqual(created, [])
+
+        buffer = BytesIO()
+        SimpleDocTemplate(buffer).build(story)
+        self.assertEqual(created, [0, 1, 2])
+        self.assertEqual(buffer.getvalue().count('/Type /Page >>'), 3)
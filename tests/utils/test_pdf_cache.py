@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test.utils import override_settings
+
+from openslides.utils.pdf_cache import PDFCache, bulk_write, get_stamp, update_stamp
+from openslides.utils.test import TestCase
+
+
+class PDFCacheTest(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.settings = override_settings(
+            PDF_CACHE_PATH=self.path, PDF_CACHE_MAX_SIZE=250,
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': self.path}})
+        self.settings.enable()
+        self.pdf_cache = PDFCache()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.path)
+
+    def test_get_or_build(self):
+        builds = []
+
+        def write(pdf_file):
+            builds.append(1)
+            pdf_file.write('content')
+
+        self.assertEqual(self.pdf_cache.get_or_build('key', write).read(), 'content')
+        self.assertEqual(self.pdf_cache.get_or_build('key', write).read(), 'content')
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(os.listdir(self.path), ['key.pdf'])
+
+    def test_failed_build(self):
+        def write(pdf_file):
+            raise ValueError
+
+        self.assertRaises(ValueError, self.pdf_cache.get_or_build, 'key', write)
+        self.assertEqual(os.listdir(self.path), [])
+        self.assertEqual(self.pdf_cache.builds, {})
+
+    def test_concurrent_builds(self):
+        started = threading.Event()
+        finish = threading.Event()
+        builds = []
+        results = []
+
+        def write(pdf_file):
+            builds.append(1)
+            started.set()
+            finish.wait()
+            pdf_file.write('content')
+
+        def get():
+            results.append(self.pdf_cache.get_or_build('key', write).read())
+
+        threads = [threading.Thread(target=get) for number in range(5)]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        finish.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(results, ['content'] * 5)
+
+    def test_evict(self):
+        for number in range(3):
+            path = os.path.join(self.path, 'key%d.pdf' % number)
+            with open(path, 'wb') as pdf_file:
+                pdf_file.write('x' * 100)
+            os.utime(path, (number, number))
+        # Use the oldest file.
+        self.pdf_cache.open('key0').close()
+        self.pdf_cache.evict()
+        self.assertEqual(sorted(os.listdir(self.path)), ['key0.pdf', 'key2.pdf'])
+
+    def test_stamp(self):
+        stamp = get_stamp('app')
+        self.assertEqual(get_stamp('app'), stamp)
+        update_stamp('app')
+        self.assertNotEqual(get_stamp('app'), stamp)
+
+    def test_bulk_write(self):
+        stamp = get_stamp('app')
+        with bulk_write('app'):
+            # The stamp is changed after the commit.
+            self.assertEqual(get_stamp('app'), stamp)
+        self.assertNotEqual(get_stamp('app'), stamp)
+
+    def test_local_cache_backend(self):
+        self.assertTrue(self.pdf_cache.is_enabled())
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertRaises(ImproperlyConfigured, self.pdf_cache.is_enabled)